@@ -4,8 +4,11 @@ import random
 import time
 import os
 
+from scanner import pack_report
+
 UDP_IP = "127.0.0.1"
 UDP_PORT = 12345
+BINARY = os.getenv("ADVER_BINARY") == "1"  # 1 이면 바이너리 비콘 보고 형식으로 전송
 
 file_list = ["mocking1.json", "mocking2.json"]
 
@@ -32,8 +35,11 @@ for i in range(2):
             # 👉 source 필드 추가
             data["_source"] = file_name
 
-            message = json.dumps(data)
-            sock.sendto(message.encode(), (UDP_IP, UDP_PORT))
+            if BINARY:
+                message = pack_report(file_name, [(b["address"], b["rssi"]) for k, b in data.items() if k != "_source"])
+            else:
+                message = json.dumps(data).encode()
+            sock.sendto(message, (UDP_IP, UDP_PORT))
 
             print(f"[{file_name}] Sent packet {repeat+1}/5 to {UDP_IP}:{UDP_PORT}")
             for key, beacon in data.items():
@@ -1,52 +1,135 @@
-from scanner import udp_scan
+from scanner import udp_scan_batches
 import json
 import os
+import time
 
-class KalmanFilter:
-    def __init__(self, process_noise=1e-2, measurement_noise=1, estimate_error=1, initial_value=0):
-        self.q = process_noise
-        self.r = measurement_noise
-        self.p = estimate_error
-        self.x = initial_value
+import numpy as np
 
-    def update(self, measurement):
-        self.p += self.q
-        k = self.p / (self.p + self.r)
-        self.x += k * (measurement - self.x)
-        self.p *= (1 - k)
-        return self.x
+class KalmanBank:
+    """
+    (source, address) 별 1차원 칼만 필터 묶음. 상태 x, p, q, r 와 마지막 측정 시각을 NumPy 배열에 두고
+    (source, address) → 슬롯 번호로 찾는다. 배치 하나를 벡터 연산으로 한 번에 갱신한다.
+    q 는 초당 프로세스 잡음이라 측정 간격(dt, 최대 max_dt 초)만큼 p 가 커진다 (드물게 잡힌 비콘일수록 새 값을 더 믿음).
+    """
+    def __init__(self, q=0.05, r=1.0, p0=1.0, max_dt=10.0, capacity=64):
+        self.q0, self.r0, self.p0, self.max_dt = q, r, p0, max_dt
+        self.x = np.zeros(capacity)
+        self.p = np.zeros(capacity)
+        self.q = np.zeros(capacity)
+        self.r = np.zeros(capacity)
+        self.t = np.zeros(capacity)                   # 마지막 측정 시각 (epoch 초)
+        self._ids: dict[tuple[str, str], int] = {}
+        self._by_source: dict[str, dict[str, int]] = {}   # source → {address: 슬롯}
+        self._free: list[int] = list(range(capacity - 1, -1, -1))
 
-kalman_filters = {}  # (source, address) → KalmanFilter
+    def __len__(self):
+        return len(self._ids)
 
-output_dir = "filter"
-os.makedirs(output_dir, exist_ok=True)  # 폴더 없으면 생성
+    def _grow(self):
+        n = len(self.x)
+        for name in ("x", "p", "q", "r", "t"):
+            setattr(self, name, np.concatenate([getattr(self, name), np.zeros(n)]))
+        self._free.extend(range(2 * n - 1, n - 1, -1))
+
+    def _intern(self, source: str, address: str, z: float, ts: float) -> int:
+        i = self._ids.get((source, address))
+        if i is None:
+            if not self._free:
+                self._grow()
+            i = self._free.pop()
+            self._ids[(source, address)] = i
+            self._by_source.setdefault(source, {})[address] = i
+            self.x[i], self.p[i], self.q[i], self.r[i], self.t[i] = z, self.p0, self.q0, self.r0, ts
+        return i
+
+    def update(self, sources, addresses, rssi, ts) -> np.ndarray:
+        """측정 배치 갱신 → 슬롯 번호 배열. 같은 필터의 측정이 여러 개면 시각 순으로 차례차례 반영한다."""
+        z = np.asarray(rssi, dtype=np.float64)
+        ts = np.asarray(ts, dtype=np.float64)
+        ids = np.empty(len(z), dtype=np.int64)
+        for j in np.argsort(ts, kind="stable").tolist():   # 새 필터의 초기값은 가장 이른 측정
+            ids[j] = self._intern(sources[j], addresses[j], float(z[j]), float(ts[j]))
+        if not len(ids):
+            return ids
+        order = np.lexsort((ts, ids))
+        sid = ids[order]
+        start = np.r_[0, np.flatnonzero(np.diff(sid)) + 1]
+        rank = np.arange(len(sid)) - np.repeat(start, np.diff(np.r_[start, len(sid)]))
+        for k in range(int(rank.max()) + 1):         # k 번째 측정끼리는 슬롯이 겹치지 않으므로 한 번에
+            sel = order[rank == k]
+            i, zk, tk = ids[sel], z[sel], ts[sel]
+            dt = np.clip(tk - self.t[i], 0.0, self.max_dt)
+            p = self.p[i] + self.q[i] * dt
+            gain = p / (p + self.r[i])
+            self.x[i] += gain * (zk - self.x[i])
+            self.p[i] = p * (1 - gain)
+            self.t[i] = np.maximum(self.t[i], tk)
+        return ids
 
-for parsed_data in udp_scan():
-    source = parsed_data.get("_source", "Unknown").replace(".json", "")  # e.g. mocking1
-    result_dict = {}
+    def update_reports(self, batch: list[dict]) -> set[str]:
+        """scanner 배치(list[dict]) 반영 → 값이 바뀐 source 집합"""
+        sources, addresses, rssi, ts = [], [], [], []
+        now = time.time()
+        for parsed in batch:
+            source = str(parsed.get("_source", "Unknown")).replace(".json", "")  # e.g. mocking1
+            t = parsed.get("_ts", now)
+            for key, beacon in parsed.items():
+                if key.startswith("_") or not isinstance(beacon, dict) or beacon.get("rssi") is None:
+                    continue
+                sources.append(source)
+                addresses.append(beacon.get("address", key))
+                rssi.append(beacon["rssi"])
+                ts.append(beacon.get("ts", t))
+        self.update(sources, addresses, rssi, ts)
+        return set(sources)
 
-    for key, beacon in parsed_data.items():
-        if key == "_source" or not isinstance(beacon, dict):
-            continue
+    def values(self, source: str) -> dict[str, float]:
+        """source 하나의 필터 값 {address: rssi} (그 source 의 비콘 수만큼만 본다)"""
+        slots = self._by_source.get(source, {})
+        return {addr: float(self.x[i]) for addr, i in slots.items()}
 
-        rssi = beacon.get("rssi")
-        address = beacon.get("address", key)
-        if rssi is None:
-            continue
+    def sources(self) -> list[str]:
+        return list(self._by_source)
 
-        filter_key = (source, address)
-        if filter_key not in kalman_filters:
-            kalman_filters[filter_key] = KalmanFilter(initial_value=rssi)
+    def evict(self, max_age: float, now: float | None = None) -> int:
+        """max_age 초 동안 측정이 없던 필터를 지우고 슬롯을 재사용 목록에 돌려준다"""
+        now = time.time() if now is None else now
+        stale = [(key, i) for key, i in self._ids.items() if now - self.t[i] > max_age]
+        for (source, address), i in stale:
+            del self._ids[(source, address)]
+            slots = self._by_source[source]
+            del slots[address]
+            if not slots:
+                del self._by_source[source]
+            self._free.append(i)
+        return len(stale)
 
-        kalman_filters[filter_key].update(rssi)
 
-    # === 이 source에 해당하는 값만 모아 저장 ===
-    for (src, addr), filt in kalman_filters.items():
-        if src == source:
-            result_dict[f"{src}.json_{addr}"] = round(filt.x, 2)
+output_dir = "filter"
+MAX_AGE = float(os.getenv("KALMAN_MAX_AGE", "30"))  # 이 시간(초) 동안 안 잡힌 비콘은 지움
+
+def save(bank, source):
+    result_dict = {f"{source}.json_{addr}": round(x, 2) for addr, x in bank.values(source).items()}
 
     save_path = os.path.join(output_dir, f"filtered_{source}.json")
     with open(save_path, "w") as f:
         json.dump(result_dict, f, indent=2)
 
     print(f"✔ {source} → {save_path}에 필터 결과 저장 완료 ({len(result_dict)}개)")
+
+def main():
+    os.makedirs(output_dir, exist_ok=True)  # 폴더 없으면 생성
+    bank = KalmanBank()
+    last_evict = time.time()
+
+    for batch in udp_scan_batches():
+        # 배치 안에서 바뀐 source 는 배치가 끝난 뒤 한 번만 저장
+        for source in bank.update_reports(batch):
+            save(bank, source)
+
+        if time.time() - last_evict > MAX_AGE:
+            bank.evict(MAX_AGE)
+            last_evict = time.time()
+
+if __name__ == "__main__":
+    main()
@@ -43,39 +43,51 @@ def least_squares_trilateration(positions, distances):
     except np.linalg.LinAlgError:
         return None
 
-# === 모든 filtered_mocking*.json 처리 ===
-for filepath in glob.glob("filter/filtered_mocking*.json"):
-    filename = os.path.basename(filepath)
-    source = filename.replace("filtered_", "").replace(".json", "")  # mocking1, mocking2
+# 위치를 아는 비콘 중 RSSI 가 min_rssi 보다 센 것만 (MAC, rssi)
+def usable(rssi_by_mac, locations=beacon_locations, min_rssi=-85):
+    return [(mac, rssi) for mac, rssi in rssi_by_mac.items() if mac in locations and rssi > min_rssi]
 
+# 필터링된 RSSI {MAC: rssi} → 위치 (pipeline.py 에서도 사용)
+def locate(rssi_by_mac, locations=beacon_locations, min_rssi=-85, limit=50):
+    used = usable(rssi_by_mac, locations, min_rssi)
+    positions = [locations[mac] for mac, _ in used]
+    distances = [rssi_to_distance(rssi) for _, rssi in used]
+
+    result = least_squares_trilateration(positions, distances)
+    if result is None:
+        return None
+    x, y = float(result[0]), float(result[1])
+    if abs(x) > limit or abs(y) > limit:  # 비정상 위치
+        return None
+    return (x, y)
+
+# filter/filtered_*.json {"mocking1.json_MAC": rssi} → {MAC: rssi}
+def load_filtered(filepath):
     with open(filepath, "r") as f:
-        rssi_data = json.load(f)
-
-    positions = []
-    distances = []
-
-    print(f"\n🧭 [Source: {source}]")
-
-    for full_key, rssi in rssi_data.items():
-        try:
-            _, mac = full_key.split("_", 1)
-            if mac in beacon_locations and rssi > -85:
-                distance = rssi_to_distance(rssi)
-                print(f"🔎 {mac}: RSSI = {rssi} → 거리 = {distance:.2f}m")
-                positions.append(beacon_locations[mac])
-                distances.append(distance)
-        except ValueError:
-            continue
+        data = json.load(f)
+    return {key.split("_", 1)[1]: rssi for key, rssi in data.items() if "_" in key}
 
-    if len(positions) >= 3:
-        result = least_squares_trilateration(positions, distances)
+def main():
+    # === 모든 filtered_mocking*.json 처리 ===
+    for filepath in glob.glob("filter/filtered_mocking*.json"):
+        filename = os.path.basename(filepath)
+        source = filename.replace("filtered_", "").replace(".json", "")  # mocking1, mocking2
+        rssi_by_mac = load_filtered(filepath)
+
+        print(f"\n🧭 [Source: {source}]")
+        used = usable(rssi_by_mac)
+        for mac, rssi in used:
+            print(f"🔎 {mac}: RSSI = {rssi} → 거리 = {rssi_to_distance(rssi):.2f}m")
+
+        if len(used) < 3:
+            print("❌ 사용 가능한 비콘 수 부족 (RSSI 필터링 후)")
+            continue
+        result = locate(rssi_by_mac)
         if result:
             x, y = result
-            if abs(x) > 50 or abs(y) > 50:
-                print(f"⚠️ 비정상 위치 추정: x = {x:.2f}, y = {y:.2f} (오차 가능성)")
-            else:
-                print(f"📍 최소제곱법 추정 위치: x = {x:.2f} m, y = {y:.2f} m")
+            print(f"📍 최소제곱법 추정 위치: x = {x:.2f} m, y = {y:.2f} m")
         else:
-            print("❌ 최소제곱법 계산 실패")
-    else:
-        print("❌ 사용 가능한 비콘 수 부족 (RSSI 필터링 후)")
+            print("❌ 최소제곱법 계산 실패 (또는 비정상 위치)")
+
+if __name__ == "__main__":
+    main()
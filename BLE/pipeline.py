@@ -0,0 +1,223 @@
+# pipeline.py  (BLE 위치 추정 상주 파이프라인: 수신 → 칼만 필터 → 거리 → 위치 → 게시)
+#
+#   python pipeline.py                                   # UDP 12345 수신, http://localhost:8090/positions
+#   python pipeline.py --method tri --snapshot-sec 10    # 삼변측량, 10초마다 filter/*.json + positions.json 저장
+#
+# 단계끼리는 메모리 큐로만 넘기고 파일을 거치지 않는다.
+#   수신 스레드(scanner.UdpReceiver) ─배치 큐→ 필터 스레드(KalmanBank) ─태그별 최신값→ 위치 스레드(lsm/tri.locate)
+#   → Positions (HTTP 로 게시)
+# 필터 → 위치 사이는 태그(source)마다 최신 RSSI 만 남기므로 위치 계산이 밀려도 대기열이 쌓이지 않고
+# 항상 가장 최근 값으로 계산한다.
+#
+# HTTP (localhost):
+#   GET /positions            모든 태그의 마지막 위치
+#   GET /positions/<tag>      태그 하나
+#   GET /stream               위치가 나올 때마다 Server-Sent Events 로 전송
+#   GET /stats                수신/버림/파싱 오류/필터 수/위치 계산 수
+import argparse, json, os, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import lsm, tri
+from kalman import KalmanBank
+from scanner import UdpReceiver
+
+HTTP_PORT = int(os.getenv("PIPELINE_HTTP_PORT", "8090"))
+SNAPSHOT_SEC = float(os.getenv("PIPELINE_SNAPSHOT_SEC", "0"))    # 0 = 디스크 저장 안 함
+MAX_AGE = float(os.getenv("KALMAN_MAX_AGE", "30"))
+METHODS = {"lsm": lsm.locate, "tri": tri.locate}
+
+
+class _Latest:
+    """태그별 최신 값 우편함. put 은 덮어쓰고, take 는 쌓인 것을 한꺼번에 가져간다."""
+    def __init__(self):
+        self._items: dict = {}
+        self._cond = threading.Condition()
+        self.replaced = 0                              # 위치 계산 전에 새 값으로 덮인 횟수
+
+    def put(self, key, value):
+        with self._cond:
+            if key in self._items:
+                self.replaced += 1
+            self._items[key] = value
+            self._cond.notify()
+
+    def take(self, timeout: float) -> dict:
+        with self._cond:
+            if not self._items:
+                self._cond.wait(timeout)
+            items, self._items = self._items, {}
+            return items
+
+
+class Positions:
+    """태그별 마지막 위치 + SSE 구독자 알림"""
+    def __init__(self):
+        self._pos: dict[str, dict] = {}
+        self._cond = threading.Condition()
+        self.seq = 0
+
+    def publish(self, tag: str, pos: dict):
+        with self._cond:
+            self.seq += 1
+            pos["seq"] = self.seq
+            self._pos[tag] = pos
+            self._cond.notify_all()
+
+    def get(self, tag: str | None = None):
+        with self._cond:
+            return dict(self._pos) if tag is None else self._pos.get(tag)
+
+    def wait(self, seq: int, timeout: float) -> tuple[int, list[dict]]:
+        """seq 이후 바뀐 위치가 생길 때까지 기다림 → (새 seq, 바뀐 위치 목록)"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.seq != seq, timeout)
+            changed = [p for p in self._pos.values() if p["seq"] > seq]
+            return self.seq, changed
+
+
+class Pipeline:
+    def __init__(self, udp_ip="0.0.0.0", udp_port=12345, method="lsm", snapshot_sec=SNAPSHOT_SEC,
+                 snapshot_dir="filter", max_age=MAX_AGE):
+        self.rx = UdpReceiver(udp_ip, udp_port)
+        self.bank = KalmanBank()
+        self.locate = METHODS[method]
+        self.method = method
+        self.snapshot_sec, self.snapshot_dir, self.max_age = snapshot_sec, snapshot_dir, max_age
+        self.latest = _Latest()
+        self.positions = Positions()
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self.located = self.failed = 0
+
+    def start(self):
+        self.rx.start()
+        for name, target in (("ble-filter", self._filter_loop), ("ble-locate", self._locate_loop)):
+            t = threading.Thread(target=target, name=name, daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def close(self):
+        self._stop.set()
+        self.rx.close()
+        for t in self._threads:
+            t.join(timeout=2)
+
+    # ----- 필터 단계 (KalmanBank 는 이 스레드만 만진다) -----
+    def _filter_loop(self):
+        last_evict = last_snap = time.time()
+        while not self._stop.is_set():
+            batch = self.rx.get(timeout=0.5)
+            if batch:
+                ts = max(p.get("_ts", 0) for p in batch)
+                for source in self.bank.update_reports(batch):
+                    self.latest.put(source, (ts, self.bank.values(source)))
+            now = time.time()
+            if now - last_evict > self.max_age:
+                self.bank.evict(self.max_age, now)
+                last_evict = now
+            if self.snapshot_sec > 0 and now - last_snap >= self.snapshot_sec:
+                self._snapshot()
+                last_snap = now
+
+    def _snapshot(self):
+        """kalman.py 와 같은 filter/filtered_<source>.json + positions.json (lsm.py/tri.py 단독 실행용)"""
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        files = {f"filtered_{source}.json": {f"{source}.json_{addr}": round(x, 2)
+                                             for addr, x in self.bank.values(source).items()}
+                 for source in self.bank.sources()}
+        files["positions.json"] = self.positions.get()
+        for name, data in files.items():
+            path = os.path.join(self.snapshot_dir, name)
+            with open(path + ".tmp", "w") as f:
+                json.dump(data, f)
+            os.replace(path + ".tmp", path)
+
+    # ----- 위치 단계 -----
+    def _locate_loop(self):
+        while not self._stop.is_set():
+            for tag, (ts, rssi) in self.latest.take(timeout=0.5).items():
+                result = self.locate(rssi)
+                if result is None:
+                    self.failed += 1
+                    continue
+                self.located += 1
+                x, y = result
+                self.positions.publish(tag, {
+                    "tag": tag, "x": round(float(x), 3), "y": round(float(y), 3), "ts": ts,
+                    "method": self.method, "beacons": len(rssi),
+                })
+
+    def stats(self) -> dict:
+        return {**self.rx.stats(), "filters": len(self.bank), "tags": len(self.positions.get()),
+                "located": self.located, "failed": self.failed, "coalesced": self.latest.replaced}
+
+
+# ----- HTTP 게시 -----
+def make_handler(pipe: Pipeline):
+    class Handler(BaseHTTPRequestHandler):
+        def _json(self, data, status=200):
+            body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = self.path.split("?", 1)[0].rstrip("/")
+            if path == "/positions":
+                return self._json(pipe.positions.get())
+            if path.startswith("/positions/"):
+                pos = pipe.positions.get(path[len("/positions/"):])
+                return self._json(pos) if pos else self._json({"detail": "위치 없음"}, 404)
+            if path == "/stats":
+                return self._json(pipe.stats())
+            if path == "/stream":
+                return self._stream()
+            self._json({"detail": "not found"}, 404)
+
+        def _stream(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            seq = 0
+            try:
+                while not pipe._stop.is_set():
+                    seq, changed = pipe.positions.wait(seq, timeout=15)
+                    if changed:
+                        self.wfile.write("".join(f"data: {json.dumps(p, ensure_ascii=False)}\n\n" for p in changed).encode("utf-8"))
+                    else:
+                        self.wfile.write(b": keepalive\n\n")
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+def main():
+    ap = argparse.ArgumentParser(description="streaming BLE localization pipeline")
+    ap.add_argument("--udp-port", type=int, default=12345)
+    ap.add_argument("--http-port", type=int, default=HTTP_PORT)
+    ap.add_argument("--method", default="lsm", choices=sorted(METHODS))
+    ap.add_argument("--snapshot-sec", type=float, default=SNAPSHOT_SEC, help="0 이면 디스크에 저장하지 않음")
+    args = ap.parse_args()
+
+    pipe = Pipeline(udp_port=args.udp_port, method=args.method, snapshot_sec=args.snapshot_sec).start()
+    server = ThreadingHTTPServer(("127.0.0.1", args.http_port), make_handler(pipe))
+    server.daemon_threads = True
+    print(f"[Pipeline] http://127.0.0.1:{args.http_port}/positions  (method={args.method})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pipe.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,185 @@
-# scanner.py
-import socket
-import json
+# scanner.py  (UDP 스캔 수신: 수신 스레드 + 제한 큐 + 배치 단위 파싱)
+#
+#   for batch in udp_scan_batches():          # [{"_source": ..., "_ts": 수신 시각, "beacon1": {...}}, ...]
+#       ...
+#   for parsed in udp_scan():                 # 예전처럼 패킷 하나씩
+#       ...
+#
+# 수신 스레드는 소켓이 읽을 수 있게 되면 EAGAIN 이 날 때까지(최대 SCAN_BATCH 개) 한꺼번에 읽어
+# 원본 바이트 묶음을 큐에 넣기만 한다. 파싱은 꺼내 쓰는 쪽에서 배치마다 한다.
+# 큐(SCAN_QUEUE 배치)가 차면 가장 오래된 배치를 버리고 dropped 에 센다 (위치 추정에는 최신 값이 중요).
+#
+# 패킷 형식 두 가지:
+#   JSON    {"_source": "mocking1.json", "beacon1": {"name": ..., "address": ..., "rssi": -30}, ...}
+#   바이너리 "BR" + 버전(1) + source 길이(1) + 비콘 수(1) + source(UTF-8) + 비콘마다 [MAC 6바이트, RSSI int8]
+#            (ESP32 수신기용. 비콘 하나에 7바이트, pack_report() 로 만든다)
+import json, os, queue, select, socket, struct, threading, time
 
-def udp_scan(udp_ip="0.0.0.0", udp_port=12345):
-    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    sock.bind((udp_ip, udp_port))
-    print(f"[Scanner] Listening on {udp_ip}:{udp_port}...")
+try:
+    import orjson                    # 선택: 설치되어 있으면 JSON 파싱에 사용
+except ImportError:
+    orjson = None
 
-    while True:
+RCVBUF = int(os.getenv("SCAN_RCVBUF", str(4 << 20)))       # 커널 수신 버퍼 (바이트)
+QUEUE_BATCHES = int(os.getenv("SCAN_QUEUE", "256"))       # 대기 배치 수 상한
+BATCH_MAX = int(os.getenv("SCAN_BATCH", "256"))           # 배치 하나에 담는 최대 패킷 수
+MAX_DATAGRAM = 65535
+
+MAGIC, VERSION = b"BR", 1
+_HEAD = struct.Struct("<2sBBB")
+_BEACON = struct.Struct("<6sb")
+
+def pack_report(source: str, beacons) -> bytes:
+    """[(MAC 문자열, rssi)] → 바이너리 비콘 보고 패킷"""
+    src = source.encode("utf-8")[:255]
+    beacons = list(beacons)[:255]
+    out = [_HEAD.pack(MAGIC, VERSION, len(src), len(beacons)), src]
+    for addr, rssi in beacons:
+        out.append(_BEACON.pack(bytes.fromhex(addr.replace(":", "")), max(-128, min(127, int(rssi)))))
+    return b"".join(out)
+
+def _parse_binary(data: bytes) -> dict:
+    magic, ver, nsrc, count = _HEAD.unpack_from(data)
+    if ver != VERSION:
+        raise ValueError(f"unknown report version {ver}")
+    off = _HEAD.size + nsrc
+    if len(data) < off + count * _BEACON.size:
+        raise ValueError("truncated report")
+    parsed = {"_source": data[_HEAD.size:off].decode("utf-8")}
+    for mac, rssi in _BEACON.iter_unpack(data[off:off + count * _BEACON.size]):
+        addr = mac.hex(":").upper()
+        parsed[addr] = {"address": addr, "rssi": rssi}
+    return parsed
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+def parse(data: bytes, ts: float | None = None) -> dict:
+    parsed = _parse_binary(data) if data[:2] == MAGIC else _loads(data)
+    if not isinstance(parsed, dict):
+        raise ValueError("report is not an object")
+    if ts is not None:
+        parsed["_ts"] = ts
+    return parsed
+
+
+class UdpReceiver:
+    """
+    논블로킹 UDP 수신기. start() 하면 수신 스레드가 돌고, batches() 가 파싱된 배치를 내준다.
+    stats() 로 수신/배치/버림/파싱 오류 수와 실제 커널 버퍼 크기를 본다.
+    """
+    def __init__(self, udp_ip="0.0.0.0", udp_port=12345, rcvbuf=RCVBUF, max_queue=QUEUE_BATCHES,
+                 batch_max=BATCH_MAX):
+        self.addr = (udp_ip, udp_port)
+        self.rcvbuf = rcvbuf
+        self.batch_max = max(1, batch_max)
+        self._q: queue.Queue = queue.Queue(maxsize=max(1, max_queue))
+        self._sock: socket.socket | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.received = self.batches_in = self.dropped = self.bad = 0
+
+    def start(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.rcvbuf)
+        sock.bind(self.addr)
+        sock.setblocking(False)
+        self._sock = sock
+        self.addr = sock.getsockname()
+        self._thread = threading.Thread(target=self._recv_loop, name="udp-recv", daemon=True)
+        self._thread.start()
+        print(f"[Scanner] Listening on {self.addr[0]}:{self.addr[1]} (rcvbuf {self.kernel_rcvbuf()} bytes)")
+        return self
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        if self._sock is not None:
+            self._sock.close()
+
+    def kernel_rcvbuf(self) -> int:
+        return self._sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF) if self._sock else 0
+
+    # ----- 수신 스레드 (읽기만 한다) -----
+    def _drain(self) -> list:
+        batch, now = [], time.time()
+        recv = self._sock.recvfrom
+        while len(batch) < self.batch_max:
+            try:
+                data, _ = recv(MAX_DATAGRAM)
+            except OSError:                          # BlockingIOError = 더 읽을 것 없음
+                break
+            batch.append(data)
+        return [(d, now) for d in batch]
+
+    def _recv_loop(self):
+        while not self._stop.is_set():
+            try:
+                ready, _, _ = select.select([self._sock], [], [], 0.5)
+            except (OSError, ValueError):
+                return
+            if not ready:
+                continue
+            batch = self._drain()
+            if batch:
+                self._put(batch)
+
+    def _put(self, batch: list):
+        with self._lock:
+            self.received += len(batch)
+            self.batches_in += 1
+        while True:
+            try:
+                self._q.put_nowait(batch)
+                return
+            except queue.Full:
+                try:
+                    old = self._q.get_nowait()          # 큐가 가득 차면 가장 오래된 배치를 버림
+                except queue.Empty:
+                    continue
+                with self._lock:
+                    self.dropped += len(old)
+
+    # ----- 소비 쪽 -----
+    def get(self, timeout: float | None = None) -> list[dict]:
+        """배치 하나를 꺼내 파싱. timeout 안에 없으면 빈 리스트"""
         try:
-            data, addr = sock.recvfrom(4096)
-            decoded = data.decode()
-            parsed = json.loads(decoded)
-            yield parsed
-        except Exception as e:
-            print(f"[Scanner] ⚠️ Error: {e}")
+            raw = self._q.get(timeout=timeout)
+        except queue.Empty:
+            return []
+        out, bad = [], 0
+        for data, ts in raw:
+            try:
+                out.append(parse(data, ts))
+            except Exception:
+                bad += 1
+        if bad:
+            with self._lock:
+                self.bad += bad
+        return out
+
+    def batches(self, timeout: float | None = None):
+        while not self._stop.is_set():
+            batch = self.get(timeout)
+            if batch:
+                yield batch
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"received": self.received, "batches": self.batches_in, "dropped": self.dropped,
+                    "bad": self.bad, "queued": self._q.qsize(), "rcvbuf": self.kernel_rcvbuf()}
+
 
+def udp_scan_batches(udp_ip="0.0.0.0", udp_port=12345, **kw):
+    """파싱된 패킷 배치(list[dict])를 계속 내주는 제너레이터"""
+    rx = UdpReceiver(udp_ip, udp_port, **kw).start()
+    try:
+        yield from rx.batches(timeout=1.0)
+    finally:
+        rx.close()
 
+def udp_scan(udp_ip="0.0.0.0", udp_port=12345, **kw):
+    """예전 인터페이스: 패킷 하나씩"""
+    for batch in udp_scan_batches(udp_ip, udp_port, **kw):
+        yield from batch
@@ -0,0 +1,8 @@
+# conftest.py  (BLE 모듈 테스트: kalman / scanner / lsm / tri)
+#
+#   python -m pytest -q BLE/tests
+import sys
+from os.path import abspath, dirname
+
+BLE_DIR = dirname(dirname(abspath(__file__)))
+sys.path.insert(0, BLE_DIR)
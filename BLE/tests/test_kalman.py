@@ -0,0 +1,91 @@
+# KalmanBank: 측정 간격(dt)에 비례하는 프로세스 잡음의 스칼라 필터와 같은 값, 슬롯 관리
+import numpy as np
+import pytest
+
+from kalman import KalmanBank
+
+class _ScalarFilter:
+    """비교 기준: 비콘 하나의 1차원 칼만 필터, q 는 초당 (dt 는 max_dt 로 자름)"""
+    def __init__(self, z, ts, q=0.05, r=1.0, p0=1.0, max_dt=10.0):
+        self.x, self.t, self.p, self.q, self.r, self.max_dt = z, ts, p0, q, r, max_dt
+
+    def update(self, z, ts):
+        self.p += self.q * min(max(ts - self.t, 0.0), self.max_dt)
+        k = self.p / (self.p + self.r)
+        self.x += k * (z - self.x)
+        self.p *= (1 - k)
+        self.t = max(self.t, ts)
+        return self.x
+
+def _reference(reports):
+    """시각 순으로 한 측정씩: 처음 본 비콘은 그 측정으로 초기화하고 곧바로 update"""
+    filters = {}
+    for source, address, rssi, ts in sorted(reports, key=lambda r: r[3]):
+        f = filters.setdefault((source, address), _ScalarFilter(rssi, ts))
+        f.update(rssi, ts)
+    return filters
+
+@pytest.fixture
+def reports():
+    rng = np.random.default_rng(0)
+    out, t = [], 0.0
+    for _ in range(200):
+        t += float(rng.exponential(0.8))                # 불규칙한 패킷 간격 (가끔 max_dt 보다 김)
+        if rng.random() < 0.05:
+            t += 15.0
+        for source in ("mocking1", "mocking2"):
+            for b in range(int(rng.integers(1, 6))):
+                out.append((source, f"AA:BB:CC:00:00:{b:02X}", float(rng.integers(-90, -30)), t + b * 0.01))
+    return out
+
+@pytest.mark.parametrize("batch", [1, 7, 64, 10_000])
+def test_matches_scalar_filter(reports, batch):
+    bank = KalmanBank(capacity=2)                       # 중간에 _grow 도 거치게
+    for i in range(0, len(reports), batch):
+        chunk = reports[i:i + batch]
+        bank.update(*zip(*chunk))
+    ref = _reference(reports)
+    assert len(bank) == len(ref)
+    for (source, address), f in ref.items():
+        assert bank.values(source)[address] == pytest.approx(f.x, abs=1e-9)
+        assert bank.p[bank._ids[(source, address)]] == pytest.approx(f.p, abs=1e-12)
+
+def test_longer_gap_trusts_new_measurement_more():
+    fast, slow = KalmanBank(), KalmanBank()
+    for k, z in enumerate([-60, -60, -60, -80]):
+        fast.update(["s"], ["m"], [z], [k * 0.1])
+        slow.update(["s"], ["m"], [z], [k * 5.0])
+    assert fast.values("s")["m"] > slow.values("s")["m"] > -80      # 간격이 길면 -80 쪽으로 더 끌려감
+
+def test_gap_is_capped_by_max_dt():
+    a, b = KalmanBank(max_dt=2.0), KalmanBank(max_dt=2.0)
+    for bank, gap in ((a, 2.0), (b, 600.0)):
+        bank.update(["s"], ["m"], [-60], [0.0])
+        bank.update(["s"], ["m"], [-80], [gap])
+    assert a.values("s")["m"] == pytest.approx(b.values("s")["m"])
+
+def test_out_of_order_measurement_adds_no_noise():
+    bank, ref = KalmanBank(), _ScalarFilter(-60, 10.0)
+    bank.update(["s"], ["m"], [-60], [10.0])
+    bank.update(["s"], ["m"], [-70], [4.0])             # 늦게 도착한 옛 측정: dt=0
+    ref.update(-60, 10.0)
+    ref.update(-70, 4.0)
+    assert bank.values("s")["m"] == pytest.approx(ref.x) and bank.t[bank._ids[("s", "m")]] == 10.0
+
+def test_same_filter_twice_in_one_batch_applies_in_time_order():
+    bank, ref = KalmanBank(), _ScalarFilter(-40, 1.0)
+    bank.update(["s", "s", "s"], ["m", "m", "m"], [-60, -40, -80], [2.0, 1.0, 3.0])
+    for z, ts in ((-40, 1.0), (-60, 2.0), (-80, 3.0)):
+        ref.update(z, ts)
+    assert bank.values("s")["m"] == pytest.approx(ref.x)
+
+def test_update_reports_and_evict():
+    bank = KalmanBank()
+    batch = [{"_source": "mocking1.json", "_ts": 100.0, "b1": {"address": "M1", "rssi": -50}, "b2": {"rssi": None}},
+             {"_source": "mocking2.json", "_ts": 130.0, "b1": {"address": "M2", "rssi": -70}}]
+    assert bank.update_reports(batch) == {"mocking1", "mocking2"}
+    assert bank.values("mocking1") == {"M1": -50.0}
+    assert bank.evict(20, now=140.0) == 1
+    assert bank.sources() == ["mocking2"] and len(bank) == 1
+    bank.update(["mocking3"], ["M3"], [-65], [141.0])    # 비운 슬롯 재사용
+    assert len(bank) == 2 and len(bank.x) == 64
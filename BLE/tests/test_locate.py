@@ -0,0 +1,46 @@
+# lsm.locate / tri.locate 와 단독 실행 main(): filter/filtered_*.json 을 읽어 같은 위치를 출력
+import json
+import math
+
+import pytest
+
+import lsm
+import tri
+
+def _rssi_at(x, y, tx_power=-65, n=3.0):
+    """(x, y) 에서 잡힐 RSSI (rssi_to_distance 의 역함수)"""
+    out = {}
+    for mac, (bx, by) in lsm.beacon_locations.items():
+        d = max(((x - bx) ** 2 + (y - by) ** 2) ** 0.5, 0.1)
+        out[mac] = tx_power - 10 * n * math.log10(d)
+    return out
+
+@pytest.mark.parametrize("module", [lsm, tri])
+def test_locate_recovers_position(module):
+    x, y = module.locate(_rssi_at(1.5, 2.0))
+    assert x == pytest.approx(1.5, abs=1e-6) and y == pytest.approx(2.0, abs=1e-6)
+
+def test_lsm_needs_three_usable_beacons():
+    rssi = _rssi_at(1.0, 1.0)
+    weak = {mac: (v if i < 2 else -95) for i, (mac, v) in enumerate(rssi.items())}
+    assert len(lsm.usable(weak)) == 2
+    assert lsm.locate(weak) is None
+    assert lsm.locate({"00:00:00:00:00:00": -40}) is None
+
+def test_tri_skips_unknown_beacons():
+    rssi = _rssi_at(3.0, 4.0)
+    rssi["FF:FF:FF:FF:FF:FF"] = -20                    # 가장 세지만 위치를 모르는 비콘
+    assert tri.locate(rssi) == pytest.approx((3.0, 4.0), abs=1e-6)
+
+@pytest.mark.parametrize("module, label", [(lsm, "최소제곱법"), (tri, "삼변측량")])
+def test_main_prints_locate_result(module, label, tmp_path, monkeypatch, capsys):
+    (tmp_path / "filter").mkdir()
+    rssi = _rssi_at(2.0, 3.0)
+    with open(tmp_path / "filter" / "filtered_mocking1.json", "w") as f:   # kalman.save 와 같은 키 형식
+        json.dump({f"mocking1.json_{mac}": round(v, 2) for mac, v in rssi.items()}, f)
+    monkeypatch.chdir(tmp_path)
+    module.main()
+    out = capsys.readouterr().out
+    x, y = module.locate(lsm.load_filtered("filter/filtered_mocking1.json"))
+    assert "[Source: mocking1]" in out
+    assert f"{label} 추정 위치: x = {x:.2f} m, y = {y:.2f} m" in out
@@ -0,0 +1,91 @@
+# pipeline: UDP 보고 → KalmanBank → locate → Positions / HTTP 게시, 태그별 최신 값 병합, 스냅샷 파일
+import json
+import math
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import lsm
+import pipeline
+
+def _report(source, x, y, ts=None):
+    """(x, y) 에 있는 태그가 보낼 JSON 보고 (lsm.rssi_to_distance 의 역함수)"""
+    msg = {"_source": source}
+    for i, (mac, (bx, by)) in enumerate(lsm.beacon_locations.items()):
+        d = max(math.hypot(x - bx, y - by), 0.1)
+        msg[f"beacon{i}"] = {"address": mac, "rssi": -65 - 30 * math.log10(d)}
+    if ts is not None:
+        msg["_ts"] = ts
+    return msg
+
+def test_latest_keeps_only_newest_value_per_tag():
+    box = pipeline._Latest()
+    box.put("a", 1)
+    box.put("b", 2)
+    box.put("a", 3)
+    assert box.take(timeout=0) == {"a": 3, "b": 2} and box.replaced == 1
+    assert box.take(timeout=0) == {}
+
+def test_positions_wait_returns_changed_since_seq():
+    pos = pipeline.Positions()
+    pos.publish("a", {"x": 1})
+    seq, _ = pos.wait(0, timeout=0)
+    pos.publish("b", {"x": 2})
+    assert pos.wait(seq, timeout=0) == (2, [{"x": 2, "seq": 2}])
+    assert pos.wait(2, timeout=0.01) == (2, [])
+
+@pytest.fixture
+def pipe():
+    p = pipeline.Pipeline("127.0.0.1", 0).start()
+    yield p
+    p.close()
+
+def _wait_for(pipe, tags, timeout=5.0):
+    deadline, seq = time.time() + timeout, 0
+    while time.time() < deadline and not set(tags) <= set(pipe.positions.get()):
+        seq, _ = pipe.positions.wait(seq, timeout=0.1)
+    return pipe.positions.get()
+
+def test_udp_reports_become_positions(pipe):
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as tx:
+        tx.sendto(json.dumps(_report("mocking1.json", 1.5, 2.0)).encode(), pipe.rx.addr)
+        tx.sendto(json.dumps(_report("mocking2.json", 3.0, 4.0)).encode(), pipe.rx.addr)
+    got = _wait_for(pipe, ["mocking1", "mocking2"])
+    assert (got["mocking1"]["x"], got["mocking1"]["y"]) == pytest.approx((1.5, 2.0), abs=1e-3)   # 첫 측정 = 필터 초기값
+    assert (got["mocking2"]["x"], got["mocking2"]["y"]) == pytest.approx((3.0, 4.0), abs=1e-3)
+    assert got["mocking1"]["method"] == "lsm" and got["mocking1"]["beacons"] == len(lsm.beacon_locations)
+    st = pipe.stats()
+    assert st["received"] == 2 and st["located"] == 2 and st["failed"] == 0 and st["tags"] == 2
+
+def test_http_endpoints(pipe):
+    pipe.positions.publish("tag1", {"tag": "tag1", "x": 1.0, "y": 2.0})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), pipeline.make_handler(pipe))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with urllib.request.urlopen(base + "/positions") as r:
+            assert json.load(r)["tag1"]["x"] == 1.0
+        with urllib.request.urlopen(base + "/positions/tag1/") as r:
+            assert json.load(r)["seq"] == 1
+        with urllib.request.urlopen(base + "/stats") as r:
+            assert json.load(r)["tags"] == 1
+        with pytest.raises(urllib.error.HTTPError) as e:
+            urllib.request.urlopen(base + "/positions/none")
+        assert e.value.code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_snapshot_writes_filter_files(tmp_path):
+    p = pipeline.Pipeline("127.0.0.1", 0, snapshot_dir=str(tmp_path))
+    p.bank.update_reports([_report("mocking1.json", 2.0, 3.0, ts=time.time())])
+    p.positions.publish("mocking1", {"tag": "mocking1", "x": 2.0, "y": 3.0})
+    p._snapshot()
+    assert lsm.locate(lsm.load_filtered(str(tmp_path / "filtered_mocking1.json"))) == pytest.approx((2.0, 3.0), abs=0.05)
+    with open(tmp_path / "positions.json") as f:
+        assert json.load(f)["mocking1"]["x"] == 2.0
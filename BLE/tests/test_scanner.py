@@ -0,0 +1,56 @@
+# scanner: 바이너리/JSON 보고 파싱, 큐가 차면 오래된 배치 버림, localhost UDP 수신
+import json
+import socket
+import time
+
+import pytest
+
+import scanner
+
+def test_binary_report_round_trip():
+    data = scanner.pack_report("esp32-1", [("aa:bb:cc:dd:ee:01", -61), ("AA:BB:CC:DD:EE:02", -200)])
+    assert len(data) == scanner._HEAD.size + len("esp32-1") + 2 * 7
+    parsed = scanner.parse(data, ts=12.5)
+    assert parsed == {"_source": "esp32-1", "_ts": 12.5,
+                      "AA:BB:CC:DD:EE:01": {"address": "AA:BB:CC:DD:EE:01", "rssi": -61},
+                      "AA:BB:CC:DD:EE:02": {"address": "AA:BB:CC:DD:EE:02", "rssi": -128}}   # int8 로 잘림
+
+def test_json_report():
+    msg = {"_source": "mocking1.json", "beacon1": {"name": "b1", "address": "AA:BB:CC:DD:EE:01", "rssi": -30}}
+    assert scanner.parse(json.dumps(msg).encode()) == msg
+
+@pytest.mark.parametrize("data", [
+    scanner.pack_report("s", [("AA:BB:CC:DD:EE:01", -50)])[:-1],          # 잘린 보고
+    b"BR\x02\x00\x00",                                                    # 모르는 버전
+    b"[1, 2]",                                                            # 객체가 아닌 JSON
+])
+def test_bad_reports_raise(data):
+    with pytest.raises(ValueError):
+        scanner.parse(data)
+
+def test_full_queue_drops_oldest_batch():
+    rx = scanner.UdpReceiver(max_queue=2)
+    for n in (1, 2, 3):
+        rx._put([(scanner.pack_report(f"b{n}", []), float(n))] * n)
+    st = rx.stats()
+    assert (st["received"], st["batches"], st["dropped"], st["queued"]) == (6, 3, 1, 2)
+    assert [p["_source"] for p in rx.get(timeout=0)] == ["b2", "b2"]
+    assert [p["_source"] for p in rx.get(timeout=0)] == ["b3"] * 3
+    assert rx.get(timeout=0) == []
+
+def test_receives_over_localhost():
+    rx = scanner.UdpReceiver("127.0.0.1", 0, rcvbuf=1 << 16, max_queue=8).start()
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as tx:
+            tx.sendto(scanner.pack_report("esp", [("AA:BB:CC:DD:EE:01", -40)]), rx.addr)
+            tx.sendto(json.dumps({"_source": "json", "b": {"rssi": -70}}).encode(), rx.addr)
+            tx.sendto(b"not json", rx.addr)
+        got, deadline = [], time.time() + 5
+        while (time.time() < deadline and rx.stats()["received"] < 3) or rx.stats()["queued"]:
+            got += rx.get(timeout=0.1)
+        assert [p["_source"] for p in got] == ["esp", "json"]
+        assert all("_ts" in p for p in got)
+        st = rx.stats()
+        assert st["received"] == 3 and st["bad"] == 1 and st["dropped"] == 0 and st["rcvbuf"] > 0
+    finally:
+        rx.close()
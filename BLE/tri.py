@@ -1,9 +1,10 @@
-import json
 import math
 import itertools
 import os
 import glob
 
+from lsm import load_filtered
+
 # 비콘 실제 위치
 beacon_locations = {
     "AA:BB:CC:11:22:33": (0, 0),
@@ -38,38 +39,30 @@ def trilaterate(p1, d1, p2, d2, p3, d3):
     y = (A * F - C * D) / denom
     return (x, y)
 
-# filter 폴더 내 mocking 결과 반복
-for filepath in glob.glob("filter/filtered_mocking*.json"):
-    filename = os.path.basename(filepath)
-    source = filename.replace("filtered_", "").replace(".json", "")  # e.g., mocking1
-
-    with open(filepath, "r") as f:
-        all_data = json.load(f)
-
-    # source별로 MAC 주소 분리
-    beacons = {}
-    for full_key, rssi in all_data.items():
-        try:
-            _, addr = full_key.split("_", 1)
-            beacons[addr] = rssi
-        except ValueError:
-            continue
-
-    print(f"\n🧭 [Source: {source}]")
-    top5 = sorted(beacons.items(), key=lambda x: x[1], reverse=True)[:5]
-
-    found_valid = False
+# 필터링된 RSSI {MAC: rssi} → 위치. 센 비콘 상위 5개 중 일직선이 아닌 첫 조합 (pipeline.py 에서도 사용)
+def locate(rssi_by_mac, locations=beacon_locations):
+    top5 = sorted(rssi_by_mac.items(), key=lambda x: x[1], reverse=True)[:5]
     for (a1, r1), (a2, r2), (a3, r3) in itertools.combinations(top5, 3):
-        if all(a in beacon_locations for a in [a1, a2, a3]):
+        if all(a in locations for a in [a1, a2, a3]):
             d1, d2, d3 = map(rssi_to_distance, [r1, r2, r3])
-            result = trilaterate(beacon_locations[a1], d1,
-                                 beacon_locations[a2], d2,
-                                 beacon_locations[a3], d3)
+            result = trilaterate(locations[a1], d1, locations[a2], d2, locations[a3], d3)
             if result:
-                x, y = result
-                print(f"📍 삼변측량 추정 위치: x = {x:.2f} m, y = {y:.2f} m")
-                found_valid = True
-                break
+                return result
+    return None
+
+def main():
+    # filter 폴더 내 mocking 결과 반복
+    for filepath in glob.glob("filter/filtered_mocking*.json"):
+        filename = os.path.basename(filepath)
+        source = filename.replace("filtered_", "").replace(".json", "")  # e.g., mocking1
+
+        print(f"\n🧭 [Source: {source}]")
+        result = locate(load_filtered(filepath))
+        if result:
+            x, y = result
+            print(f"📍 삼변측량 추정 위치: x = {x:.2f} m, y = {y:.2f} m")
+        else:
+            print("❌ 삼변측량 실패 (모든 조합이 일직선 또는 계산 오류)")
 
-    if not found_valid:
-        print("❌ 삼변측량 실패 (모든 조합이 일직선 또는 계산 오류)")
+if __name__ == "__main__":
+    main()
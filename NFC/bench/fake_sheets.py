@@ -0,0 +1,167 @@
+# fake_sheets.py  (부하 테스트용 메모리 gspread 워크시트)
+#
+#   import fake_sheets
+#   fake_sheets.install(rows=10000, latency=0.15, p429=0.02)   # STORE_BACKEND=fake 로 등록
+#   os.environ["STORE_BACKEND"] = "fake"
+#   import nfc_server
+#
+# 실제 시트 대신 메모리 행렬을 쓰되 호출마다 지연(latency ± jitter)과 429 응답(p429 확률)을 흉내 낸다.
+# storage.GspreadStore 를 그대로 상속하므로 SheetsScheduler(버킷/재시도/병합)도 실제와 똑같이 거친다.
+import random, string, sys, threading, time
+from collections import Counter
+from os.path import abspath, dirname
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+import storage
+
+RESP_HEADER = ["타임스탬프", "이름", "학교", "학년", "전공", "이메일 주소", "token"]
+CLU_HEADER = ["이름", "Embedded & Control", "Semiconductor & Circuits", "AI & Applications"]
+
+class FakeAPIError(Exception):
+    """gspread.exceptions.APIError 와 같은 모양(response.status_code / headers)"""
+    def __init__(self, status: int, retry_after: float | None = None):
+        super().__init__(f"fake sheets error {status}")
+        headers = {"Retry-After": str(retry_after)} if retry_after else {}
+        self.response = type("Response", (), {"status_code": status, "headers": headers})()
+
+class FakeWorksheet:
+    """
+    gspread.Worksheet 의 nfc_server 가 쓰는 부분만 구현.
+    calls: 연산별 호출 수 (429 로 실패한 호출 포함), throttled: 429 를 돌려준 횟수
+    """
+    def __init__(self, title: str, values, latency: float = 0.0, jitter: float = 0.0, p429: float = 0.0):
+        self.title = title
+        self.v = [list(r) for r in values]
+        self.latency, self.jitter, self.p429 = latency, jitter, p429
+        self.calls = Counter()
+        self.throttled = Counter()
+        self._lock = threading.Lock()
+
+    def _hit(self, op: str):
+        with self._lock:
+            self.calls[op] += 1
+        if self.latency or self.jitter:
+            time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+        if self.p429 and random.random() < self.p429:
+            with self._lock:
+                self.throttled[op] += 1
+            raise FakeAPIError(429)
+
+    def _matrix(self):
+        width = max((len(r) for r in self.v), default=0)
+        return [r + [""] * (width - len(r)) for r in self.v]
+
+    # --- 읽기 ---
+    def get_all_values(self, **_):
+        self._hit("get_all_values")
+        with self._lock:
+            return self._matrix()
+
+    def get_all_records(self, **_):
+        self._hit("get_all_records")
+        with self._lock:
+            m = self._matrix()
+        return [dict(zip(m[0], r)) for r in m[1:]] if m else []
+
+    def row_values(self, row: int, **_):
+        self._hit("row_values")
+        with self._lock:
+            cells = list(self.v[row - 1]) if row <= len(self.v) else []
+        while cells and cells[-1] == "":
+            cells.pop()
+        return cells
+
+    def batch_get(self, ranges, **_):
+        self._hit("batch_get")
+        out = []
+        with self._lock:
+            for rng in ranges:
+                r0, c0, r1, c1 = storage.a1_to_grid(rng)
+                block = [row[(c0 or 1) - 1: c1] for row in self.v[(r0 or 1) - 1: r1 or len(self.v)]]
+                while block and not any(block[-1]):
+                    block.pop()
+                out.append(block)
+        return out
+
+    # --- 쓰기 ---
+    def _set(self, rng: str, values):
+        r0, c0, _, _ = storage.a1_to_grid(rng)
+        for i, vals in enumerate(values):
+            r = (r0 or 1) - 1 + i
+            while len(self.v) <= r:
+                self.v.append([])
+            row = self.v[r]
+            for j, val in enumerate(vals):
+                c = (c0 or 1) - 1 + j
+                if len(row) <= c:
+                    row += [""] * (c + 1 - len(row))
+                row[c] = "" if val is None else str(val)
+
+    def update(self, values=None, range_name=None, **_):
+        self._hit("update")
+        with self._lock:
+            self._set(range_name, values)
+
+    def batch_update(self, data, **_):
+        self._hit("batch_update")
+        with self._lock:
+            for d in data:
+                self._set(d["range"], d["values"])
+
+
+class FakeSpreadsheet:
+    def __init__(self, worksheets: dict[str, FakeWorksheet]):
+        self.worksheets = worksheets
+
+    def worksheet(self, name: str) -> FakeWorksheet:
+        return self.worksheets[name]
+
+    def calls(self) -> Counter:
+        total = Counter()
+        for ws in self.worksheets.values():
+            total.update(ws.calls)
+        return total
+
+    def throttled(self) -> int:
+        return sum(sum(ws.throttled.values()) for ws in self.worksheets.values())
+
+
+SCHED_BACKOFF = 0.05          # 부하 테스트에서는 재시도 대기를 짧게 (실제 기본값 1초)
+
+class FakeSheetsStore(storage.GspreadStore):
+    """GspreadStore 와 같지만 인증/네트워크 없이 FakeSpreadsheet 를 연다."""
+    def __init__(self, spreadsheet: FakeSpreadsheet, quota_per_min: float = 60, burst: int = 10,
+                 max_retries: int = 5, **_):
+        self.sched = storage.SheetsScheduler(quota_per_min, burst, max_retries)
+        self.sched.backoff_base = SCHED_BACKOFF
+        self.gc = None
+        self.sh = spreadsheet
+        self._tables = {}
+
+
+SPREADSHEET: FakeSpreadsheet | None = None
+
+def make_values(rows: int, token_ratio: float = 0.7, seed: int = 7):
+    """응답 시트/클러스터 시트 합성 데이터. token_ratio 만큼만 토큰이 채워져 있다."""
+    rnd = random.Random(seed)
+    resp, clu = [RESP_HEADER[:]], [CLU_HEADER[:]]
+    alphabet = string.ascii_letters + string.digits
+    for i in range(1, rows + 1):
+        name = f"사람{i:06d}"
+        token = "".join(rnd.choices(alphabet, k=8)) if rnd.random() < token_ratio else ""
+        resp.append([f"2025-01-01 {i}", name, "S대", str(1 + i % 4), "EE", f"p{i}@example.com", token])
+        clu.append([name] + [f"{rnd.uniform(0, 5):.2f}" for _ in range(3)])
+    return resp, clu
+
+def install(rows: int = 1000, latency: float = 0.0, jitter: float = 0.0, p429: float = 0.0,
+            resp_name: str = "설문지 응답 시트", clu_name: str = "Clustered Result with Distance",
+            token_ratio: float = 0.7) -> FakeSpreadsheet:
+    """STORE_BACKEND=fake 로 쓸 가짜 스프레드시트를 만들고 저장소 백엔드로 등록"""
+    global SPREADSHEET
+    resp, clu = make_values(rows, token_ratio)
+    SPREADSHEET = FakeSpreadsheet({
+        resp_name: FakeWorksheet(resp_name, resp, latency, jitter, p429),
+        clu_name: FakeWorksheet(clu_name, clu, latency, jitter, p429),
+    })
+    storage.register_backend("fake", lambda **opts: FakeSheetsStore(SPREADSHEET, **opts))
+    return SPREADSHEET
@@ -0,0 +1,189 @@
+# load_test.py  (nfc_server 부하 테스트: 가짜 시트 + 프로세스 내 ASGI 클라이언트)
+#
+#   cd NFC
+#   python bench/load_test.py --rows 10000 --clients 200 --requests 5000
+#   python bench/load_test.py --rows 100000 --latency 0.2 --p429 0.02 --quota 60      # 실제 할당량 흉내
+#   python bench/load_test.py --save bench/baseline.json                               # 기준 저장
+#   python bench/load_test.py --compare bench/baseline.json                            # 회귀 시 exit 1
+#
+# 단계: profile(GET /u/{token}) → touch(POST /u/{token}/touch, 마지막 flush 포함)
+#       → assign(POST /admin/provision/assign) → generate(POST /admin/generate-tokens)
+# 단계마다 p50/p99/최대 지연, 처리량, 오류 수, 시트 호출 수(연산별), 429 주입/재시도 횟수를 출력한다.
+# 부하 생성기와 서버가 같은 이벤트 루프를 쓰므로 절대값보다 커밋 간 비교용으로 본다.
+import argparse, asyncio, json, os, random, sys, tempfile, time
+from os.path import abspath, dirname
+
+BENCH_DIR = dirname(abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+import fake_sheets
+
+ADMIN = "bench-admin-key"
+
+def _args():
+    ap = argparse.ArgumentParser(description="nfc_server load test against an in-memory fake spreadsheet")
+    ap.add_argument("--rows", type=int, default=5000, help="응답 시트 행 수 (1k~100k)")
+    ap.add_argument("--clients", type=int, default=200, help="동시 클라이언트 수")
+    ap.add_argument("--requests", type=int, default=5000, help="profile/touch 단계 요청 수")
+    ap.add_argument("--assign", type=int, default=500, help="assign 단계 요청 수")
+    ap.add_argument("--generate", type=int, default=3, help="generate-tokens 호출 수")
+    ap.add_argument("--latency", type=float, default=0.0, help="시트 호출 1회 지연(초)")
+    ap.add_argument("--jitter", type=float, default=0.0, help="지연 ± 범위(초)")
+    ap.add_argument("--p429", type=float, default=0.0, help="시트 호출이 429 로 실패할 확률")
+    ap.add_argument("--quota", type=float, default=1e6, help="SHEETS_QUOTA_PER_MIN (실제: 60)")
+    ap.add_argument("--burst", type=int, default=1000, help="SHEETS_BURST")
+    ap.add_argument("--ops", default="profile,touch,assign,generate")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--save", help="결과를 JSON 으로 저장")
+    ap.add_argument("--compare", help="저장된 결과와 비교해 회귀면 exit 1")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="p99/처리량 허용 악화 비율")
+    return ap.parse_args()
+
+def _setup(args):
+    """nfc_server import 전에 가짜 백엔드와 환경 변수를 준비"""
+    os.chdir(dirname(BENCH_DIR))                       # templates/ 기준 경로
+    tmp = tempfile.mkdtemp(prefix="nfc-bench-")
+    os.environ.update({
+        "STORE_BACKEND": "fake",
+        "ADMIN_KEY": ADMIN,
+        "TOUCH_JOURNAL": os.path.join(tmp, "touch_journal.jsonl"),
+        "TAPLOG_DIR": os.path.join(tmp, "taplog"),
+        "TOUCH_FLUSH_SEC": "3600",                    # 단계 끝에서 직접 flush
+        "SHEETS_QUOTA_PER_MIN": str(args.quota),
+        "SHEETS_BURST": str(args.burst),
+        "TAP_CONCURRENCY": str(max(args.clients, 1)),
+    })
+    return fake_sheets.install(args.rows, args.latency, args.jitter, args.p429)
+
+def _pct(sorted_vals, q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    return sorted_vals[min(len(sorted_vals) - 1, int(round(q * (len(sorted_vals) - 1))))]
+
+async def _drive(n: int, clients: int, send):
+    """send(i) 를 n 번, 최대 clients 개 동시에 실행 → [(지연 초, 상태 코드)]"""
+    results, counter = [], iter(range(n))
+
+    async def worker():
+        for i in counter:
+            t0 = time.perf_counter()
+            try:
+                status = await send(i)
+            except Exception:
+                status = 599
+            results.append((time.perf_counter() - t0, status))
+    await asyncio.gather(*(worker() for _ in range(min(clients, n) or 1)))
+    return results
+
+async def _phase(ns, sheets, name: str, n: int, clients: int, send, ok=(200,), after=None, since=None) -> dict:
+    calls0, thr0, retries0, t0 = since or (sheets.calls(), sheets.throttled(), _retries(ns), time.perf_counter())
+    results = await _drive(n, clients, send)
+    if after is not None:
+        await after()
+    elapsed = time.perf_counter() - t0
+    lat = sorted(r[0] for r in results)
+    calls = sheets.calls() - calls0
+    statuses = {}
+    for _, s in results:
+        statuses[s] = statuses.get(s, 0) + 1
+    return {
+        "op": name, "requests": len(results), "errors": sum(c for s, c in statuses.items() if s not in ok),
+        "statuses": statuses, "p50_ms": _pct(lat, 0.50) * 1e3, "p99_ms": _pct(lat, 0.99) * 1e3,
+        "max_ms": (lat[-1] if lat else 0) * 1e3, "rps": len(results) / elapsed if elapsed else 0.0,
+        "sheets_calls": dict(calls), "sheets_total": sum(calls.values()),
+        "throttled": sheets.throttled() - thr0, "retries": _retries(ns) - retries0,
+    }
+
+def _retries(ns) -> int:
+    return int(sum(ns.STORE_RETRIES._v.values()))
+
+async def _run(args, sheets) -> list[dict]:
+    import httpx
+    import nfc_server as ns
+
+    random.seed(args.seed)
+    ops = [o.strip() for o in args.ops.split(",") if o.strip()]
+    out = []
+    since = (sheets.calls(), sheets.throttled(), _retries(ns), time.perf_counter())   # 기동 시 첫 로드부터 집계
+    async with ns._lifespan(ns.app):
+        transport = httpx.ASGITransport(app=ns.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            # 첫 스냅샷 로드 (시트 전체 읽기 + 인덱스 구성)
+            out.append(await _phase(ns, sheets, "snapshot", 1, 1, lambda i: _first_load(ns), since=since))
+            snap = ns._snapshot()
+            tokens = [snap.index.raw(r, "token") for r in snap.index.rows() if snap.index.raw(r, "token")]
+
+            async def profile(i):
+                return (await client.get(f"/u/{random.choice(tokens)}")).status_code
+
+            async def touch(i):
+                r = await client.post(f"/u/{random.choice(tokens)}/touch", json={"source": "bench"})
+                return r.status_code
+
+            async def flush():
+                await ns._io(ns._TOUCHES.flush)
+
+            async def assign(i):
+                r = await client.post(f"/admin/provision/assign?key={ADMIN}", json={"uid": f"BE{args.seed:02X}{i:08X}"})
+                return r.status_code
+
+            async def generate(i):
+                return (await client.post(f"/admin/generate-tokens?key={ADMIN}&limit=0")).status_code
+
+            phases = {
+                "profile": (args.requests, args.clients, profile, None),
+                "touch": (args.requests, args.clients, touch, flush),
+                "assign": (args.assign, args.clients, assign, None),
+                "generate": (args.generate, 1, generate, None),
+            }
+            for op in ops:
+                n, clients, send, after = phases[op]
+                out.append(await _phase(ns, sheets, op, n, clients, send, after=after))
+    return out
+
+async def _first_load(ns) -> int:
+    await ns._asnapshot()
+    return 200
+
+def _report(results: list[dict], args):
+    print(f"rows={args.rows} clients={args.clients} latency={args.latency}s p429={args.p429} quota={args.quota:g}/min")
+    print(f"{'op':<10}{'reqs':>7}{'err':>6}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'req/s':>10}"
+          f"{'sheets':>8}{'429':>6}{'retry':>7}  calls by op")
+    for r in results:
+        calls = " ".join(f"{k}={v}" for k, v in sorted(r["sheets_calls"].items()))
+        print(f"{r['op']:<10}{r['requests']:>7}{r['errors']:>6}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+              f"{r['max_ms']:>10.2f}{r['rps']:>10.1f}{r['sheets_total']:>8}{r['throttled']:>6}{r['retries']:>7}  {calls}")
+
+def _compare(results: list[dict], baseline_path: str, tol: float) -> list[str]:
+    with open(baseline_path, encoding="utf-8") as f:
+        base = {r["op"]: r for r in json.load(f)["results"]}
+    problems = []
+    for r in results:
+        b = base.get(r["op"])
+        if b is None:
+            continue
+        if r["p99_ms"] > b["p99_ms"] * (1 + tol) and r["p99_ms"] - b["p99_ms"] > 1.0:
+            problems.append(f"{r['op']}: p99 {b['p99_ms']:.2f} → {r['p99_ms']:.2f} ms")
+        if r["rps"] < b["rps"] * (1 - tol):
+            problems.append(f"{r['op']}: throughput {b['rps']:.1f} → {r['rps']:.1f} req/s")
+        if r["sheets_total"] > b["sheets_total"]:
+            problems.append(f"{r['op']}: sheets calls {b['sheets_total']} → {r['sheets_total']}")
+        if r["errors"] > b["errors"]:
+            problems.append(f"{r['op']}: errors {b['errors']} → {r['errors']}")
+    return problems
+
+def main():
+    args = _args()
+    sheets = _setup(args)
+    results = asyncio.run(_run(args, sheets))
+    _report(results, args)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        problems = _compare(results, args.compare, args.tolerance)
+        for p in problems:
+            print(f"[regression] {p}")
+        sys.exit(1 if problems else 0)
+
+if __name__ == "__main__":
+    main()
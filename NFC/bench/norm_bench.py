@@ -0,0 +1,77 @@
+# norm_bench.py  (이름/토큰 정규화 마이크로 벤치마크)
+#
+#   cd NFC && python bench/norm_bench.py --rows 5000
+#
+# 1) 요청당 비용: 예전 방식(매 요청 df[열].apply(_norm) 후 비교) vs 스냅샷 인덱스 조회(_norm 캐시)
+# 2) 스냅샷 재구성 비용: 행마다 _norm 호출 vs _norm_many(열 단위 일괄 처리)
+#    (참고용으로 pandas str 메서드 체인도 함께 측정)
+# 시트/네트워크 없이 합성 데이터로만 측정한다.
+import argparse, os, random, string, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("STORE_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+
+import pandas as pd
+import nfc_server as ns
+
+def _fake_values(n: int):
+    header = ["타임스탬프", "이름", "학교", "학년", "전공", "이메일 주소", "token"]
+    rows = []
+    for i in range(n):
+        name = f" {random.choice('김이박최정')}{''.join(random.choices('가나다라마바사아자차', k=2))} {i} "
+        token = "".join(random.choices(string.ascii_letters + string.digits, k=8))
+        rows.append([f"t{i}", name, "S대", "3", "EE", f"p{i}@x", token])
+    return [header] + rows
+
+def _timeit(fn, reps: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        fn()
+    return (time.perf_counter() - t0) / reps
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=2000)
+    ap.add_argument("--reps", type=int, default=200)
+    args = ap.parse_args()
+
+    values = _fake_values(args.rows)
+    df = ns._frame(values)
+    schema = ns._Schema(values[0], [])
+    raw_norm = ns._norm.__wrapped__                       # 캐시 없는 원래 함수
+    names = [r[1] for r in values[1:]]
+    probe = lambda: random.choice(names)
+
+    # 1) 요청당 조회
+    def legacy():
+        target = raw_norm(probe())
+        hit = df[df["이름"].apply(raw_norm) == target]
+        return int(hit.index[0]) if len(hit) else None
+    idx = ns._SheetIndex(values, [], schema)
+    indexed = lambda: idx.lookup("name", probe())
+
+    t_legacy = _timeit(legacy, max(1, args.reps // 20))
+    t_index = _timeit(indexed, args.reps * 50)
+    print(f"[lookup] rows={args.rows}")
+    print(f"  legacy apply(_norm) per request : {t_legacy * 1e6:10.1f} us")
+    print(f"  snapshot index + lru _norm      : {t_index * 1e6:10.1f} us   ({t_legacy / t_index:,.0f}x)")
+
+    # 2) 스냅샷 재구성 (전체 행 정규화)
+    def pandas_chain():
+        s = pd.Series(names, dtype=object).str.normalize("NFKC")
+        s = s.str.replace("\u200b", "", regex=False).str.replace("\ufeff", "", regex=False)
+        return s.str.replace(r"\s+", "", regex=True).str.lower().tolist()
+    t_scalar = _timeit(lambda: [raw_norm(v) for v in names], 5)
+    t_pandas = _timeit(pandas_chain, 5)
+    t_vector = _timeit(lambda: ns._norm_many(names), 5)
+    assert ns._norm_many(names) == [raw_norm(v) for v in names] == pandas_chain()
+    print(f"[rebuild] normalise {args.rows} names")
+    print(f"  per-row _norm                   : {t_scalar * 1e3:10.2f} ms")
+    print(f"  pandas str chain                : {t_pandas * 1e3:10.2f} ms")
+    print(f"  _norm_many (joined column)      : {t_vector * 1e3:10.2f} ms")
+    t_build = _timeit(lambda: ns._SheetIndex(values, [], schema), 3)
+    print(f"  full _SheetIndex build          : {t_build * 1e3:10.2f} ms")
+
+if __name__ == "__main__":
+    main()
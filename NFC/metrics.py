@@ -0,0 +1,172 @@
+# metrics.py  (nfc_server 용 Prometheus 텍스트 형식 지표 + 요청 단위 구간 계측)
+#
+#   REQUEST_SECONDS.observe(0.012, route="/u/{token}", method="GET", status="200")
+#   with stage("template_render"):
+#       ...
+# /metrics 에서 REGISTRY.render() 를 그대로 내보낸다. 외부 패키지 없이 동작.
+import contextvars, threading, time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _fmt_labels(names, values, extra=None) -> str:
+    pairs = list(zip(names, values)) + (list(extra.items()) if extra else [])
+    if not pairs:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in pairs) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labels)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        super().__init__(name, help, labels)
+        self._v = {}
+
+    def inc(self, n: float = 1, **labels):
+        k = self._key(labels)
+        with self._lock:
+            self._v[k] = self._v.get(k, 0) + n
+
+    def value(self, **labels) -> float:
+        return self._v.get(self._key(labels), 0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._v.items())
+        return self.header() + [f"{self.name}{_fmt_labels(self.labels, k)} {v}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """값을 set() 하거나, fn 을 주면 scrape 때마다 fn() → {labels tuple: value} 또는 숫자"""
+    kind = "gauge"
+
+    def __init__(self, name, help, labels=(), fn=None):
+        super().__init__(name, help, labels)
+        self._v, self.fn = {}, fn
+
+    def set(self, v: float, **labels):
+        with self._lock:
+            self._v[self._key(labels)] = v
+
+    def render(self) -> list[str]:
+        if self.fn is not None:
+            got = self.fn()
+            items = sorted(got.items()) if isinstance(got, dict) else [((), got)]
+        else:
+            with self._lock:
+                items = sorted(self._v.items())
+        return self.header() + [f"{self.name}{_fmt_labels(self.labels, k)} {v}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._v = {}            # key → [bucket counts..., sum, count]
+
+    def observe(self, v: float, **labels):
+        k = self._key(labels)
+        with self._lock:
+            s = self._v.get(k)
+            if s is None:
+                s = self._v[k] = [0] * len(self.buckets) + [0.0, 0]
+            for i, b in enumerate(self.buckets):
+                if v <= b:
+                    s[i] += 1
+            s[-2] += v
+            s[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted((k, s[:]) for k, s in self._v.items())
+        out = self.header()
+        for k, s in items:
+            for b, c in zip(self.buckets, s):
+                out.append(f"{self.name}_bucket{_fmt_labels(self.labels, k, {'le': b})} {c}")
+            out.append(f"{self.name}_bucket{_fmt_labels(self.labels, k, {'le': '+Inf'})} {s[-1]}")
+            out.append(f"{self.name}_sum{_fmt_labels(self.labels, k)} {s[-2]}")
+            out.append(f"{self.name}_count{_fmt_labels(self.labels, k)} {s[-1]}")
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+
+    def add(self, m: _Metric) -> _Metric:
+        self._metrics.append(m)
+        return m
+
+    def counter(self, *a, **kw) -> Counter:
+        return self.add(Counter(*a, **kw))
+
+    def gauge(self, *a, **kw) -> Gauge:
+        return self.add(Gauge(*a, **kw))
+
+    def histogram(self, *a, **kw) -> Histogram:
+        return self.add(Histogram(*a, **kw))
+
+    def render(self) -> str:
+        lines = []
+        for m in self._metrics:
+            lines += m.render()
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+STAGE_SECONDS = REGISTRY.histogram("nfc_stage_seconds", "Time spent in internal stages", ["stage"])
+
+# ----- 요청 단위 구간 기록 (Server-Timing 헤더/프로파일 훅용) -----
+_REQUEST_STAGES: contextvars.ContextVar[list | None] = contextvars.ContextVar("nfc_request_stages", default=None)
+
+def begin_request() -> tuple[list, contextvars.Token]:
+    stages = []
+    return stages, _REQUEST_STAGES.set(stages)
+
+def end_request(token: contextvars.Token):
+    _REQUEST_STAGES.reset(token)
+
+@contextmanager
+def stage(name: str):
+    """구간 시간을 nfc_stage_seconds 에 기록하고, 요청 안이면 그 요청의 구간 목록에도 남긴다."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        dt = time.perf_counter() - t0
+        STAGE_SECONDS.observe(dt, stage=name)
+        stages = _REQUEST_STAGES.get()
+        if stages is not None:
+            stages.append((name, dt))
+
+def server_timing(stages: list) -> str:
+    total = {}
+    for name, dt in stages:
+        total[name] = total.get(name, 0.0) + dt
+    return ", ".join(f"{n};dur={dt * 1000:.2f}" for n, dt in total.items())
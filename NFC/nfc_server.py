@@ -1,19 +1,51 @@
 # nfc_server.py  (추천 산업군 표시 개선본)
-from fastapi import FastAPI, Request, HTTPException, Query, Body
-from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
+from fastapi import FastAPI, Request, HTTPException, Query, Body, Depends
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 
-import os, re, unicodedata, secrets, string, time
+import os, re, json, csv, codecs, unicodedata, secrets, string, time, threading, bisect, asyncio, gzip, hashlib, zlib
+import contextvars, cProfile
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial, lru_cache
 from datetime import datetime, timezone
 from urllib.parse import quote, unquote
 
-import gspread
+from gspread.utils import numericise_all
+import numpy as np
 import pandas as pd
 
+import storage
+import metrics
+import taplog
+from metrics import REGISTRY, stage
+
+try:
+    import brotli                    # 선택: 설치되어 있으면 br 인코딩도 제공
+except ImportError:
+    brotli = None
+
 # ===== FastAPI & CORS =====
-app = FastAPI()
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    store.start()
+    _SNAPSHOTS.start()
+    _TOUCHES.start()
+    _AUTOFILL.start()
+    _start_taps()
+    yield
+    _AUTOFILL.stop()
+    _TOUCHES.stop()
+    if _TAPLOG is not None:
+        _TAPLOG.close()
+    _SNAPSHOTS.stop()
+    store.stop()
+
+app = FastAPI(lifespan=_lifespan)
 templates = Jinja2Templates(directory="templates")
 app.add_middleware(
     CORSMiddleware,
@@ -30,26 +62,122 @@ SPREAD_URL   = "https://docs.google.com/spreadsheets/d/1kkt336f1G-XqfDuwCUOnqpKl
 RESP_WS_NAME = "설문지 응답 시트"
 CLU_WS_NAME  = "Clustered Result with Distance"
 
-# ===== gspread 연결 =====
-gc = gspread.service_account(filename=SERVICE_ACCOUNT_FILE)
-sh = gc.open_by_url(SPREAD_URL)
-ws_responses = sh.worksheet(RESP_WS_NAME)
-ws_cluster   = sh.worksheet(CLU_WS_NAME)
+# 저장소: gspread(기본) | sqlite (SQLITE_MIRROR=1 이면 SQLite 원본 + 시트 미러)
+STORE_BACKEND = os.getenv("STORE_BACKEND", "gspread")
+SQLITE_PATH   = os.getenv("SQLITE_PATH", "nfc.sqlite3")
+SQLITE_MIRROR = os.getenv("SQLITE_MIRROR", "0") == "1"
+SQLITE_MIRROR_SEC = float(os.getenv("SQLITE_MIRROR_SEC", "10"))
+
+# Sheets API 호출 스케줄러 (storage.SheetsScheduler): 분당 할당량 / 순간 허용량 / 429·5xx 재시도 횟수
+SHEETS_QUOTA_PER_MIN = float(os.getenv("SHEETS_QUOTA_PER_MIN", "60"))
+SHEETS_BURST = int(os.getenv("SHEETS_BURST", "10"))
+SHEETS_MAX_RETRIES = int(os.getenv("SHEETS_MAX_RETRIES", "5"))
+
+# ===== 지표 (/metrics) & 요청 추적 =====
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")                 # X-Profile 요청의 cProfile 덤프 위치
+SLOW_REQUEST_SEC = float(os.getenv("SLOW_REQUEST_SEC", "0"))      # 이보다 느린 요청은 구간별 시간 로그 (0=끔)
+
+REQUEST_SECONDS = REGISTRY.histogram("nfc_request_seconds", "HTTP request latency", ["method", "route", "status"])
+STORE_CALLS = REGISTRY.counter("nfc_store_calls_total", "Storage (Sheets/SQLite) API calls", ["table", "op", "outcome"])
+STORE_SECONDS = REGISTRY.histogram("nfc_store_seconds", "Storage API call latency", ["table", "op"])
+STORE_RETRIES = REGISTRY.counter("nfc_store_retries_total", "Storage API calls retried after 429/5xx", ["table", "op"])
+INDEX_LOOKUPS = REGISTRY.counter("nfc_index_lookups_total", "Snapshot index lookups", ["field", "result"])
+PAGE_CACHE = REGISTRY.counter("nfc_page_cache_total", "Rendered page cache lookups", ["result"])
+
+# 요청이 끝날 때마다 hook(scope, status, elapsed_sec, stages) 호출. stages = [(구간 이름, 초), ...]
+TRACE_HOOKS: list = []
+
+class _RequestTiming:
+    """
+    순수 ASGI 미들웨어: 라우트별 지연시간 기록 + Server-Timing 헤더.
+    요청 헤더 `X-Profile: <ADMIN_KEY>` 가 있으면 그 요청 하나만 cProfile 로 감싸 PROFILE_DIR 에 덤프한다.
+    (이벤트 루프 스레드만 프로파일되며, 같은 시각에 처리된 다른 요청도 섞일 수 있음)
+    """
+    _profiling = threading.Lock()
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        t0 = time.perf_counter()
+        stages, token = metrics.begin_request()
+        status = [500]
+        prof, prof_file = None, None
+        headers = dict(scope.get("headers") or [])
+        if headers.get(b"x-profile", b"").decode() == ADMIN_KEY and self._profiling.acquire(blocking=False):
+            prof = cProfile.Profile()
+            prof_file = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(3)}.prof")
+
+        async def send_wrapper(msg):
+            if msg["type"] == "http.response.start":
+                status[0] = msg["status"]
+                extra = [(b"server-timing", metrics.server_timing(stages).encode())] if stages else []
+                if prof_file:
+                    extra.append((b"x-profile-file", prof_file.encode()))
+                msg = {**msg, "headers": list(msg.get("headers", [])) + extra}
+            await send(msg)
+
+        try:
+            if prof is not None:
+                prof.enable()
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if prof is not None:
+                prof.disable()
+                try:
+                    os.makedirs(PROFILE_DIR, exist_ok=True)
+                    prof.dump_stats(prof_file)
+                finally:
+                    self._profiling.release()
+            metrics.end_request(token)
+            elapsed = time.perf_counter() - t0
+            route = getattr(scope.get("route"), "path", "unmatched")   # 경로 템플릿 (라벨 수 제한)
+            REQUEST_SECONDS.observe(elapsed, method=scope["method"], route=route, status=status[0])
+            if SLOW_REQUEST_SEC and elapsed >= SLOW_REQUEST_SEC:
+                print(f"[slow] {scope['method']} {scope['path']} {elapsed*1000:.0f}ms {metrics.server_timing(stages)}")
+            for hook in TRACE_HOOKS:
+                try:
+                    hook(scope, status[0], elapsed, stages)
+                except Exception as e:
+                    print(f"[trace] hook 실패: {e!r}")
+
+app.add_middleware(_RequestTiming)
 
 # ===== 유틸 =====
+NORM_CACHE_SIZE = int(os.getenv("NORM_CACHE_SIZE", "65536"))    # 경로 파라미터/헤더 정규화 결과 캐시
+_NORM_SEP = "\x00"                                             # _norm_many 에서 값 구분자 (NFKC/공백 처리에 영향 없음)
+
+@lru_cache(maxsize=NORM_CACHE_SIZE)
 def _norm(s: str) -> str:
-    s = unicodedata.normalize("NFKC", str(s))
-    s = s.replace("\u00A0"," ").replace("\u200b","").replace("\ufeff","")
-    s = re.sub(r"\s+","", s)
-    return s.lower().strip()
+    # NFKC 후 제로폭 문자 제거, 모든 공백(\s 와 같은 유니코드 공백, NBSP 포함) 제거, 소문자
+    s = unicodedata.normalize("NFKC", str(s)).replace("\u200b","").replace("\ufeff","")
+    return "".join(s.split()).lower()
 
-def _read_ws(ws) -> pd.DataFrame:
-    df = pd.DataFrame(ws.get_all_records())
-    df.columns = [c.strip() for c in df.columns]
-    return df
+def _norm_many(values) -> list[str]:
+    """
+    _norm 과 같은 결과를 열 단위로: 값들을 구분자로 이어 붙여 NFKC/공백 제거/소문자를 문자열 1개에
+    한 번씩만 적용한다 (행마다 파이썬 호출 없음, 스냅샷 재구성용이라 캐시는 채우지 않음).
+    """
+    values = [str(v) for v in values]
+    joined = _NORM_SEP.join(values)
+    if joined.count(_NORM_SEP) != max(len(values) - 1, 0):    # 값에 구분자가 들어 있으면 행 단위로
+        return [_norm(v) for v in values]
+    joined = unicodedata.normalize("NFKC", joined).replace("\u200b","").replace("\ufeff","")
+    return "".join(joined.split()).lower().split(_NORM_SEP) if values else []
+
+def _frame(values) -> pd.DataFrame:
+    """get_all_values() 행렬 → get_all_records()와 같은 모양의 DataFrame"""
+    if not values or not values[0]:
+        return pd.DataFrame()
+    header = [h.strip() for h in values[0]]
+    rows = [numericise_all(r[:len(header)] + [""] * (len(header) - len(r))) for r in values[1:]]
+    return pd.DataFrame(rows, columns=header)
 
 def _find_col(df: pd.DataFrame, candidates) -> str | None:
-    m = {_norm(c): c for c in df.columns}
+    cols = df.columns if hasattr(df, "columns") else df   # DataFrame 또는 헤더 리스트
+    m = {_norm(c): c for c in cols}
     for cand in candidates:
         k = _norm(cand)
         if k in m:
@@ -70,18 +198,6 @@ def _col_letter(idx: int) -> str:
         letters = chr(65+rem) + letters
     return letters
 
-def _ensure_cols(ws, header_row, needed_names):
-    """needed_names 컬럼을 헤더에 보장하고 1-based 인덱스 dict 반환"""
-    header = header_row[:]
-    changed = False
-    for name in needed_names:
-        if name not in header:
-            header.append(name)
-            changed = True
-    if changed:
-        ws.update("1:1", [header])
-    return {name: header.index(name)+1 for name in needed_names}
-
 def _construct_profile_url(request_base_url: str, token: str):
     base = str(request_base_url)
     if not base.endswith("/"):
@@ -92,172 +208,1117 @@ def _normalize_uid(uid: str) -> str:
     s = re.sub(r"[^0-9a-fA-F]","", uid or "")
     return s.upper()
 
-# ===== 토큰 인덱스 캐시 (touch 성능용) =====
-_INDEX_TTL = int(os.getenv("INDEX_TTL", "60"))  # seconds
-_INDEX_CACHE = {"exp": 0, "token_map": {}, "header": []}
-
-def _ensure_token_index(ws):
-    now = time.time()
-    if now < _INDEX_CACHE["exp"]:
-        return _INDEX_CACHE["header"], _INDEX_CACHE["token_map"]
-
-    vals = ws.get_all_values()
-    if not vals:
-        return [], {}
-    header = [h.strip() for h in vals[0]]
-
-    # token 우선, 그다음 Token/토큰도 허용
-    tok_col_name = None
-    for cand in ["token","Token","토큰"]:
-        if cand in header:
-            tok_col_name = cand; break
-
-    token_map = {}
-    if tok_col_name:
-        tok_idx = header.index(tok_col_name) + 1
-        for i, row in enumerate(vals[1:], start=2):
-            if len(row) >= tok_idx:
-                t = (row[tok_idx-1] or "").strip()
-                if t:
-                    token_map[_norm(t)] = i
-
-    _INDEX_CACHE.update({"exp": now + _INDEX_TTL, "token_map": token_map, "header": header})
-    return header, token_map
-
-def _ensure_token_column_and_fill(ws):
+# ===== 저장소 연결 =====
+NAME_CANDS = ["이름","성명","Name","Full Name","이름(실명)"]
+TOKEN_CANDS = ["token","Token","토큰"]
+
+def _key_norm(field: str, value: str) -> str:
+    return (value or "").strip().upper() if field == "uid" else _norm(value)
+
+def _key_norm_many(field: str, values) -> list[str]:
+    """빈 값은 "" 그대로 두고 나머지만 _key_norm (열 단위)"""
+    values = list(values)
+    if field == "uid":
+        return [v.strip().upper() for v in values]
+    hits = [i for i, v in enumerate(values) if v]
+    out = [""] * len(values)
+    for i, k in zip(hits, _norm_many(values[i] for i in hits)):
+        out[i] = k
+    return out
+
+store = storage.open_store(
+    STORE_BACKEND,
+    key_cols={"token": TOKEN_CANDS, "name": NAME_CANDS, "uid": ["uid"]},
+    norm=_key_norm,
+    service_account_file=SERVICE_ACCOUNT_FILE, spread_url=SPREAD_URL,
+    sqlite_path=SQLITE_PATH, mirror=SQLITE_MIRROR, mirror_sec=SQLITE_MIRROR_SEC,
+    quota_per_min=SHEETS_QUOTA_PER_MIN, burst=SHEETS_BURST, max_retries=SHEETS_MAX_RETRIES,
+)
+storage.RETRY_HOOKS.append(lambda table, op, attempt, err: STORE_RETRIES.inc(table=table, op=op))
+
+@app.exception_handler(storage.QuotaExceeded)
+async def _quota_exceeded(request: Request, exc: storage.QuotaExceeded):
+    # 재시도 한도까지 429/5xx 가 계속되면 500 대신 503 + Retry-After 로 응답 (클라이언트 재시도 유도)
+    return JSONResponse({"detail": "시트 API 요청 한도 초과, 잠시 후 다시 시도하세요."}, status_code=503,
+                        headers={"Retry-After": str(max(1, round(exc.retry_after)))})
+
+class _MeteredTable:
+    """저장소 테이블 프록시: 호출 수/실패/지연시간을 지표로 남긴다 (나머지 속성은 그대로 위임)."""
+    OPS = ("get_all_values", "row_values", "batch_get", "batch_update", "update", "lookup", "ensure_cols")
+    STAGES = {"get_all_values": "sheets_fetch", "batch_update": "batch_update"}
+
+    def __init__(self, table, name: str):
+        self._table, self._name = table, name
+
+    def __getattr__(self, attr):
+        fn = getattr(self._table, attr)
+        if attr not in self.OPS:
+            return fn
+        label = self.STAGES.get(attr, f"store_{attr}")
+
+        def call(*args, **kwargs):
+            outcome = "error"
+            try:
+                with stage(label), STORE_SECONDS.time(table=self._name, op=attr):
+                    result = fn(*args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                STORE_CALLS.inc(table=self._name, op=attr, outcome=outcome)
+        return call
+
+ws_responses = _MeteredTable(store.table(RESP_WS_NAME), RESP_WS_NAME)
+ws_cluster   = _MeteredTable(store.table(CLU_WS_NAME), CLU_WS_NAME)
+
+# ===== 시트 스냅샷 (백그라운드 갱신, stale-while-revalidate) =====
+SNAPSHOT_REFRESH = float(os.getenv("SNAPSHOT_REFRESH", "15"))  # 백그라운드 갱신 주기(초)
+SNAPSHOT_TTL = float(os.getenv("SNAPSHOT_TTL", "30"))          # 이보다 오래되면 읽을 때 즉시 갱신 요청
+
+class _KeyMap:
+    """정규화 키 → 시트 행 번호들(오름차순). 같은 키가 여러 행이면 가장 위 행이 대표."""
+    __slots__ = ("_m",)
+
+    def __init__(self, m=None):
+        self._m = m if m is not None else {}
+
+    def copy(self) -> "_KeyMap":
+        return _KeyMap({k: v[:] for k, v in self._m.items()})
+
+    def get(self, key) -> int | None:
+        rows = self._m.get(key)
+        return rows[0] if rows else None
+
+    def add(self, key, row: int):
+        if not key:
+            return
+        rows = self._m.setdefault(key, [])
+        bisect.insort(rows, row)
+
+    def discard(self, key, row: int):
+        rows = self._m.get(key)
+        if rows and row in rows:
+            rows.remove(row)
+            if not rows:
+                del self._m[key]
+
+    def __len__(self):
+        return len(self._m)
+
+class _Schema:
     """
-    시트 전체를 1회 읽어 token 컬럼을 보장하고,
-    모든 데이터 행(2~N)의 token 셀을 채움(비어있을 때 랜덤 생성).
-    대량 쓰기는 컬럼 단위로 batch update.
+    두 시트 헤더에서 논리 필드 → 컬럼(이름, 1-based 인덱스, A1 열 문자)을 한 번에 풀어 둔 것.
+    헤더가 같으면 다음 스냅샷에서도 그대로 재사용하므로 요청 경로에서는 헤더 읽기/이름 매칭이 없다.
     """
-    values = ws.get_all_values()
-    if not values:
-        return {"created": 0, "col_name": None, "col_index": None, "sample": []}
-
-    header = [h.strip() for h in values[0]]
+    # 필드: (후보 컬럼들, 매칭 방식)  exact=헤더와 정확히 일치 / norm=_norm 비교 / fuzzy=norm + 이름 휴리스틱
+    RESP_FIELDS = {
+        "name":         (NAME_CANDS, "fuzzy"),
+        "token":        (TOKEN_CANDS, "exact"),
+        "uid":          (["uid"], "exact"),
+        "url":          (["url"], "exact"),
+        "assigned_at":  (["assigned_at"], "exact"),
+        "scan_count":   (["scan_count"], "exact"),
+        "last_seen_at": (["last_seen_at"], "exact"),
+        "source":       (["source"], "exact"),
+        "campaign":     (["campaign"], "exact"),
+        "school":       (["학교", "School"], "exact"),
+        "year":         (["학년", "Year"], "exact"),
+        "major":        (["전공", "Major"], "exact"),
+        "email":        (["이메일 주소", "이메일", "Email"], "exact"),
+    }
+    CLU_FIELDS = {
+        "name":  (NAME_CANDS, "fuzzy"),
+        "label": (["추천 산업군", "Top Industries", "추천 직무", "top_industries", "GroupName", "Cluster", "Subgroup"], "norm"),
+    }
+    SCORE_COLS = ["Embedded & Control", "Semiconductor & Circuits", "AI & Applications"]
+
+    def __init__(self, resp_header, clu_header):
+        self.resp_header = tuple(h.strip() for h in resp_header)
+        self.clu_header = tuple(h.strip() for h in clu_header)
+        self._resp = {f: self._resolve(self.resp_header, *spec) for f, spec in self.RESP_FIELDS.items()}
+        self._clu = {f: self._resolve(self.clu_header, *spec) for f, spec in self.CLU_FIELDS.items()}
+        self.scores = [c for c in self.SCORE_COLS if c in self.clu_header]
+
+    @staticmethod
+    def _resolve(header, cands, how) -> str | None:
+        col = next((c for c in cands if c in header), None)
+        if col is None and how != "exact":
+            col = _find_col(header, cands) if how == "fuzzy" else \
+                next((h for c in cands for h in header if _norm(h) == _norm(c)), None)
+        return col
+
+    @classmethod
+    def build(cls, resp_values, clu_values, prev: "_Schema | None" = None) -> "_Schema":
+        resp_header = resp_values[0] if resp_values else []
+        clu_header = clu_values[0] if clu_values else []
+        if prev is not None and prev.resp_header == tuple(h.strip() for h in resp_header) \
+                and prev.clu_header == tuple(h.strip() for h in clu_header):
+            return prev
+        return cls(resp_header, clu_header)
+
+    # --- 응답 시트 ---
+    def col(self, field: str) -> str | None:
+        return self._resp[field]
+
+    def pos(self, field: str) -> int | None:
+        """0-based 위치 (values 행렬 접근용)"""
+        col = self._resp[field]
+        return self.resp_header.index(col) if col else None
+
+    def idx(self, field: str) -> int | None:
+        p = self.pos(field)
+        return p + 1 if p is not None else None
+
+    def a1(self, field: str, row: int) -> str:
+        return f"{_col_letter(self.idx(field))}{row}"
+
+    def missing(self, fields) -> list[str]:
+        return [f for f in fields if not self._resp[f]]
+
+    # --- 클러스터 시트 ---
+    def clu_col(self, field: str) -> str | None:
+        return self._clu[field]
+
+    def clu_pos(self, field: str) -> int | None:
+        col = self._clu[field]
+        return self.clu_header.index(col) if col else None
+
+class _SheetIndex:
+    """
+    스냅샷마다 1개씩 두는 조회 인덱스. 값은 모두 시트 행 번호(1-based, 헤더=1행).
+      token / 이름 / uid → 응답 시트 행,  응답 시트 행 → 클러스터 시트 행
+    이전 인덱스를 넘기면 키 값이 바뀐 행만 다시 정규화해서 반영한다.
+    미사용 토큰 행(토큰O + uid 비어있음)도 큐로 유지해 할당을 O(1)로 한다.
+    """
+    FIELDS = ("token", "name", "uid")
+
+    def __init__(self, resp_values, clu_values, schema: _Schema, prev: "_SheetIndex | None" = None):
+        pos = {f: schema.pos(f) for f in self.FIELDS}
+        clu_pos = schema.clu_pos("name")
+
+        same_layout = prev is not None and prev._pos == pos
+        self._pos = pos
+        self._lock = threading.RLock()        # patch()/토큰 큐 변경과 다음 스냅샷의 복사가 겹치지 않도록
+        self.patches = 0                      # patch() 횟수: 페이지 캐시가 스냅샷 버전과 함께 비교
+        if same_layout:
+            with prev._lock:
+                self._maps = {f: m.copy() for f, m in prev._maps.items()}
+                self._raw = dict(prev._raw)
+                self._normed = dict(prev._normed)
+                self._free, self._free_q = set(prev._free), deque(prev._free_q)
+        else:
+            self._maps = {f: _KeyMap() for f in self.FIELDS}
+            self._raw, self._normed = {}, {}
+            self._free, self._free_q = set(), deque()
+
+        rows = resp_values[1:] if resp_values else []
+        changed = []
+        for i, row in enumerate(rows, start=2):
+            raw = tuple((row[p] if p is not None and p < len(row) else "").strip() for p in pos.values())
+            if self._raw.get(i) != raw:
+                changed.append((i, raw))
+        # 바뀐 행의 키는 열 단위로 한꺼번에 정규화 (첫 로드/레이아웃 변경 때 전체 행)
+        cols = [_key_norm_many(f, (raw[j] for _, raw in changed)) for j, f in enumerate(self.FIELDS)]
+        for n, (i, raw) in enumerate(changed):
+            self._set(i, raw, tuple(col[n] for col in cols))
+        for i in [r for r in self._raw if r > len(rows) + 1]:   # 줄어든 행 제거
+            self._set(i, None)
+
+        # 클러스터 시트는 이름 → 행 (작으므로 매번 새로 만든다)
+        self._clu_by_name = _KeyMap()
+        if clu_pos is not None:
+            clu_rows = [(i, row[clu_pos]) for i, row in enumerate(clu_values[1:], start=2) if clu_pos < len(row)]
+            for (i, _), key in zip(clu_rows, _norm_many(v for _, v in clu_rows)):
+                self._clu_by_name.add(key, i)
+
+    @staticmethod
+    def _normalize(field, value: str) -> str:
+        return _key_norm(field, value)
+
+    def _set(self, row: int, raw: tuple | None, normed: tuple | None = None):
+        old = self._normed.pop(row, None)
+        if old:
+            for f, k in zip(self.FIELDS, old):
+                self._maps[f].discard(k, row)
+        if raw is None:
+            self._raw.pop(row, None)
+            self._free.discard(row)
+            return
+        if normed is None:
+            normed = tuple(self._normalize(f, v) if v else "" for f, v in zip(self.FIELDS, raw))
+        for f, k in zip(self.FIELDS, normed):
+            self._maps[f].add(k, row)
+        self._raw[row], self._normed[row] = raw, normed
+        if raw[0] and not raw[2]:
+            self.push_free(row, front=False)
+        else:
+            self._free.discard(row)           # 큐에 남은 항목은 pop_free 에서 건너뜀
+
+    # --- 미사용 토큰 큐 (_FREE_TOKENS 의 잠금 안에서 호출) ---
+    def pop_free(self, skip) -> int | None:
+        with self._lock:
+            while self._free_q:
+                row = self._free_q.popleft()
+                if row in self._free and row not in skip:
+                    self._free.discard(row)
+                    return row
+            return None
+
+    def push_free(self, row: int, front: bool = True):
+        with self._lock:
+            vals = self._raw.get(row)
+            if vals and vals[0] and not vals[2] and row not in self._free:
+                self._free.add(row)
+                (self._free_q.appendleft if front else self._free_q.append)(row)
+
+    def free_count(self) -> int:
+        return len(self._free)
+
+    def lookup(self, field: str, value: str) -> int | None:
+        row = self._maps[field].get(self._normalize(field, (value or "").strip()))
+        INDEX_LOOKUPS.inc(field=field, result="hit" if row else "miss")
+        return row
+
+    def has(self, field: str, value: str) -> bool:
+        """lookup 과 같은 기준의 존재 여부 (내부 검사용, 조회 메트릭에 세지 않음)"""
+        return bool(self._maps[field].get(self._normalize(field, (value or "").strip())))
+
+    def raw(self, row: int, field: str) -> str:
+        vals = self._raw.get(row)
+        return vals[self.FIELDS.index(field)] if vals else ""
+
+    def clu_row(self, resp_row: int) -> int | None:
+        normed = self._normed.get(resp_row)
+        return self._clu_by_name.get(normed[1]) if normed and normed[1] else None
+
+    def patch(self, row: int, **fields):
+        """서버가 직접 쓴 셀을 다음 스냅샷을 기다리지 않고 인덱스에 반영."""
+        with self._lock:
+            cur = list(self._raw.get(row, ("", "", "")))
+            for f, v in fields.items():
+                cur[self.FIELDS.index(f)] = (v or "").strip()
+            self._set(row, tuple(cur))
+            self.patches += 1
+
+    def rows(self):
+        return self._raw.keys()
+
+class _Snapshot:
+    """두 워크시트의 한 시점 사본. 만든 뒤에는 바꾸지 않고 통째로 교체한다."""
+    __slots__ = ("resp_values", "clu_values", "resp", "clu", "schema", "index", "recs", "version", "loaded_at")
+
+    def __init__(self, resp_values, clu_values, version, prev: "_Snapshot | None" = None):
+        self.resp_values = resp_values
+        self.clu_values = clu_values
+        with stage("frame_build"):
+            self.resp = _frame(resp_values)
+            self.clu = _frame(clu_values)
+        self.schema = _Schema.build(resp_values, clu_values, prev.schema if prev else None)
+        with stage("index_build"):
+            self.index = _SheetIndex(resp_values, clu_values, self.schema, prev.index if prev else None)
+        with stage("recommend_build"):
+            self.recs = _Recommendations.build(clu_values, self.schema, prev.recs if prev else None)
+        self.version = version
+        self.loaded_at = time.time()
+
+    def resp_row(self, row: int) -> pd.Series:
+        return self.resp.iloc[row - 2]
+
+    def clu_row(self, row: int) -> pd.Series:
+        return self.clu.iloc[row - 2]
+
+class _SnapshotStore:
+    """
+    읽기 라우트는 항상 메모리의 스냅샷을 바로 받는다(최초 1회만 동기 로드).
+    갱신은 백그라운드 스레드가 주기적으로, 또는 invalidate() 직후 즉시 수행한다.
+    """
+    def __init__(self, refresh_sec: float, ttl_sec: float):
+        self.refresh_sec = refresh_sec
+        self.ttl_sec = ttl_sec
+        self._snap: _Snapshot | None = None
+        self._load_lock = threading.Lock()   # 동시 갱신은 1회로 합침
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._dirty = 0                      # invalidate() 호출 횟수(세대)
+        self._version = 0
+        self._patches = []                   # (세대, row, fields): 읽는 중 끼어든 쓰기 재적용용
+
+    def get(self) -> _Snapshot:
+        snap = self.peek()
+        return snap if snap is not None else self.refresh()
+
+    def peek(self) -> _Snapshot | None:
+        """I/O 없이 현재 스냅샷만 반환 (없으면 None)"""
+        snap = self._snap
+        if snap is not None and (self._dirty or time.time() - snap.loaded_at > self.ttl_sec):
+            self._wake.set()                 # stale 이어도 그대로 반환, 갱신은 백그라운드
+        return snap
+
+    def refresh(self) -> _Snapshot:
+        started = self._snap
+        with self._load_lock:
+            # 기다리는 동안 다른 스레드가 이미 새로 읽어왔다면 그걸 사용
+            if self._snap is not None and self._snap is not started:
+                return self._snap
+            dirty = self._dirty
+            resp_values = ws_responses.get_all_values()
+            clu_values = ws_cluster.get_all_values()
+            self._version += 1
+            snap = _Snapshot(resp_values, clu_values, self._version, self._snap)
+            # 읽기 시작 뒤에 반영된 쓰기는 새 인덱스에도 다시 적용
+            self._patches = [p for p in self._patches if p[0] > dirty]
+            for _, row, fields in self._patches:
+                snap.index.patch(row, **fields)
+            self._snap = snap                # 참조 교체 = 원자적 swap
+            if self._dirty == dirty:         # 읽는 도중 쓰기가 있었다면 dirty 유지
+                self._dirty = 0
+            return snap
+
+    def invalidate(self):
+        """서버 자신의 시트 쓰기 직후 호출: 다음 갱신을 즉시 깨운다."""
+        self._dirty += 1
+        self._wake.set()
+
+    def patch(self, row: int, **fields):
+        """시트에 쓴 token/name/uid 값을 현재 인덱스에 즉시 반영하고 갱신을 예약."""
+        self.invalidate()
+        self._patches.append((self._dirty, row, fields))
+        if self._snap is not None:
+            self._snap.index.patch(row, **fields)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.refresh_sec)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"[snapshot] 갱신 실패(이전 스냅샷 유지): {e!r}")
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="sheet-snapshot", daemon=True)
+        self._thread.start()
+        self._wake.set()                     # 기동 직후 첫 로드
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+_SNAPSHOTS = _SnapshotStore(SNAPSHOT_REFRESH, SNAPSHOT_TTL)
+
+class _FreeTokenPool:
+    """
+    미사용 토큰 행 할당기. 인덱스의 큐에서 꺼낸 행은 시트에 쓰기가 끝날 때까지 예약으로 잡아서
+    동시에 여러 프로비저닝 스테이션이 같은 토큰을 받지 않게 한다(스냅샷이 바뀌어도 유지).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reserved: set[int] = set()
+
+    def take(self, idx: _SheetIndex) -> int | None:
+        with self._lock:
+            row = idx.pop_free(self._reserved)
+            if row:
+                self._reserved.add(row)
+            return row
+
+    def done(self, rows):
+        """쓰기 성공: 인덱스 patch(uid 기록)가 끝난 뒤 예약 해제"""
+        with self._lock:
+            self._reserved.difference_update(rows)
+
+    def release(self, rows):
+        """쓰기 실패/취소: 예약 해제 후 현재 인덱스의 큐 앞쪽으로 되돌림"""
+        with self._lock:
+            self._reserved.difference_update(rows)
+            snap = _SNAPSHOTS.peek()
+            if snap is not None:
+                for row in rows:
+                    snap.index.push_free(row)
+
+    def reserved(self) -> int:
+        return len(self._reserved)
+
+_FREE_TOKENS = _FreeTokenPool()
+
+def _snapshot() -> _Snapshot:
+    return _SNAPSHOTS.get()
+
+_SCHEMA_LOCK = threading.Lock()
+
+def _require_cols(fields) -> _Schema:
+    """
+    응답 시트에 fields(컬럼 이름 = 필드 이름인 uid/url/scan_count 등) 컬럼이 모두 있는 스키마 반환. 평소에는 스냅샷 스키마만 보고 끝나고,
+    빠진 컬럼이 있을 때만 헤더를 새로 읽어(다른 곳에서 이미 추가했을 수 있으므로) 끝에 추가한다.
+    추가한 뒤에는 스냅샷을 새로 읽어 교체한다 (공유 중인 스냅샷의 schema 만 바꾸면 resp/index 와 어긋나므로).
+    """
+    schema = _snapshot().schema
+    if not schema.missing(fields):
+        return schema
+    with _SCHEMA_LOCK:
+        snap = _snapshot()
+        if not snap.schema.missing(fields):
+            return snap.schema
+        header = [h.strip() for h in ws_responses.row_values(1)]
+        ws_responses.ensure_cols(fields, header)
+        header += [f for f in fields if f not in header]
+        snap = _SNAPSHOTS.refresh()
+        if not snap.schema.missing(fields):
+            return snap.schema
+        return _Schema(header, snap.schema.clu_header)   # 저장소가 아직 새 헤더를 돌려주지 않는 경우 (스냅샷은 그대로)
+
+# ===== 비동기 I/O (전용 스레드풀 + 동일 요청 합치기 + 라우트별 동시성 제한) =====
+IO_WORKERS = int(os.getenv("IO_WORKERS", "8"))                  # 저장소 호출 전용 스레드 수
+TAP_CONCURRENCY = int(os.getenv("TAP_CONCURRENCY", "200"))      # 태그 스캔 경로 동시 처리 수
+ADMIN_CONCURRENCY = int(os.getenv("ADMIN_CONCURRENCY", "2"))    # 관리자 작업 동시 처리 수
+
+_IO = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="store-io")
+_INFLIGHT: dict[str, asyncio.Future] = {}
+
+async def _io(fn, *args, **kwargs):
+    """블로킹 저장소 호출을 전용 풀에서 실행 (FastAPI 기본 스레드풀을 점유하지 않음)"""
+    ctx = contextvars.copy_context()         # 요청 구간 계측(metrics.stage)이 풀 스레드에서도 보이도록
+    return await asyncio.get_running_loop().run_in_executor(_IO, partial(ctx.run, fn, *args, **kwargs))
+
+async def _coalesced(key: str, fn, *args):
+    """같은 key 로 동시에 들어온 호출은 1번만 실행하고 결과를 나눠 갖는다."""
+    fut = _INFLIGHT.get(key)
+    if fut is None:
+        fut = asyncio.ensure_future(_io(fn, *args))
+        _INFLIGHT[key] = fut
+        fut.add_done_callback(lambda _: _INFLIGHT.pop(key, None))
+    return await asyncio.shield(fut)
+
+async def _asnapshot() -> _Snapshot:
+    snap = _SNAPSHOTS.peek()
+    if snap is None:                     # 최초 로드만 대기 (동시 요청은 1회로 합침)
+        return await _coalesced("snapshot", _SNAPSHOTS.get)
+    return snap
+
+_LIMITS = {"tap": asyncio.Semaphore(TAP_CONCURRENCY), "admin": asyncio.Semaphore(ADMIN_CONCURRENCY)}
+
+def _bulk(fn, *args):
+    """관리자 대량 작업: Sheets 호출이 프로필 조회/스캔 기록보다 뒤에 줄 서도록"""
+    with storage.priority(storage.BULK):
+        return fn(*args)
+
+def _limited(kind: str):
+    """라우트 의존성: 관리자 대량 작업이 태그 스캔 경로를 굶기지 않도록 종류별 동시성 제한"""
+    async def dep():
+        async with _LIMITS[kind]:
+            yield
+    return dep
+
+# ===== 토큰 발급 (비어 있는 행만, 연속 구간으로 묶어 쓰기 1회) =====
+TOKEN_AUTOFILL_SEC = float(os.getenv("TOKEN_AUTOFILL_SEC", "0"))   # >0 이면 새 응답에 자동 발급(주기, 초)
+TOKEN_LENGTH = 8
+
+_TOKEN_FILL_LOCK = threading.Lock()
+
+def _token_ranges(letter: str, tokens: dict[int, str]) -> list[dict]:
+    """{행: 토큰} → 연속한 행끼리 묶은 batch_update 항목 (예: H5:H9 한 개)"""
+    data, run = [], []
+    for row in sorted(tokens):
+        if run and row != run[-1] + 1:
+            data.append({"range": f"{letter}{run[0]}:{letter}{run[-1]}", "values": [[tokens[r]] for r in run]})
+            run = []
+        run.append(row)
+    if run:
+        data.append({"range": f"{letter}{run[0]}:{letter}{run[-1]}", "values": [[tokens[r]] for r in run]})
+    return data
+
+def _fill_missing_tokens(snap: _Snapshot | None = None) -> dict:
+    """
+    token 컬럼을 보장하고, 토큰이 비어 있는 행에만 새 토큰을 만들어 batch_update 1회로 쓴다.
+    snap 을 주지 않으면 방금 제출된 응답까지 보도록 시트를 새로 읽는다.
+    중복 검사는 스냅샷 인덱스(대소문자 무시, /u/{token} 조회와 같은 기준)로 한다.
+    """
+    with _TOKEN_FILL_LOCK:
+        added = bool(_snapshot().schema.missing(["token"]))
+        _require_cols(["token"])              # 컬럼을 추가했다면 그 안에서 스냅샷도 새로 읽음
+        if added:
+            snap = _snapshot()
+        elif snap is None:
+            snap = _SNAPSHOTS.refresh()
+        schema, idx = snap.schema, snap.index
+        col = schema.col("token")
+        if not snap.resp_values:
+            return {"created": 0, "col_name": col, "col_index": None, "sample": [], "ranges": 0}
+
+        taken, fresh = set(), {}
+        for row in sorted(idx.rows()):
+            if idx.raw(row, "token"):
+                continue
+            t = _gen_token(TOKEN_LENGTH)
+            while idx.has("token", t) or _norm(t) in taken:
+                t = _gen_token(TOKEN_LENGTH)
+            taken.add(_norm(t))
+            fresh[row] = t
+
+        data = _token_ranges(_col_letter(schema.idx("token")), fresh)
+        if data:
+            ws_responses.batch_update(data)
+            for row, t in fresh.items():
+                _SNAPSHOTS.patch(row, token=t)
+        samples = [{"row": row, "name": idx.raw(row, "name"), "token": t} for row, t in fresh.items()]
+        return {"created": len(fresh), "col_name": col, "col_index": schema.idx("token"),
+                "sample": samples, "ranges": len(data)}
+
+class _TokenAutofill:
+    """TOKEN_AUTOFILL_SEC 마다 스냅샷에서 토큰이 빈 행(새 설문 응답)을 찾아 자동 발급"""
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            snap = _SNAPSHOTS.peek()
+            if snap is None or not snap.schema.col("token"):
+                continue
+            idx = snap.index
+            if all(idx.raw(r, "token") for r in list(idx.rows())):
+                continue
+            try:
+                with storage.priority(storage.BULK):
+                    result = _fill_missing_tokens(snap)
+                if result["created"]:
+                    print(f"[tokens] 새 응답 {result['created']}건에 토큰 발급 (쓰기 범위 {result['ranges']}개)")
+            except Exception as e:
+                print(f"[tokens] 자동 발급 실패(다음 주기에 재시도): {e!r}")
+
+    def start(self):
+        if self.interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="token-autofill", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+_AUTOFILL = _TokenAutofill(TOKEN_AUTOFILL_SEC)
+
+# ===== 스캔 기록 버퍼 (write-behind) =====
+TOUCH_FLUSH_SEC = float(os.getenv("TOUCH_FLUSH_SEC", "5"))      # 주기적 flush 간격(초)
+TOUCH_FLUSH_MAX = int(os.getenv("TOUCH_FLUSH_MAX", "200"))      # 이만큼 쌓이면 즉시 flush
+TOUCH_JOURNAL = os.getenv("TOUCH_JOURNAL", "touch_journal.jsonl")
+
+def _to_int(v) -> int:
+    try:
+        return int(float(str(v).strip() or "0"))
+    except Exception:
+        return 0
 
-    # token/Token/토큰 우선순위: token -> Token -> 토큰
-    token_col_name = None
-    for cand in ["token","Token","토큰"]:
-        if cand in header:
-            token_col_name = cand; break
-    if token_col_name is None:
-        header.append("token")
-        ws.update("1:1", [header])
-        token_col_name = "token"
-        values[0] = header
-
-    token_col_idx = header.index(token_col_name) + 1
-    token_col_letter = _col_letter(token_col_idx)
-
-    # 샘플 표시용 이름컬럼
-    name_col_idx = None
-    for cand in ["이름","성명","Name","Full Name","이름(실명)"]:
-        if cand in header:
-            name_col_idx = header.index(cand) + 1
-            break
-
-    # 기존 토큰 수집(중복 방지)
-    existing = set()
-    for r in range(1, len(values)):
-        row = values[r]
-        if len(row) >= token_col_idx:
-            tok = (row[token_col_idx-1] or "").strip()
-            if tok:
-                existing.add(tok)
-
-    # 채움 벡터 생성
-    created, samples = 0, []
-    out_col_values = []  # rows 2..N 에 대한 [[tok], [tok], ...]
-    for r in range(1, len(values)):
-        row = values[r]
-        if len(row) < token_col_idx:
-            row += [""] * (token_col_idx - len(row))
-        tok = (row[token_col_idx-1] or "").strip()
-        if not tok:
-            t = _gen_token(8)
-            while t in existing:
-                t = _gen_token(8)
-            tok = t
-            existing.add(tok)
-            created += 1
-            if name_col_idx and name_col_idx <= len(row):
-                samples.append({"row": r+1, "name": row[name_col_idx-1], "token": tok})
-        out_col_values.append([tok])
-
-    # 컬럼 범위 일괄 업데이트
-    if out_col_values:
-        start_row = 2
-        CHUNK = 500
-        for i in range(0, len(out_col_values), CHUNK):
-            sub_values = out_col_values[i:i+CHUNK]
-            sub_start = start_row + i
-            sub_end = sub_start + len(sub_values) - 1
-            rng = f"{token_col_letter}{sub_start}:{token_col_letter}{sub_end}"
-            ws.update(rng, sub_values, value_input_option="RAW")
-
-    return {"created": created, "col_name": token_col_name, "col_index": token_col_idx, "sample": samples}
-
-# ===== 추천 산업군 선택 헬퍼 =====
-def _pick_top_industries(df_clu: pd.DataFrame, clu_row: pd.Series) -> str:
+class _TouchBuffer:
     """
-    우선순위:
-    1) 라벨형 컬럼: 추천 산업군/Top Industries/추천 직무/top_industries/GroupName/Cluster/Subgroup
-    2) 점수형 컬럼 3개(Embedded & Control, Semiconductor & Circuits, AI & Applications) 중 상위 1~2개
+    /u/{token}/touch 누적기. 행 번호별로 횟수는 합산, 시각/source/campaign은 최신값만 유지하고
+    TOUCH_FLUSH_SEC 마다(또는 TOUCH_FLUSH_MAX 건마다) batch_get 1회 + batch_update 1회로 시트에 반영.
+    아직 반영 안 된 건은 로컬 저널(JSON lines)에 남겨 재시작 후에도 이어서 반영한다.
+    저널 파일 쓰기는 전용 스레드(touch-journal)가 모아서 하므로 add() 는 메모리만 만진다.
     """
-    # 1) 라벨형 컬럼
-    label_col = _find_col(df_clu, [
-        "추천 산업군", "Top Industries", "추천 직무", "top_industries",
-        "GroupName", "Cluster", "Subgroup"
-    ])
-    if label_col:
-        v = str(clu_row.get(label_col, "")).strip()
-        if v:
-            return v
-
-    # 2) 점수형 컬럼
-    candidate_cols = ["Embedded & Control", "Semiconductor & Circuits", "AI & Applications"]
-    have = [c for c in candidate_cols if c in df_clu.columns]
-    scores = []
-    for c in have:
-        raw = str(clu_row.get(c, "")).strip()
+    def __init__(self, flush_sec: float, flush_max: int, journal_path: str):
+        self.flush_sec = flush_sec
+        self.flush_max = flush_max
+        self.journal_path = journal_path
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: dict[int, dict] = {}
+        self._events = 0
+        self._written: dict[int, int] = {}   # 마지막으로 시트에 쓴 scan_count (스냅샷 갱신 전 보정용)
+        self._journal = None
+        self._jq: list[dict] = []            # 저널에 아직 안 쓴 기록 (_pending 에는 이미 합쳐짐)
+        self._jcond = threading.Condition()  # _jq 보호 + 쓰기 스레드 깨우기
+        self._jfile = threading.Lock()       # 저널 파일 (이어 쓰기 / 압축)
+        self._jstop = False
+        self._writer: threading.Thread | None = None
+        self._replay_upto = 0                # 이전 실행이 남긴 저널 길이 (_mark_replay)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    # --- 누적 ---
+    def _merge(self, row: int, token: str, count: int, ts: str, source=None, campaign=None):
+        e = self._pending.setdefault(row, {"token": token, "count": 0, "ts": "", "source": None, "campaign": None})
+        e["count"] += count
+        if ts >= e["ts"]:
+            e["ts"] = ts
+            if source:   e["source"] = source
+            if campaign: e["campaign"] = campaign
+
+    def add(self, row: int, token: str, ts: str, source=None, campaign=None) -> int:
+        """기록 후 예상 scan_count(시트값 + 미반영분)를 돌려준다."""
+        rec = {"token": token, "count": 1, "ts": ts, "source": source, "campaign": campaign}
+        with self._lock:
+            self._merge(row, **rec)
+            self._journal_put(rec)
+            self._events += 1
+            pending = self._pending[row]["count"]
+            if self._events >= self.flush_max:
+                self._wake.set()
+        return self.projected(row, pending)
+
+    def projected(self, row: int, pending: int | None = None) -> int:
+        snap = _snapshot()
+        col = snap.schema.col("scan_count")
+        base = _to_int(snap.resp_row(row).get(col, 0)) if col and row - 2 < len(snap.resp) else 0
+        base = max(base, self._written.get(row, 0))
+        if pending is None:
+            pending = self._pending.get(row, {}).get("count", 0)
+        return base + pending
+
+    def depth(self) -> int:
+        return self._events
+
+    # --- 저널 (add() 는 큐에 넣기만, 파일 I/O 는 touch-journal 스레드) ---
+    def _journal_put(self, rec: dict):
+        with self._jcond:
+            self._jq.append(rec)
+            self._jcond.notify()
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._journal_loop, name="touch-journal", daemon=True)
+                self._writer.start()
+
+    def _journal_loop(self):
+        while True:
+            with self._jcond:
+                while not self._jq and not self._jstop:
+                    self._jcond.wait()
+                if not self._jq:
+                    return
+            try:
+                self._journal_sync()
+            except OSError as e:
+                print(f"[touch] 저널 기록 실패(메모리에는 유지): {e!r}")
+
+    def _journal_sync(self):
+        """큐에 쌓인 기록을 한꺼번에 저널에 이어 쓴다 (flush 1회)."""
+        with self._jfile:
+            with self._jcond:
+                recs, self._jq = self._jq, []
+            if not recs:
+                return
+            if self._journal is None:
+                self._journal = open(self.journal_path, "a", encoding="utf-8")
+            self._journal.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in recs))
+            self._journal.flush()
+
+    def _journal_close(self):
+        """쓰기 스레드를 멈추고 남은 큐를 저널에 쓴 뒤 파일을 닫는다."""
+        with self._jcond:
+            self._jstop = True
+            self._jcond.notify()
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.join(timeout=10)
+        self._journal_sync()
+        with self._jfile:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+    def _journal_compact(self):
+        """
+        현재 미반영분만 남도록 저널을 다시 쓴다 (_lock 보유 상태에서 호출).
+        아직 파일에 안 쓴 큐 기록은 _pending(또는 방금 시트에 쓴 batch)에 이미 들어 있으므로 버린다.
+        """
+        with self._jfile:
+            with self._jcond:
+                self._jq.clear()
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            tmp = self.journal_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for e in self._pending.values():
+                    f.write(json.dumps(e, ensure_ascii=False) + "\n")
+            os.replace(tmp, self.journal_path)
+
+    def _mark_replay(self):
+        """
+        start() 에서 add() 가 불리기 전에 호출: 이전 실행이 남긴 저널 길이를 기억한다.
+        _replay() 는 이 길이까지만 읽는다 (그 뒤에 붙은 줄은 이번 실행의 add() 가 이미 _pending 에 합친 것).
+        """
+        self._replay_upto = 0
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, "rb+") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size:
+                f.seek(size - 1)
+                if f.read(1) != b"\n":       # 비정상 종료로 잘린 마지막 줄 뒤에 새 기록이 붙지 않도록
+                    f.write(b"\n")
+                    size += 1
+        self._replay_upto = size
+
+    def _replay(self):
+        if not self._replay_upto:
+            return
+        idx = _snapshot().index
+        n = 0
+        with self._lock:
+            upto, self._replay_upto = self._replay_upto, 0
+            if not upto:                     # 다른 스레드가 먼저 복구함
+                return
+            with open(self.journal_path, "rb") as f:
+                head = f.read(upto).decode("utf-8", errors="replace")
+            for line in head.splitlines():
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue                 # 비정상 종료로 잘린 마지막 줄
+                row = idx.lookup("token", rec.get("token", ""))
+                if row:
+                    self._merge(row, **rec)
+                    self._events += rec.get("count", 1)
+                    n += rec.get("count", 1)
+            self._journal_compact()
+        if n:
+            print(f"[touch] 저널에서 미반영 스캔 {n}건 복구")
+
+    # --- 반영 ---
+    def flush(self):
+        self._replay()                       # 복구 전에 저널을 압축하면 이전 실행분이 사라지므로 먼저 복구
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending, self._events = self._pending, {}, 0
+            if not batch:
+                return 0
+            try:
+                self._write(batch)
+            except Exception:
+                with self._lock:             # 실패 시 되돌려 다음 주기에 재시도
+                    for row, e in batch.items():
+                        self._merge(row, **e)
+                        self._events += e["count"]
+                raise
+            with self._lock:
+                self._journal_compact()
+            return len(batch)
+
+    def _write(self, batch: dict[int, dict]):
+        ws = ws_responses
+        needed = ["scan_count", "last_seen_at"]
+        if any(e["source"] for e in batch.values()):   needed.append("source")
+        if any(e["campaign"] for e in batch.values()): needed.append("campaign")
+        schema = _require_cols(needed)          # 컬럼이 이미 있으면 시트 호출 없음
+
+        # Read 1회: 대상 행들의 현재 scan_count
+        rows = sorted(batch)
+        got = ws.batch_get([schema.a1("scan_count", r) for r in rows])
+        current = {}
+        for r, vals in zip(rows, got):
+            current[r] = _to_int(vals[0][0]) if vals and vals[0] else 0
+
+        # Write 1회
+        updates, totals = [], {}
+        for r in rows:
+            e = batch[r]
+            total = totals[r] = current[r] + e["count"]
+            updates.append({"range": schema.a1("scan_count", r), "values": [[str(total)]]})
+            updates.append({"range": schema.a1("last_seen_at", r), "values": [[e["ts"]]]})
+            if e["source"]:
+                updates.append({"range": schema.a1("source", r), "values": [[e["source"]]]})
+            if e["campaign"]:
+                updates.append({"range": schema.a1("campaign", r), "values": [[e["campaign"]]]})
+        ws.batch_update(updates)
+        # 쓰기가 성공한 뒤에만 기록 (실패하면 flush()가 batch 를 _pending 으로 되돌리므로 두 번 세지 않게)
+        self._written.update(totals)
+        # 스냅샷은 무효화하지 않는다: scan_count 는 projected()가 _written 으로 보정하고
+        # 나머지는 주기 갱신으로 충분 (매 flush 마다 시트 전체를 다시 읽지 않기 위해)
+
+    def _loop(self):
         try:
-            val = float(raw.replace(",", ""))
-        except Exception:
-            val = 0.0
-        scores.append((val, c))
-    scores.sort(key=lambda x: x[0], reverse=True)
-
-    if not scores:
-        return ""
-
-    # 상위 2개까지만 노출
-    names = [name for _, name in scores[:2]]
-    # (선택) 한글 표시 원하면 여기서 매핑
-    # kmap = {"Embedded & Control":"임베디드/제어","Semiconductor & Circuits":"반도체/회로","AI & Applications":"AI/응용"}
-    # names = [kmap.get(n, n) for n in names]
-    return ", ".join(names)
+            self._replay()
+        except Exception as e:
+            print(f"[touch] 저널 복구 실패: {e!r}")
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_sec)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[touch] flush 실패(다음 주기에 재시도): {e!r}")
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._jstop = False
+        self._mark_replay()                  # 라우트가 열리기 전(lifespan)에 저널 길이 고정
+        self._thread = threading.Thread(target=self._loop, name="touch-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"[touch] 종료 시 flush 실패(저널에 보존됨): {e!r}")
+        self._journal_close()
+
+_TOUCHES = _TouchBuffer(TOUCH_FLUSH_SEC, TOUCH_FLUSH_MAX, TOUCH_JOURNAL)
+
+# ===== 스캔 이벤트 로그 & 통계 (/admin/stats) =====
+TAPLOG_DIR = os.getenv("TAPLOG_DIR", "taplog")                          # 빈 값이면 파일 기록 없이 메모리 집계만
+TAPLOG_SEGMENT_MB = float(os.getenv("TAPLOG_SEGMENT_MB", "16"))         # 세그먼트 최대 크기
+TAPLOG_SEGMENT_SEC = float(os.getenv("TAPLOG_SEGMENT_SEC", "3600"))     # 세그먼트 최대 기간(초)
+TAPLOG_RETENTION_DAYS = float(os.getenv("TAPLOG_RETENTION_DAYS", "30")) # 0 = 지우지 않음
+TAPSTATS_WINDOW_SEC = int(os.getenv("TAPSTATS_WINDOW_SEC", "86400"))    # 메모리 집계 보관 기간 = 조회 가능한 최대 window
+
+_TAPLOG = taplog.TapLog(TAPLOG_DIR, int(TAPLOG_SEGMENT_MB * (1 << 20)), TAPLOG_SEGMENT_SEC,
+                        TAPLOG_RETENTION_DAYS * 86400) if TAPLOG_DIR else None
+_TAPSTATS = taplog.TapStats(TAPSTATS_WINDOW_SEC)
+
+def _record_tap(ts: float, token: str, source: str | None, campaign: str | None):
+    if _TAPLOG is not None:
+        _TAPLOG.append(ts, token, source, campaign)           # 큐에만 넣음 (파일은 taplog-writer 스레드)
+    _TAPSTATS.add(ts, token, source, campaign)
+
+def _load_tap_history():
+    since = time.time() - TAPSTATS_WINDOW_SEC
+    n = 0
+    try:
+        for events, strings in _TAPLOG.history(since):
+            n += _TAPSTATS.add_many(events, strings, since)
+    except Exception as e:
+        print(f"[taps] 로그 복구 실패: {e!r}")
+    if n:
+        print(f"[taps] 로그에서 최근 스캔 {n}건 집계 복구")
+
+def _start_taps():
+    """새 세그먼트를 열고, 이전 세그먼트의 집계 기간 안 이벤트는 백그라운드에서 다시 집계"""
+    if _TAPLOG is None:
+        return
+    _TAPLOG.start()
+    threading.Thread(target=_load_tap_history, name="taplog-replay", daemon=True).start()
+
+# ===== 추천 산업군 (스냅샷마다 한 번에 계산) =====
+RECOMMEND_TOP_K = int(os.getenv("RECOMMEND_TOP_K", "2"))        # 점수형일 때 노출할 상위 개수
+RECOMMEND_KMAP = os.getenv("RECOMMEND_KMAP", "0") == "1"        # 1이면 점수 컬럼 이름을 한글로 표시
+INDUSTRY_KMAP = {"Embedded & Control":"임베디드/제어","Semiconductor & Circuits":"반도체/회로","AI & Applications":"AI/응용"}
+
+class _Recommendations:
+    """
+    클러스터 시트 → 행별 추천 산업군 표.
+    우선순위:
+    1) 라벨형 컬럼: 추천 산업군/Top Industries/추천 직무/top_industries/GroupName/Cluster/Subgroup (값이 있으면 그대로)
+    2) 점수형 컬럼 3개(Embedded & Control, Semiconductor & Circuits, AI & Applications) 중 상위 k개
+    점수 파싱과 정렬은 전체 행을 NumPy 로 한 번에 처리하고, 조회는 dict 1회.
+    """
+    def __init__(self, clu_values, schema: _Schema, k: int = RECOMMEND_TOP_K, kmap: bool = RECOMMEND_KMAP):
+        self.clu_values, self.k = clu_values, k
+        rows = clu_values[1:] if clu_values else []
+        cell = lambda p: [(r[p] if p < len(r) else "").strip() for r in rows]
+
+        self.names = [INDUSTRY_KMAP.get(c, c) if kmap else c for c in schema.scores]
+        if schema.scores and rows:
+            cols = [pd.to_numeric(pd.Series(cell(schema.clu_header.index(c))).str.replace(",", ""), errors="coerce")
+                    for c in schema.scores]
+            self.scores = np.nan_to_num(np.column_stack(cols).astype(float), nan=0.0)
+            self.order = np.argsort(-self.scores, axis=1, kind="stable")   # 동점이면 컬럼 순서 유지
+        else:
+            self.scores = np.zeros((len(rows), 0))
+            self.order = np.zeros((len(rows), 0), dtype=int)
+        label_pos = schema.clu_pos("label")
+        self.labels = cell(label_pos) if label_pos is not None else [""] * len(rows)
+        self._text = {i + 2: self._compose(i, k) for i in range(len(rows))}
+
+    @classmethod
+    def build(cls, clu_values, schema: _Schema, prev: "_Recommendations | None" = None) -> "_Recommendations":
+        if prev is not None and prev.clu_values == clu_values:
+            return prev
+        return cls(clu_values, schema)
+
+    def text(self, clu_row: int, k: int | None = None) -> str:
+        """클러스터 시트 행 번호 → 표시 문자열 (k 가 기본값이면 미리 계산한 값)"""
+        if k is None or k == self.k:
+            return self._text.get(clu_row, "")
+        i = clu_row - 2
+        return self._compose(i, k) if 0 <= i < len(self.labels) else ""
+
+    def _compose(self, i: int, k: int) -> str:
+        if self.labels[i]:
+            return self.labels[i]
+        return ", ".join(self.names[j] for j in self.order[i, :k])
+
+    def ranked(self, clu_row: int) -> list[dict]:
+        i = clu_row - 2
+        return [{"industry": self.names[j], "score": float(self.scores[i, j])} for j in self.order[i]]
+
+# ===== 프로필 페이지 캐시 (LRU + ETag/304 + gzip/br) =====
+PAGE_CACHE_SIZE = int(os.getenv("PAGE_CACHE_SIZE", "4096"))     # 캐시할 렌더링 결과 수
+PAGE_MAX_AGE = int(os.getenv("PAGE_MAX_AGE", "0"))              # 브라우저 캐시(초), 0이면 매번 재검증
+
+class _Page:
+    """렌더링된 HTML(또는 /display 페이로드) 1건과 인코딩별 압축본/ETag"""
+    __slots__ = ("fp", "version", "body", "etag", "_enc")
+
+    def __init__(self, fp: str, version, html: str | bytes):
+        self.fp = fp
+        self.version = version
+        self.body = html.encode("utf-8") if isinstance(html, str) else html
+        self.etag = hashlib.sha1(self.body).hexdigest()[:20]
+        self._enc = {}
+
+    def encoded(self, enc: str) -> bytes:
+        if enc not in self._enc:
+            if enc == "br":
+                self._enc[enc] = brotli.compress(self.body, quality=5)
+            elif enc == "gzip":
+                self._enc[enc] = gzip.compress(self.body, compresslevel=6)
+            else:
+                return self.body
+        return self._enc[enc]
+
+class _PageCache:
+    """
+    키: ("u", 토큰) / ("user", 이름) / ("display", "token"|"name", 값, fmt) → _Page.
+    fp 는 해당 응답/클러스터 행의 원본 값 해시라서 행이 바뀌면 자동으로 다시 렌더링된다.
+    """
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._d: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def fresh(self, key, version) -> _Page | None:
+        """이번 스냅샷에서 이미 검증된 항목이면 반환 (인덱스 조회 불필요)"""
+        with self._lock:
+            page = self._d.get(key)
+            if page is None or page.version != version:
+                return None
+            self._d.move_to_end(key)
+        PAGE_CACHE.inc(result="hit")
+        return page
+
+    def get(self, key, fp: str, version) -> _Page | None:
+        with self._lock:
+            page = self._d.get(key)
+            if page is None or page.fp != fp:
+                PAGE_CACHE.inc(result="miss")
+                return None
+            page.version = version            # 행이 그대로면 새 스냅샷에서도 유효
+            self._d.move_to_end(key)
+        PAGE_CACHE.inc(result="hit_revalidated")
+        return page
+
+    def put(self, key, page: _Page) -> _Page:
+        with self._lock:
+            self._d[key] = page
+            self._d.move_to_end(key)
+            while len(self._d) > self.maxsize:
+                self._d.popitem(last=False)
+        return page
+
+_PAGES = _PageCache(PAGE_CACHE_SIZE)
+
+def _page_version(snap: _Snapshot) -> tuple[int, int]:
+    """스냅샷 버전 + 인덱스 patch 횟수: 프로비저닝/토큰 발급 직후에도 fresh() 가 옛 페이지를 내주지 않도록"""
+    return (snap.version, snap.index.patches)
+
+def _row_fingerprint(snap: _Snapshot, row_no: int, clu_no: int | None) -> str:
+    h = hashlib.sha1()
+    h.update(json.dumps(snap.resp_values[0] + snap.resp_values[row_no - 1], ensure_ascii=False).encode())
+    h.update(json.dumps([snap.index.raw(row_no, f) for f in _SheetIndex.FIELDS], ensure_ascii=False).encode())
+    if clu_no:
+        h.update(json.dumps(snap.clu_values[0] + snap.clu_values[clu_no - 1], ensure_ascii=False).encode())
+    return h.hexdigest()
+
+def _profile_page(request: Request, snap: _Snapshot, key, row_no: int, token: str) -> _Page:
+    """행 값이 바뀌지 않았으면 캐시된 페이지, 아니면 profile.html 렌더링 후 캐시"""
+    clu_no = snap.index.clu_row(row_no)
+    fp = _row_fingerprint(snap, row_no, clu_no)
+    page = _PAGES.get(key, fp, _page_version(snap))
+    if page is not None:
+        return page
+
+    row = snap.resp_row(row_no)
+    field = lambda f: row.get(snap.schema.col(f), "") if snap.schema.col(f) else ""
+    # 추천 산업군
+    top_industries = snap.recs.text(clu_no) if clu_no else ""
+    with stage("template_render"):
+        html = templates.get_template("profile.html").render({
+            "request": request,
+            "user": {
+                "name":   str(field("name")),
+                "school": field("school"),
+                "year":   field("year"),
+                "major":  field("major"),
+                "email":  field("email"),
+                "top_industries": top_industries,
+                "token": token,
+            }
+        })
+    return _PAGES.put(key, _Page(fp, _page_version(snap), html))
+
+def _accept_encoding(request: Request) -> str:
+    accepted = {}
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.lower()] = q
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return "identity"
+
+def _page_response(request: Request, page: _Page) -> Response:
+    enc = _accept_encoding(request)
+    etag = f'"{page.etag}"' if enc == "identity" else f'"{page.etag}-{enc}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={PAGE_MAX_AGE}, must-revalidate",
+        "Vary": "Accept-Encoding",
+    }
+    inm = request.headers.get("if-none-match", "")
+    if inm:
+        tags = {t.strip().removeprefix("W/") for t in inm.split(",")}
+        if "*" in tags or etag in tags:
+            PAGE_CACHE.inc(result="not_modified")
+            return Response(status_code=304, headers=headers)
+    if enc != "identity":
+        headers["Content-Encoding"] = enc
+    return Response(page.encoded(enc), media_type="text/html; charset=utf-8", headers=headers)
 
 # ===== 라우트 =====
 @app.get("/", response_class=HTMLResponse)
-def root():
+async def root():
     return HTMLResponse('<h2>NFC Server</h2><p><a href="/users">/users</a></p>')
 
 # 관리자 프로비저닝 UI (templates/provision.html 사용)
 @app.get("/admin/provision", response_class=HTMLResponse)
-def ui_provision(request: Request, key: str = Query(..., description="관리자 키")):
+async def ui_provision(request: Request, key: str = Query(..., description="관리자 키")):
     if key != ADMIN_KEY:
         raise HTTPException(403, "forbidden")
     return templates.TemplateResponse("provision.html", {"request": request})
 
 @app.get("/users", response_class=HTMLResponse)
-def list_users():
-    df = _read_ws(ws_responses)
+async def list_users():
+    return await run_in_threadpool(_render_user_list, await _asnapshot())
+
+def _render_user_list(snap: _Snapshot):
+    df = snap.resp.copy()   # 링크 컬럼을 덧붙이므로 공유 스냅샷은 건드리지 않음
     if df.empty:
         return HTMLResponse("<h2>응답 시트에 데이터가 없습니다.</h2>")
 
-    name_col  = _find_col(df, ["이름","성명","Name","Full Name","이름(실명)"])
-    token_col = _find_col(df, ["token","Token","토큰"])
+    name_col  = snap.schema.col("name")
+    token_col = snap.schema.col("token")
 
     prefer = ["이름","성명","학교","학년","전공","이메일 주소","이메일",
               "Name","School","Year","Major","Email"]
@@ -265,114 +1326,292 @@ def list_users():
 
     df["_token_link"] = df[token_col].apply(
         lambda t: f'<a href="/u/{quote(str(t), safe="")}">토큰</a>'
-        if token_col and pd.notna(t) and str(t).strip() else ""
-    )
+        if pd.notna(t) and str(t).strip() else ""
+    ) if token_col else ""
     df["_name_link"] = df[name_col].apply(
         lambda x: f'<a href="/user/{quote(str(x), safe="")}">프로필</a>'
-        if name_col and pd.notna(x) else ""
-    )
+        if pd.notna(x) else ""
+    ) if name_col else ""
 
     return HTMLResponse(f"<h2>응답자 목록</h2>{df[cols+['_name_link','_token_link']].to_html(index=False, escape=False)}")
 
-@app.get("/user/{name}", response_class=HTMLResponse)
-def render_user_profile(request: Request, name: str):
+@app.get("/user/{name}", response_class=HTMLResponse, dependencies=[Depends(_limited("tap"))])
+async def render_user_profile(request: Request, name: str):
     name = unquote(name)
-    df_resp = _read_ws(ws_responses)
-    df_clu  = _read_ws(ws_cluster)
-
-    if df_resp.empty:
-        raise HTTPException(500, "응답 시트에 데이터가 없습니다.")
-
-    name_col_resp = _find_col(df_resp, ["이름","성명","Name","Full Name","이름(실명)"])
-    if not name_col_resp:
-        raise HTTPException(500, f"응답 시트 이름 컬럼 미발견: {df_resp.columns.tolist()}")
-
-    df_resp["_name_norm"] = df_resp[name_col_resp].astype(str).apply(_norm)
-    name_norm = _norm(name)
-
-    match = df_resp[df_resp["_name_norm"] == name_norm]
-    if match.empty:
-        raise HTTPException(404, f"설문 응답에 '{name}' 없음")
-    resp = match.iloc[0]
-
-    # 토큰(있으면) 템플릿으로 전달
-    token_col = _find_col(df_resp, ["token","Token","토큰"])
-    user_token = str(resp.get(token_col, "")) if token_col else ""
-
-    # 추천 산업군
-    top_industries = ""
-    if not df_clu.empty:
-        name_col_clu = _find_col(df_clu, ["이름","성명","Name","Full Name","이름(실명)"])
-        if name_col_clu:
-            df_clu["_name_norm"] = df_clu[name_col_clu].astype(str).apply(_norm)
-            clu_match = df_clu[df_clu["_name_norm"] == name_norm]
-            if not clu_match.empty:
-                clu = clu_match.iloc[0]
-                top_industries = _pick_top_industries(df_clu, clu)
-
-    return templates.TemplateResponse("profile.html", {
-        "request": request,
-        "user": {
-            "name":   resp.get(name_col_resp, ""),
-            "school": resp.get("학교", resp.get("School", "")),
-            "year":   resp.get("학년", resp.get("Year", "")),
-            "major":  resp.get("전공", resp.get("Major", "")),
-            "email":  resp.get("이메일 주소", resp.get("이메일", resp.get("Email", ""))),
-            "top_industries": top_industries,
-            "token": user_token,
-        }
-    })
-
-@app.get("/u/{token}", response_class=HTMLResponse)
-def profile_by_token(request: Request, token: str):
+    snap = await _asnapshot()
+    key = ("user", name)
+
+    page = _PAGES.fresh(key, _page_version(snap))   # 같은 스냅샷에서 본 적 있으면 조회/렌더 생략
+    if page is None:
+        idx = snap.index
+        if snap.resp.empty:
+            raise HTTPException(500, "응답 시트에 데이터가 없습니다.")
+        if not snap.schema.col("name"):
+            raise HTTPException(500, f"응답 시트 이름 컬럼 미발견: {snap.resp.columns.tolist()}")
+
+        row_no = idx.lookup("name", name)
+        if not row_no:
+            raise HTTPException(404, f"설문 응답에 '{name}' 없음")
+
+        # 토큰(있으면) 템플릿으로 전달
+        token_col = snap.schema.col("token")
+        user_token = str(snap.resp_row(row_no).get(token_col, "")) if token_col else ""
+        page = _profile_page(request, snap, key, row_no, user_token)
+    return _page_response(request, page)
+
+@app.get("/u/{token}", response_class=HTMLResponse, dependencies=[Depends(_limited("tap"))])
+async def profile_by_token(request: Request, token: str):
     token = unquote(token)
-    df_resp = _read_ws(ws_responses)
-    df_clu  = _read_ws(ws_cluster)
-
-    if df_resp.empty:
-        raise HTTPException(500, "응답 시트에 데이터가 없습니다.")
-
-    token_col = _find_col(df_resp, ["token","Token","토큰"])
-    if not token_col:
-        raise HTTPException(404, "응답 시트에 token 컬럼이 없습니다. 먼저 토큰을 생성하세요.")
-
-    df_resp["_tok_norm"] = df_resp[token_col].astype(str).apply(_norm)
-    match = df_resp[df_resp["_tok_norm"] == _norm(token)]
-    if match.empty:
-        raise HTTPException(404, f"토큰 '{token}'에 해당하는 사용자가 없습니다.")
-    row = match.iloc[0]
+    snap = await _asnapshot()
+    key = ("u", token)
+
+    page = _PAGES.fresh(key, _page_version(snap))
+    if page is None:
+        idx = snap.index
+        if snap.resp.empty:
+            raise HTTPException(500, "응답 시트에 데이터가 없습니다.")
+        if not snap.schema.col("token"):
+            raise HTTPException(404, "응답 시트에 token 컬럼이 없습니다. 먼저 토큰을 생성하세요.")
+
+        row_no = idx.lookup("token", token)
+        if not row_no:
+            raise HTTPException(404, f"토큰 '{token}'에 해당하는 사용자가 없습니다.")
+        page = _profile_page(request, snap, key, row_no, token)
+    return _page_response(request, page)
+
+# ----- 전자종이 명찰: /display/{token} (프로필 + 추천을 작은 고정 스키마로) -----
+# json: {"v":1,"token":..,"name":..,"school":..,"year":..,"major":..,"email":..,"top":..}
+# bin : b"NT" + u8 버전(1) + u8 필드 수 + 필드마다 (u8 길이 + UTF-8 바이트, 최대 255바이트)
+#       필드 순서는 DISPLAY_FIELDS 와 같고, 새 필드는 끝에만 추가 (구버전 기기는 앞쪽 필드만 읽음)
+DISPLAY_FIELDS = ("token", "name", "school", "year", "major", "email", "top")
+DISPLAY_VERSION = 1
+
+def _display_values(snap: _Snapshot, row_no: int) -> list[str]:
+    row = snap.resp_row(row_no)
+    field = lambda f: str(row.get(snap.schema.col(f), "")).strip() if snap.schema.col(f) else ""
+    clu_no = snap.index.clu_row(row_no)
+    token = snap.index.raw(row_no, "token") or field("token")   # 방금 발급/변경한 토큰은 인덱스에 먼저 반영됨
+    return [token, field("name"), field("school"), field("year"), field("major"), field("email"),
+            snap.recs.text(clu_no) if clu_no else ""]
+
+def _pack_display(values: list[str]) -> bytes:
+    out = bytearray(b"NT") + bytes((DISPLAY_VERSION, len(values)))
+    for v in values:
+        b = v.encode("utf-8")[:255].decode("utf-8", "ignore").encode("utf-8")   # 글자 중간에서 자르지 않기
+        out += bytes((len(b),)) + b
+    return bytes(out)
+
+def _display_page(snap: _Snapshot, key, row_no: int, fmt: str) -> _Page:
+    fp = _row_fingerprint(snap, row_no, snap.index.clu_row(row_no))
+    page = _PAGES.get(key, fp, _page_version(snap))
+    if page is not None:
+        return page
+    values = _display_values(snap, row_no)
+    if fmt == "bin":
+        body = _pack_display(values)
+    else:
+        body = json.dumps({"v": DISPLAY_VERSION, **dict(zip(DISPLAY_FIELDS, values))},
+                          ensure_ascii=False, separators=(",", ":"))
+    return _PAGES.put(key, _Page(fp, _page_version(snap), body))
+
+def _display_response(request: Request, page: _Page, fmt: str) -> Response:
+    """기기는 X-Display-Version(crc32) 을 저장해 두었다가 If-None-Match 로 보내면 바뀌지 않은 경우 304"""
+    headers = {
+        "ETag": f'"{page.etag}"',
+        "X-Display-Version": str(zlib.crc32(page.body)),
+        "Cache-Control": "no-cache",
+    }
+    inm = request.headers.get("if-none-match", "")
+    if inm:
+        tags = {t.strip().removeprefix("W/") for t in inm.split(",")}
+        if "*" in tags or headers["ETag"] in tags or headers["X-Display-Version"] in tags:
+            PAGE_CACHE.inc(result="not_modified")
+            return Response(status_code=304, headers=headers)
+    media = "application/octet-stream" if fmt == "bin" else "application/json; charset=utf-8"
+    return Response(page.body, media_type=media, headers=headers)
+
+def _display_fmt(request: Request, fmt: str | None) -> str:
+    if fmt is None:
+        fmt = "bin" if "application/octet-stream" in request.headers.get("accept", "") else "json"
+    if fmt not in ("json", "bin"):
+        raise HTTPException(400, "fmt 는 json 또는 bin 이어야 합니다.")
+    return fmt
+
+async def _display(request: Request, field: str, value: str, fmt: str | None) -> Response:
+    fmt = _display_fmt(request, fmt)
+    value = unquote(value)
+    snap = await _asnapshot()
+    key = ("display", field, value, fmt)
+    page = _PAGES.fresh(key, _page_version(snap))
+    if page is None:
+        if not snap.schema.col(field):
+            raise HTTPException(404, f"응답 시트에 {field} 컬럼이 없습니다.")
+        row_no = snap.index.lookup(field, value)
+        if not row_no:
+            raise HTTPException(404, f"'{value}'에 해당하는 사용자가 없습니다.")
+        page = _display_page(snap, key, row_no, fmt)
+    return _display_response(request, page, fmt)
+
+def _display_all(snap: _Snapshot) -> dict:
+    idx = snap.index
+    items = [{"v": DISPLAY_VERSION, **dict(zip(DISPLAY_FIELDS, _display_values(snap, row)))}
+             for row in sorted(idx.rows()) if idx.raw(row, "token")]
+    return {"version": snap.version, "items": items}
+
+@app.get("/display.json")
+async def display_all():
+    """토큰이 있는 전체 명찰 페이로드 (badge_render.py 일괄 렌더링용)"""
+    snap = await _asnapshot()
+    return JSONResponse(await run_in_threadpool(_display_all, snap))
+
+@app.get("/display/name/{name}", dependencies=[Depends(_limited("tap"))])
+async def display_by_name(request: Request, name: str, fmt: str | None = Query(None, description="json | bin")):
+    return await _display(request, "name", name, fmt)
+
+@app.get("/display/{token}", dependencies=[Depends(_limited("tap"))])
+async def display_by_token(request: Request, token: str, fmt: str | None = Query(None, description="json | bin")):
+    return await _display(request, "token", token, fmt)
+
+# ----- 프로비저닝: 공통 -----
+PROVISION_CHUNK = int(os.getenv("PROVISION_CHUNK", "1500"))     # batch_update 1회당 최대 range 수
+PROVISION_MAX_BATCH = int(os.getenv("PROVISION_MAX_BATCH", "5000"))
+
+class _ProvisionError(Exception):
+    def __init__(self, status: int, detail: str):
+        super().__init__(detail)
+        self.status, self.detail = status, detail
+
+def _provision_cols() -> _Schema:
+    """uid/url/assigned_at 컬럼 보장 (스냅샷 스키마로 확인, 없을 때만 헤더 읽기)"""
+    if not _snapshot().schema.col("token"):
+        raise HTTPException(404, "token column missing. 먼저 /admin/generate-tokens 실행")
+    return _require_cols(["uid","url","assigned_at"])
 
-    name_col_resp = _find_col(df_resp, ["이름","성명","Name","Full Name","이름(실명)"])
-    person_name = str(row.get(name_col_resp, ""))
-    name_norm = _norm(person_name)
+class _Provisioner:
+    """
+    스냅샷 인덱스 위에서 assign / remap / clear 를 메모리로 계산해 셀 쓰기를 모으고,
+    commit() 에서 batch_update 한 번(PROVISION_CHUNK 단위 청크)으로 반영한다.
+    커밋 전 변경은 self.uids 오버레이로 보므로 한 배치 안의 항목끼리도 일관된다.
+    """
+    def __init__(self, idx: _SheetIndex, schema: _Schema, base_url: str):
+        self.idx, self.schema, self.base_url = idx, schema, base_url
+        self.now_iso = datetime.now(timezone.utc).isoformat()
+        self.updates = []
+        self.uids: dict[int, str] = {}        # row → 이번 작업에서 쓴 uid
+        self.uid_rows: dict[str, int | None] = {}
+        self.taken: list[int] = []            # _FREE_TOKENS 에서 예약한 행
+
+    def _uid_at(self, row: int) -> str:
+        return self.uids[row] if row in self.uids else self.idx.raw(row, "uid")
+
+    def _row_of(self, uid: str) -> int | None:
+        if uid in self.uid_rows:
+            return self.uid_rows[uid]
+        row = self.idx.lookup("uid", uid)
+        return row if row and row not in self.uids else None
+
+    def _cells(self, row: int, **values):
+        for name, v in values.items():
+            self.updates.append({"range": self.schema.a1(name, row), "values": [[v]]})
+
+    def _bind(self, row: int, uid: str):
+        old = self._uid_at(row)
+        if old:
+            self.uid_rows[old.upper()] = None
+        self.uids[row] = uid
+        if uid:
+            self.uid_rows[uid] = row
+
+    def _take_free(self) -> int | None:
+        # 미사용 토큰(토큰O + uid 비어있음): 풀에서 O(1)로 예약
+        row = _FREE_TOKENS.take(self.idx)
+        if row:
+            self.taken.append(row)
+        return row
+
+    def assign(self, uid: str) -> dict:
+        # 1) 같은 UID가 있으면 재사용
+        row = self._row_of(uid)
+        token = self.idx.raw(row, "token") if row else None
+        if row and token:
+            url = _construct_profile_url(self.base_url, token)
+            self._cells(row, url=url, assigned_at=self.now_iso)
+            return {"status":"ok","uid":uid,"token":token,"url":url,"reused":True}
+
+        # 2) 미사용 토큰
+        row = self._take_free()
+        if not row:
+            raise _ProvisionError(409, "no unused token available")
+
+        # 3) 쓰기
+        token = self.idx.raw(row, "token")
+        url = _construct_profile_url(self.base_url, token)
+        self._cells(row, uid=uid, url=url, assigned_at=self.now_iso)
+        self._bind(row, uid)
+        return {"status":"ok","uid":uid,"token":token,"url":url,"reused":False}
+
+    def clear(self, uid: str) -> dict:
+        row = self._row_of(uid)
+        if not row:
+            return {"status":"ok","message":"nothing to clear"}
+        self._cells(row, uid="", url="", assigned_at="")
+        self._bind(row, "")
+        return {"status":"ok","cleared_uid": uid}
 
-    # 추천 산업군
-    top_industries = ""
-    if not df_clu.empty:
-        name_col_clu = _find_col(df_clu, ["이름","성명","Name","Full Name","이름(실명)"])
-        if name_col_clu:
-            df_clu["_name_norm"] = df_clu[name_col_clu].astype(str).apply(_norm)
-            clu_match = df_clu[df_clu["_name_norm"] == name_norm]
-            if not clu_match.empty:
-                clu = clu_match.iloc[0]
-                top_industries = _pick_top_industries(df_clu, clu)
-
-    return templates.TemplateResponse("profile.html", {
-        "request": request,
-        "user": {
-            "name":   person_name,
-            "school": row.get("학교", row.get("School", "")),
-            "year":   row.get("학년", row.get("Year", "")),
-            "major":  row.get("전공", row.get("Major", "")),
-            "email":  row.get("이메일 주소", row.get("이메일", row.get("Email", ""))),
-            "top_industries": top_industries,
-            "token": token,
-        }
-    })
+    def remap(self, uid: str, token: str) -> dict:
+        if not token:
+            raise _ProvisionError(400, "token is required for remap")
+        # 토큰 존재 행
+        row_token = self.idx.lookup("token", token)
+        if not row_token:
+            raise _ProvisionError(404, f"token not found: {token}")
+
+        result = {"status":"ok","uid":uid,"token":token}
+        # 토큰이 다른 UID에 묶여 있었다면 알려줌 (덮어씀)
+        prev = self._uid_at(row_token)
+        if prev and prev.upper() != uid:
+            result["replaced_uid"] = prev
+
+        # 기존 UID가 다른 행에 묶여있으면 비움
+        row_uid = self._row_of(uid)
+        if row_uid and row_uid != row_token:
+            self._cells(row_uid, uid="", url="", assigned_at="")
+            self._bind(row_uid, "")
+
+        # 토큰 행에 UID/URL/시간 기록
+        url = _construct_profile_url(self.base_url, token)
+        self._cells(row_token, uid=uid, url=url, assigned_at=self.now_iso)
+        self._bind(row_token, uid)
+        result.update({"url": url, "remapped": True})
+        return result
+
+    def commit(self, ws):
+        try:
+            for i in range(0, len(self.updates), PROVISION_CHUNK):
+                ws.batch_update(self.updates[i:i+PROVISION_CHUNK])
+        except Exception:
+            _SNAPSHOTS.invalidate()           # 일부만 반영됐을 수 있으므로 시트에서 다시 읽기
+            self.abort()
+            raise
+        for row, uid in self.uids.items():
+            _SNAPSHOTS.patch(row, uid=uid)
+        _FREE_TOKENS.done(self.taken)
+        self.taken = []
+
+    def abort(self):
+        if self.taken:
+            _FREE_TOKENS.release(self.taken)
+            self.taken = []
+
+def _run_single(fn, *args):
+    try:
+        return fn(*args)
+    except _ProvisionError as e:
+        raise HTTPException(e.status, e.detail)
 
 # ----- 프로비저닝: assign -----
-@app.post("/admin/provision/assign")
-def provision_assign(
+@app.post("/admin/provision/assign", dependencies=[Depends(_limited("admin"))])
+async def provision_assign(
     request: Request,
     key: str = Query(..., description="관리자 키"),
     payload: dict = Body(..., example={"uid": "04AABBCCDD", "base_url": ""})
@@ -385,73 +1624,27 @@ def provision_assign(
         raise HTTPException(400, "uid is required")
 
     base_url = payload.get("base_url") or str(request.base_url)
-    ws = ws_responses
+    return await _io(_assign_uid, uid, base_url)
 
-    # 필요한 컬럼 보장
-    col_uid = _ensure_cols(ws, ws.row_values(1), ["uid"])["uid"]
-    header = [h.strip() for h in ws.row_values(1)]
-    token_col_name = next((c for c in ("token","Token","토큰") if c in header), None)
-    if not token_col_name:
-        raise HTTPException(404, "token column missing. 먼저 /admin/generate-tokens 실행")
-    col_token = header.index(token_col_name) + 1
-    more = _ensure_cols(ws, header, ["url","assigned_at"])
-    col_url, col_assigned_at = more["url"], more["assigned_at"]
+def _assign_uid(uid: str, base_url: str):
+    ws = ws_responses
+    schema = _provision_cols()
 
-    # 전체 읽기 1회
-    matrix = ws.get_all_values()
-    if not matrix:
+    # 스냅샷 인덱스로 조회 (시트 전체 읽기 없음)
+    idx = _snapshot().index
+    if not idx.rows():
         raise HTTPException(409, "no data")
-    header = [h.strip() for h in matrix[0]]
-    rows = matrix[1:]
-
-    idx_uid = header.index("uid") if "uid" in header else None
-    idx_token = header.index(token_col_name)
-
-    def _safe(row, idx):
-        return row[idx] if idx is not None and idx < len(row) else ""
-
-    # 1) 같은 UID가 있으면 재사용
-    reuse_row_1b, reuse_token = None, None
-    if idx_uid is not None:
-        for i, row in enumerate(rows, start=2):
-            if (_safe(row, idx_uid) or "").strip().upper() == uid:
-                reuse_row_1b = i
-                reuse_token = (_safe(row, idx_token) or "").strip()
-                break
-    if reuse_row_1b and reuse_token:
-        url = _construct_profile_url(base_url, reuse_token)
-        now_iso = datetime.now(timezone.utc).isoformat()
-        ws.batch_update([
-            {"range": f"{_col_letter(col_url)}{reuse_row_1b}",         "values": [[url]]},
-            {"range": f"{_col_letter(col_assigned_at)}{reuse_row_1b}", "values": [[now_iso]]},
-        ])
-        return {"status":"ok","uid":uid,"token":reuse_token,"url":url,"reused":True}
-
-    # 2) 미사용 토큰(토큰O + uid 비어있음)
-    candidate_row_1b, token_val = None, None
-    for i, row in enumerate(rows, start=2):
-        tok = (_safe(row, idx_token) or "").strip()
-        u   = (_safe(row, idx_uid) or "").strip() if idx_uid is not None else ""
-        if tok and not u:
-            candidate_row_1b = i
-            token_val = tok
-            break
-    if not candidate_row_1b:
-        raise HTTPException(409, "no unused token available")
-
-    # 3) 쓰기
-    url = _construct_profile_url(base_url, token_val)
-    now_iso = datetime.now(timezone.utc).isoformat()
-    ws.batch_update([
-        {"range": f"{_col_letter(col_uid)}{candidate_row_1b}",         "values": [[uid]]},
-        {"range": f"{_col_letter(col_url)}{candidate_row_1b}",         "values": [[url]]},
-        {"range": f"{_col_letter(col_assigned_at)}{candidate_row_1b}", "values": [[now_iso]]},
-    ])
-    return {"status":"ok","uid":uid,"token":token_val,"url":url,"reused":False}
+    p = _Provisioner(idx, schema, base_url)
+    try:
+        result = _run_single(p.assign, uid)
+        p.commit(ws)
+    finally:
+        p.abort()                             # 커밋되지 않은 예약은 풀로 반환
+    return result
 
 # ----- 프로비저닝: remap -----
-@app.post("/admin/provision/remap")
-def provision_remap(
+@app.post("/admin/provision/remap", dependencies=[Depends(_limited("admin"))])
+async def provision_remap(
     request: Request,
     key: str = Query(..., description="관리자 키"),
     payload: dict = Body(..., example={"uid":"04AABBCCDD","token":"XYZ...","clear":False,"base_url":""})
@@ -465,153 +1658,347 @@ def provision_remap(
     base_url = payload.get("base_url") or str(request.base_url)
     if not uid:
         raise HTTPException(400, "uid is required")
+    return await _io(_remap_uid, uid, token, clear, base_url)
 
+def _remap_uid(uid: str, token: str, clear: bool, base_url: str):
     ws = ws_responses
-    col_uid = _ensure_cols(ws, ws.row_values(1), ["uid"])["uid"]
-    header = [h.strip() for h in ws.row_values(1)]
-    token_col_name = next((c for c in ("token","Token","토큰") if c in header), None)
-    if not token_col_name:
-        raise HTTPException(404, "token column missing. 먼저 /admin/generate-tokens 실행")
-    col_token = header.index(token_col_name) + 1
-    more = _ensure_cols(ws, header, ["url","assigned_at"])
-    col_url, col_assigned_at = more["url"], more["assigned_at"]
-
-    # 전체 읽기 1회
-    matrix = ws.get_all_values()
-    header = [h.strip() for h in matrix[0]]
-    rows = matrix[1:]
-    idx_uid = header.index("uid") if "uid" in header else None
-    idx_token = header.index(token_col_name)
-
-    def _safe(row, idx):
-        return row[idx] if idx is not None and idx < len(row) else ""
-
-    # 현재 UID 걸린 행
-    row_idx_uid = None
-    if idx_uid is not None:
-        for i, row in enumerate(rows, start=2):
-            if (_safe(row, idx_uid) or "").strip().upper() == uid:
-                row_idx_uid = i
-                break
+    p = _Provisioner(_snapshot().index, _provision_cols(), base_url)
+    result = _run_single(p.clear, uid) if clear else _run_single(p.remap, uid, token)
+    result.pop("replaced_uid", None)          # 단건 응답 형식은 기존과 동일하게 유지
+    p.commit(ws)
+    return result
 
-    if clear:
-        if not row_idx_uid:
-            return {"status":"ok","message":"nothing to clear"}
-        ws.batch_update([
-            {"range": f"{_col_letter(col_uid)}{row_idx_uid}", "values": [[""]]},
-            {"range": f"{_col_letter(col_url)}{row_idx_uid}", "values": [[""]]},
-            {"range": f"{_col_letter(col_assigned_at)}{row_idx_uid}", "values": [[""]]},
-        ])
-        return {"status":"ok","cleared_uid": uid}
+# ----- 프로비저닝: 일괄 (assign-batch / remap-batch) -----
+_TRUE = {"1","true","yes","y","on"}
+
+async def _batch_items(request: Request, fields: list[str]) -> tuple[list[dict], str]:
+    """
+    JSON: {"uids": [...]} 또는 {"items": [{"uid":..,"token":..,"clear":..}], "base_url": ""}
+    CSV (Content-Type: text/csv): 헤더 행(uid,token,clear) 선택, 본문은 스트리밍으로 읽음
+    """
+    ctype = request.headers.get("content-type", "")
+    base_url = request.query_params.get("base_url", "")
+    items = []
+    if "csv" in ctype or ctype.startswith("text/plain"):
+        decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        header, buf = None, ""
+
+        def take(line: str):
+            nonlocal header
+            if not line.strip():
+                return
+            cells = next(csv.reader([line]))
+            if header is None and cells and cells[0].strip().lower() == "uid":
+                header = [c.strip().lower() for c in cells]
+                return
+            names = header or fields
+            items.append({n: (cells[i].strip() if i < len(cells) else "") for i, n in enumerate(names)})
+
+        async for chunk in request.stream():
+            buf += decoder.decode(chunk)
+            *lines, buf = buf.split("\n")
+            for line in lines:
+                take(line.rstrip("\r"))
+            if len(items) > PROVISION_MAX_BATCH:
+                break
+        take(buf + decoder.decode(b"", final=True))
+    else:
+        try:
+            body = await request.json()
+        except ValueError:
+            raise HTTPException(400, "JSON 또는 text/csv 본문이 필요합니다.")
+        if isinstance(body, list):
+            body = {"items": body}
+        if not isinstance(body, dict):
+            raise HTTPException(400, "JSON 본문은 목록 또는 items/uids 를 담은 객체여야 합니다.")
+        base_url = base_url or body.get("base_url", "")
+        raw = body.get("items") or body.get("uids") or []
+        if not isinstance(raw, list):
+            raise HTTPException(400, "items / uids 는 목록이어야 합니다.")
+        items = [r if isinstance(r, dict) else {"uid": str(r)} for r in raw]
+    if len(items) > PROVISION_MAX_BATCH:
+        raise HTTPException(413, f"한 번에 최대 {PROVISION_MAX_BATCH}건까지 처리합니다.")
+    return items, base_url or str(request.base_url)
+
+def _run_batch(items: list[dict], base_url: str, op: str) -> dict:
+    ws = ws_responses
+    p = _Provisioner(_snapshot().index, _provision_cols(), base_url)
+    try:
+        return _plan_batch(p, items, op, ws)
+    finally:
+        p.abort()
+
+def _plan_batch(p: _Provisioner, items: list[dict], op: str, ws) -> dict:
+    results, seen = [], set()
+    for item in items:
+        uid = _normalize_uid(str(item.get("uid", "")))
+        if not uid:
+            results.append({"status":"error","uid":item.get("uid",""),"error":"uid is required"})
+            continue
+        if uid in seen:
+            results.append({"status":"conflict","uid":uid,"error":"duplicate uid in batch"})
+            continue
+        seen.add(uid)
+        try:
+            if op == "assign":
+                results.append(p.assign(uid))
+            elif str(item.get("clear", "")).strip().lower() in _TRUE or item.get("clear") is True:
+                results.append(p.clear(uid))
+            else:
+                results.append(p.remap(uid, str(item.get("token") or "").strip()))
+        except _ProvisionError as e:
+            status = "conflict" if e.status == 409 else "error"
+            results.append({"status":status,"uid":uid,"error":e.detail})
+    p.commit(ws)                               # 쓰기 1회(청크)
+    ok = sum(r["status"] == "ok" for r in results)
+    conflicts = [r for r in results if r["status"] == "conflict" or r.get("replaced_uid")]
+    return {"status":"ok","total":len(results),"ok":ok,"failed":len(results)-ok,
+            "conflicts":conflicts,"writes":len(p.updates),"results":results}
+
+@app.post("/admin/provision/assign-batch", dependencies=[Depends(_limited("admin"))])
+async def provision_assign_batch(request: Request, key: str = Query(..., description="관리자 키")):
+    if key != ADMIN_KEY:
+        raise HTTPException(403, "forbidden")
+    items, base_url = await _batch_items(request, ["uid"])
+    return await _io(_bulk, _run_batch, items, base_url, "assign")
 
-    if not token:
-        raise HTTPException(400, "token is required for remap")
-
-    # 토큰 존재 행
-    row_idx_token = None
-    for i, row in enumerate(rows, start=2):
-        if (_safe(row, idx_token) or "").strip() == token:
-            row_idx_token = i
-            break
-    if not row_idx_token:
-        raise HTTPException(404, f"token not found: {token}")
-
-    # 기존 UID가 다른 행에 묶여있으면 비움
-    if row_idx_uid and row_idx_uid != row_idx_token:
-        ws.batch_update([
-            {"range": f"{_col_letter(col_uid)}{row_idx_uid}", "values": [[""]]},
-            {"range": f"{_col_letter(col_url)}{row_idx_uid}", "values": [[""]]},
-            {"range": f"{_col_letter(col_assigned_at)}{row_idx_uid}", "values": [[""]]},
-        ])
-
-    # 토큰 행에 UID/URL/시간 기록
-    url = _construct_profile_url(base_url, token)
-    now_iso = datetime.now(timezone.utc).isoformat()
-    ws.batch_update([
-        {"range": f"{_col_letter(col_uid)}{row_idx_token}", "values": [[uid]]},
-        {"range": f"{_col_letter(col_url)}{row_idx_token}", "values": [[url]]},
-        {"range": f"{_col_letter(col_assigned_at)}{row_idx_token}", "values": [[now_iso]]},
-    ])
-    return {"status":"ok","uid":uid,"token":token,"url":url,"remapped":True}
+@app.post("/admin/provision/remap-batch", dependencies=[Depends(_limited("admin"))])
+async def provision_remap_batch(request: Request, key: str = Query(..., description="관리자 키")):
+    if key != ADMIN_KEY:
+        raise HTTPException(403, "forbidden")
+    items, base_url = await _batch_items(request, ["uid", "token", "clear"])
+    return await _io(_bulk, _run_batch, items, base_url, "remap")
 
 # ----- 스캔 기록: /u/{token}/touch -----
 class TouchPayload(BaseModel):
     source: str | None = None
     campaign: str | None = None
 
-@app.post("/u/{token}/touch")
-def touch_token(token: str, body: TouchPayload | None = None):
+@app.post("/u/{token}/touch", dependencies=[Depends(_limited("tap"))])
+async def touch_token(token: str, body: TouchPayload | None = None):
     token = unquote(token)
-    header, tokmap = _ensure_token_index(ws_responses)
-    if not tokmap:
+    snap = await _asnapshot()
+    idx = snap.index
+    if not snap.schema.col("token"):
         raise HTTPException(404, "토큰 인덱스가 비어있습니다. 먼저 토큰을 생성하세요.")
-    row = tokmap.get(_norm(token))
+    row = idx.lookup("token", token)
     if not row:
         raise HTTPException(404, "해당 토큰을 찾을 수 없습니다.")
 
-    needed = ["scan_count","last_seen_at"]
-    if body and body.source:   needed.append("source")
-    if body and body.campaign: needed.append("campaign")
-    col_idx = _ensure_cols(ws_responses, header, needed)
-
-    # Read 1회
-    col = _col_letter(col_idx["scan_count"])
-    rng = f"{col}{row}:{col}{row}"
-    vals = ws_responses.batch_get([rng]) or [["0"]]
-    try:
-        cur = int(str(vals[0][0][0]).strip() or "0")
-    except Exception:
-        cur = 0
-
-    # Write 1회
-    iso = datetime.now(timezone.utc).isoformat()
-    updates = [
-        {"range": f"{_col_letter(col_idx['scan_count'])}{row}", "values": [[str(cur+1)]]},
-        {"range": f"{_col_letter(col_idx['last_seen_at'])}{row}", "values": [[iso]]},
-    ]
-    if body and body.source:
-        updates.append({"range": f"{_col_letter(col_idx['source'])}{row}", "values": [[body.source[:64]]]})
-    if body and body.campaign:
-        updates.append({"range": f"{_col_letter(col_idx['campaign'])}{row}", "values": [[body.campaign[:64]]]})
-    ws_responses.batch_update(updates)
-
-    return {"status":"ok","row":row,"scan_count":cur+1,"last_seen_at":iso}
+    # 시트에는 바로 쓰지 않고 버퍼에 누적 (주기적으로 일괄 반영), 이벤트 로그/통계에는 건마다 기록
+    now = time.time()
+    iso = datetime.fromtimestamp(now, timezone.utc).isoformat()
+    canonical = idx.raw(row, "token")
+    source = (body.source or "")[:64] if body else None
+    campaign = (body.campaign or "")[:64] if body else None
+    count = _TOUCHES.add(row, canonical, iso, source=source, campaign=campaign)
+    _record_tap(now, canonical, source, campaign)
+    return {"status":"ok","row":row,"scan_count":count,"last_seen_at":iso}
+
+# ----- 관리자: 스캔 통계 (메모리 집계만 사용, 시트 호출 없음) -----
+@app.get("/admin/stats")
+async def admin_stats(
+    key: str = Query(..., description="관리자 키"),
+    window: int = Query(3600, ge=60, description="조회 기간(초)"),
+    step: int = Query(60, ge=60, description="시계열 간격(초, 분 단위로 내림)"),
+    top: int = Query(10, ge=0, description="campaign/source/토큰 상위 개수(0=전부)"),
+):
+    if key != ADMIN_KEY:
+        raise HTTPException(403, "forbidden")
+    if window > TAPSTATS_WINDOW_SEC:
+        raise HTTPException(400, f"window 는 최대 {TAPSTATS_WINDOW_SEC}초(TAPSTATS_WINDOW_SEC)까지 조회할 수 있습니다.")
+    if window // step > 10000:
+        raise HTTPException(400, "시계열 구간이 너무 많습니다. step 을 늘려 주세요.")
+    result = _TAPSTATS.query(window, step, top)
+    result["total_since_start"] = _TAPSTATS.total
+    return JSONResponse(result)
 
 # ----- 관리자: 토큰 생성/보충 -----
-@app.post("/admin/generate-tokens")
-def admin_generate_tokens(
+@app.post("/admin/generate-tokens", dependencies=[Depends(_limited("admin"))])
+async def admin_generate_tokens(
     key: str = Query(..., description="ADMIN_KEY와 동일해야 함"),
     limit: int = Query(5, ge=0, description="샘플 개수(0=전부)")
 ):
     if key != ADMIN_KEY:
         raise HTTPException(403, "forbidden")
     try:
-        result = _ensure_token_column_and_fill(ws_responses)
+        result = await _io(_bulk, _fill_missing_tokens)
         sample = result["sample"] if limit == 0 else result["sample"][:limit]
         return JSONResponse({
             "status": "ok",
             "created": result["created"],
             "token_column": result["col_name"],
+            "ranges": result["ranges"],
             "sample": sample
         })
     except Exception as e:
         return JSONResponse({"status": "error", "error": str(e)}, status_code=500)
 
+# ----- 지표 -----
+def _snap_gauge(fn):
+    def read():
+        snap = _SNAPSHOTS.peek()
+        return fn(snap) if snap is not None else 0
+    return read
+
+def _outbox_depth():
+    if not getattr(store, "mirror_outbox", False):
+        return 0
+    with store.lock:
+        return store.db.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+def _sheets_queue_depth():
+    sheets = store if STORE_BACKEND == "gspread" else getattr(store, "mirror", None)
+    return sheets.sched.pending() if sheets is not None else 0
+
+REGISTRY.gauge("nfc_snapshot_age_seconds", "Age of the in-memory sheet snapshot",
+               fn=_snap_gauge(lambda s: round(time.time() - s.loaded_at, 3)))
+REGISTRY.gauge("nfc_snapshot_version", "Snapshot generation", fn=_snap_gauge(lambda s: s.version))
+REGISTRY.gauge("nfc_free_tokens", "Unassigned token rows in the pool", fn=_snap_gauge(lambda s: s.index.free_count()))
+REGISTRY.gauge("nfc_reserved_tokens", "Token rows reserved by in-flight provisioning", fn=lambda: _FREE_TOKENS.reserved())
+REGISTRY.gauge("nfc_touch_queue_depth", "Buffered touch events not yet flushed to storage", fn=lambda: _TOUCHES.depth())
+REGISTRY.gauge("nfc_store_outbox_depth", "SQLite writes waiting to be mirrored to Sheets", fn=_outbox_depth)
+REGISTRY.gauge("nfc_sheets_queue_depth", "Sheets calls waiting for rate-limit budget", fn=_sheets_queue_depth)
+REGISTRY.gauge("nfc_page_cache_entries", "Rendered pages held in memory", fn=lambda: len(_PAGES._d))
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 # ----- 디버그 -----
 @app.get("/debug/columns")
-def debug_columns():
+async def debug_columns():
+    snap = await _asnapshot()
     return {
-        "resp_cols": _read_ws(ws_responses).columns.tolist(),
-        "clu_cols":  _read_ws(ws_cluster).columns.tolist()
+        "resp_cols": snap.resp.columns.tolist(),
+        "clu_cols":  snap.clu.columns.tolist(),
+        "snapshot_version": snap.version,
+        "snapshot_age_sec": round(time.time() - snap.loaded_at, 1),
+        "free_tokens": snap.index.free_count(),
     }
 
+# ----- 내보내기 (스냅샷에서 청크 단위 스트리밍) -----
+EXPORT_CHUNK = int(os.getenv("EXPORT_CHUNK", "500"))            # 한 번에 직렬화할 행 수
+
+def _export_slice(snap: _Snapshot, cols: str | None, since: int, offset: int, limit: int):
+    """
+    cols:   쉼표로 구분한 컬럼 이름 (없으면 전체)
+    since:  이 시트 행 번호 이후의 행만 (새 응답만 가져올 때; 응답 헤더 X-Next-Since 로 다음 값 전달)
+    offset/limit: since 적용 뒤 페이지 나누기 (limit=0 이면 끝까지)
+    """
+    df = snap.resp
+    columns = df.columns.tolist()
+    if cols:
+        want = [c.strip() for c in cols.split(",") if c.strip()]
+        missing = [c for c in want if c not in columns]
+        if missing:
+            raise HTTPException(400, f"unknown columns: {missing}")
+        columns = want
+    start = max(since - 1, 0) + offset             # 데이터 행 위치 i ↔ 시트 행 i+2
+    stop = len(df) if limit <= 0 else min(len(df), start + limit)
+    start = min(start, stop)
+    return df, columns, start, stop
+
+def _export_headers(start: int, stop: int, total: int) -> dict:
+    return {"X-Total-Rows": str(total), "X-Next-Since": str(stop + 1), "Cache-Control": "no-cache"}
+
+def _iter_chunks(df: pd.DataFrame, columns, start: int, stop: int):
+    for i in range(start, stop, EXPORT_CHUNK):
+        yield df.iloc[i:min(i + EXPORT_CHUNK, stop)][columns]
+
+def _gzip_stream(chunks):
+    z = zlib.compressobj(6, zlib.DEFLATED, 31)     # wbits=31 → gzip 컨테이너
+    for c in chunks:
+        out = z.compress(c)
+        if out:
+            yield out
+    yield z.flush()
+
+def _stream(request: Request, chunks, media_type: str, headers: dict) -> StreamingResponse:
+    headers = dict(headers, Vary="Accept-Encoding")
+    if _accept_encoding(request) != "identity":    # 스트림은 gzip 만 (br 지원 클라이언트도 gzip 은 받음)
+        headers["Content-Encoding"] = "gzip"
+        chunks = _gzip_stream(chunks)
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
+
+def _json_chunks(df, columns, start, stop, ndjson: bool):
+    first = True
+    if not ndjson:
+        yield b"["
+    for part in _iter_chunks(df, columns, start, stop):
+        lines = [json.dumps(r, ensure_ascii=False, default=str) for r in part.to_dict(orient="records")]
+        if not lines:
+            continue
+        if ndjson:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+        else:
+            yield (("" if first else ",") + ",".join(lines)).encode("utf-8")
+        first = False
+    if not ndjson:
+        yield b"]"
+
+def _csv_chunks(df, columns, start, stop):
+    header = True
+    for part in _iter_chunks(df, columns, start, stop):
+        yield part.to_csv(index=False, header=header).encode("utf-8")
+        header = False
+    if header:                                     # 데이터가 없어도 헤더 행은 내보냄
+        yield (",".join(columns) + "\n").encode("utf-8")
+
 @app.get("/users.json")
-def users_json():
-    return JSONResponse(_read_ws(ws_responses).to_dict(orient="records"))
+async def users_json(
+    request: Request,
+    format: str = Query("array", pattern="^(array|ndjson)$", description="array=JSON 배열, ndjson=줄 단위"),
+    cols: str | None = Query(None, description="쉼표 구분 컬럼 선택"),
+    since: int = Query(0, ge=0, description="이 시트 행 번호 이후만"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(0, ge=0, description="0=전부"),
+):
+    snap = await _asnapshot()
+    df, columns, start, stop = _export_slice(snap, cols, since, offset, limit)
+    ndjson = format == "ndjson"
+    return _stream(request, _json_chunks(df, columns, start, stop, ndjson),
+                   "application/x-ndjson" if ndjson else "application/json",
+                   _export_headers(start, stop, len(df)))
+
+@app.get("/users.ndjson")
+async def users_ndjson(request: Request, cols: str | None = None,
+                       since: int = Query(0, ge=0), offset: int = Query(0, ge=0), limit: int = Query(0, ge=0)):
+    return await users_json(request, "ndjson", cols, since, offset, limit)
 
 @app.get("/users.csv", response_class=PlainTextResponse)
-def users_csv():
-    return PlainTextResponse(_read_ws(ws_responses).to_csv(index=False))
+async def users_csv(
+    request: Request,
+    cols: str | None = Query(None, description="쉼표 구분 컬럼 선택"),
+    since: int = Query(0, ge=0, description="이 시트 행 번호 이후만"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(0, ge=0, description="0=전부"),
+):
+    snap = await _asnapshot()
+    df, columns, start, stop = _export_slice(snap, cols, since, offset, limit)
+    return _stream(request, _csv_chunks(df, columns, start, stop),
+                   "text/csv; charset=utf-8", _export_headers(start, stop, len(df)))
+
+# ----- 추천 산업군 일괄 조회 -----
+def _recommendations(snap: _Snapshot, k: int | None, ranked: bool) -> dict:
+    idx, recs = snap.index, snap.recs
+    items = []
+    for row in sorted(idx.rows()):
+        clu_no = idx.clu_row(row)
+        item = {"row": row, "name": idx.raw(row, "name"), "token": idx.raw(row, "token"),
+                "top_industries": recs.text(clu_no, k) if clu_no else ""}
+        if ranked:
+            item["ranked"] = recs.ranked(clu_no) if clu_no else []
+        items.append(item)
+    return {"version": snap.version, "k": k or recs.k, "industries": recs.names, "items": items}
+
+@app.get("/recommendations.json")
+async def recommendations_json(
+    k: int | None = Query(None, ge=1, description=f"점수형 상위 개수 (기본 {RECOMMEND_TOP_K})"),
+    ranked: bool = Query(False, description="점수 순위 전체 포함"),
+):
+    snap = await _asnapshot()
+    return JSONResponse(await run_in_threadpool(_recommendations, snap, k, ranked))
 
 # ----- 실행 -----
 if __name__ == "__main__":
@@ -0,0 +1,599 @@
+# storage.py  (nfc_server 저장소 백엔드: Google Sheets / 로컬 SQLite)
+#
+# nfc_server 는 워크시트를 아래 Table 인터페이스로만 다룬다.
+#   - 읽기:   get_all_values(), row_values(n), batch_get([A1,...])
+#   - 조회:   lookup("token" | "uid" | "name", 값) → 시트 행 번호
+#   - 쓰기:   batch_update([{"range": A1, "values": [[..]]}, ...]), update(A1, values)
+#   - 컬럼:   ensure_cols(["uid", ...]) → {이름: 1-based 인덱스}
+# 셀 주소는 두 백엔드 모두 시트와 같은 A1 표기를 쓴다(행 1 = 헤더).
+# Google Sheets 호출은 모두 SheetsScheduler(할당량 토큰 버킷 + 재시도 + 쓰기 병합)를 거친다.
+import contextvars, heapq, itertools, json, random, re, sqlite3, threading, time
+from contextlib import contextmanager
+
+STORE_BACKENDS = {}          # 이름 → factory(**opts) ; open_store() 가 사용
+
+def register_backend(name: str, factory):
+    STORE_BACKENDS[name] = factory
+
+def _default_norm(field: str, value: str) -> str:
+    value = (value or "").strip()
+    return value.upper() if field == "uid" else value.lower()
+
+def _col_index(letters: str) -> int:
+    n = 0
+    for ch in letters.upper():
+        n = n * 26 + (ord(ch) - 64)
+    return n
+
+_A1_RE = re.compile(r"^([A-Za-z]*)(\d*)$")
+
+def a1_to_grid(rng: str):
+    """'C5' / 'C5:D9' / '1:1' / 'C:C' → (r0, c0, r1, c1), 1-based 포함 범위. 열린 끝은 None."""
+    rng = rng.split("!")[-1]
+    parts = rng.split(":")
+    cells = []
+    for p in parts:
+        m = _A1_RE.match(p.strip())
+        if not m:
+            raise ValueError(f"bad A1 range: {rng}")
+        col, row = m.groups()
+        cells.append((int(row) if row else None, _col_index(col) if col else None))
+    (r0, c0), (r1, c1) = cells[0], cells[-1]
+    return r0, c0, r1, c1
+
+
+class Table:
+    """워크시트 1개. 백엔드별로 아래 메서드를 구현한다."""
+    title = ""
+    key_cols = {"token": ["token", "Token", "토큰"], "uid": ["uid"], "name": ["이름", "성명", "Name"]}
+    norm = staticmethod(_default_norm)
+
+    def get_all_values(self) -> list[list[str]]:
+        raise NotImplementedError
+
+    def row_values(self, row: int) -> list[str]:
+        raise NotImplementedError
+
+    def batch_get(self, ranges: list[str]) -> list[list[list[str]]]:
+        raise NotImplementedError
+
+    def batch_update(self, data: list[dict], value_input_option: str = "RAW"):
+        raise NotImplementedError
+
+    def update(self, rng: str, values, value_input_option: str = "RAW"):
+        return self.batch_update([{"range": rng, "values": values}], value_input_option=value_input_option)
+
+    def lookup(self, field: str, value: str) -> int | None:
+        raise NotImplementedError
+
+    def ensure_cols(self, names, header=None) -> dict[str, int]:
+        """names 컬럼을 헤더 끝에 보장하고 1-based 인덱스 dict 반환"""
+        header = [h.strip() for h in (header if header is not None else self.row_values(1))]
+        missing = [n for n in names if n not in header]
+        if missing:
+            header += missing
+            self.update("1:1", [header])
+        return {n: header.index(n) + 1 for n in names}
+
+    def _key_positions(self, header) -> dict[str, int]:
+        header = [h.strip() for h in header]
+        pos = {}
+        for field, cands in self.key_cols.items():
+            col = next((c for c in cands if c in header), None)
+            if col:
+                pos[field] = header.index(col)
+        return pos
+
+
+# ===== Sheets 호출 스케줄러 =====
+READ, WRITE, BULK = 0, 1, 2      # 우선순위 (작을수록 먼저): 프로필 조회 > 스캔/단건 쓰기 > 관리자 대량 작업
+
+_PRIORITY: contextvars.ContextVar[int | None] = contextvars.ContextVar("sheets_priority", default=None)
+
+@contextmanager
+def priority(level: int):
+    """with priority(BULK): ... 안의 Sheets 호출은 지정한 우선순위로 줄을 선다."""
+    token = _PRIORITY.set(level)
+    try:
+        yield
+    finally:
+        _PRIORITY.reset(token)
+
+# 재시도마다 hook(table, op, attempt, error) 호출 (nfc_server 지표 등)
+RETRY_HOOKS: list = []
+
+class QuotaExceeded(Exception):
+    """429/5xx 가 재시도 한도까지 계속된 경우. retry_after 초 뒤에 다시 시도하라는 의미."""
+    def __init__(self, table: str, op: str, retry_after: float, cause: Exception):
+        super().__init__(f"{table} {op}: Sheets API 한도/오류 지속 ({cause!r})")
+        self.table, self.op, self.retry_after = table, op, retry_after
+
+def _http_status(err: Exception) -> int | None:
+    resp = getattr(err, "response", None)
+    status = getattr(resp, "status_code", None) or getattr(err, "code", None)
+    return status if isinstance(status, int) else None
+
+def _retry_after(err: Exception) -> float | None:
+    headers = getattr(getattr(err, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+def _clone(v):
+    """합쳐진 읽기 결과를 호출자마다 따로 쓰도록 리스트만 복사"""
+    return [_clone(x) for x in v] if isinstance(v, list) else v
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = self.error = None
+
+class _PendingWrite(_Flight):
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        super().__init__()
+        self.data = data
+
+class SheetsScheduler:
+    """
+    Sheets API 호출의 단일 관문.
+      - 토큰 버킷: 분당 할당량(per_min)에 맞춰 호출을 내보내고, 기다리는 호출은 우선순위 순으로 통과
+      - 429/5xx/연결 오류는 지수 백오프 + 지터로 재시도 (429 면 버킷을 비워 전체 속도도 낮춤)
+      - 같은 읽기(get_all_values/row_values/batch_get)가 동시에 오면 1회만 호출
+      - 같은 시트의 batch_update 는 토큰을 기다리는 동안 쌓인 것까지 1회 호출로 병합
+    호출자는 자기 스레드에서 기다린다(별도 디스패처 스레드 없음).
+    """
+    def __init__(self, per_min: float = 60, burst: int = 10, max_retries: int = 5,
+                 backoff_base: float = 1.0, backoff_max: float = 32.0):
+        self.rate = per_min / 60.0
+        self.capacity = max(1, burst)
+        self.max_retries = max_retries
+        self.backoff_base, self.backoff_max = backoff_base, backoff_max
+        self._tokens = float(self.capacity)
+        self._stamp = time.monotonic()
+        self._cv = threading.Condition()
+        self._waiting: list[tuple[int, int]] = []      # (우선순위, 순번) 힙
+        self._seq = itertools.count()
+        self._flock = threading.Lock()
+        self._reads: dict[tuple, _Flight] = {}
+        self._writes: dict[tuple, list[_PendingWrite]] = {}
+        self._sending: dict[tuple, threading.Lock] = {}  # 시트별 병합 쓰기는 순서대로 1개씩
+
+    # --- 토큰 버킷 ---
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def acquire(self, prio: int):
+        ticket = (prio, next(self._seq))
+        with self._cv:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    self._refill()
+                    head = self._waiting[0] == ticket
+                    if head and self._tokens >= 1:
+                        heapq.heappop(self._waiting)
+                        self._tokens -= 1
+                        self._cv.notify_all()
+                        return
+                    self._cv.wait((1 - self._tokens) / self.rate if head else None)
+            except BaseException:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cv.notify_all()
+                raise
+
+    def _throttle(self, seconds: float):
+        """429: 남은 버킷을 비워 seconds 동안 다른 호출도 새로 나가지 않게 한다."""
+        with self._cv:
+            self._refill()
+            self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+            self._cv.notify_all()
+
+    def pending(self) -> int:
+        return len(self._waiting)
+
+    # --- 재시도 ---
+    def _backoff(self, attempt: int, err: Exception) -> float:
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)) + random.uniform(0, self.backoff_base)
+        return max(delay, _retry_after(err) or 0)
+
+    def run(self, table: str, op: str, fn, prio: int | None = None):
+        prio = prio if prio is not None else _PRIORITY.get()
+        prio = READ if prio is None else prio
+        attempt = 0
+        while True:
+            self.acquire(prio)
+            try:
+                return fn()
+            except Exception as e:
+                status = _http_status(e)
+                if not (status == 429 or (status or 0) >= 500 or (status is None and isinstance(e, OSError))):
+                    raise
+                attempt += 1
+                delay = self._backoff(attempt, e)
+                if attempt > self.max_retries:
+                    raise QuotaExceeded(table, op, delay, e) from e
+                for hook in RETRY_HOOKS:
+                    hook(table, op, attempt, e)
+                if status == 429:
+                    self._throttle(delay)
+                time.sleep(delay)
+
+    # --- 읽기 합치기 ---
+    def read(self, table: str, op: str, fn, *args):
+        key = (table, op, repr(args))
+        with self._flock:
+            flight = self._reads.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._reads[key] = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return _clone(flight.result)
+        try:
+            flight.result = self.run(table, op, lambda: fn(*args))
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._flock:
+                self._reads.pop(key, None)
+            flight.done.set()
+
+    # --- 쓰기 병합 ---
+    def write(self, table: str, fn, data: list[dict], value_input_option: str):
+        """fn(data, value_input_option) 를 호출. 먼저 온 호출이 대표로 토큰을 기다리고,
+        토큰을 얻은 시점까지 같은 시트에 쌓인 쓰기를 순서대로 합쳐 한 번에 보낸다."""
+        key = (table, value_input_option)
+        me = _PendingWrite(data)
+        with self._flock:
+            queue = self._writes.setdefault(key, [])
+            queue.append(me)
+            leader = len(queue) == 1
+            sending = self._sending.setdefault(key, threading.Lock())
+        if not leader:
+            me.done.wait()
+            if me.error is not None:
+                raise me.error
+            return me.result
+
+        batch: list[_PendingWrite] = []
+        def send():
+            with sending:                               # 앞선 묶음이 끝난 뒤에 보내 쓰기 순서 유지
+                if not batch:                           # 첫 시도 때 대기열을 떼어 온다 (재시도는 같은 묶음)
+                    with self._flock:
+                        batch.extend(self._writes.pop(key))
+                return fn([d for w in batch for d in w.data], value_input_option)
+        prio = _PRIORITY.get()
+        try:
+            result = self.run(table, "batch_update", send, WRITE if prio is None else prio)
+        except BaseException as e:
+            if not batch:
+                with self._flock:
+                    batch.extend(self._writes.pop(key, []))
+            for w in batch:
+                w.error = e
+            raise
+        else:
+            for w in batch:
+                w.result = result
+            return result
+        finally:
+            for w in batch:
+                w.done.set()
+
+
+# ===== Google Sheets (gspread) =====
+class GspreadTable(Table):
+    def __init__(self, ws, sched: SheetsScheduler):
+        self.ws = ws
+        self.title = ws.title
+        self.sched = sched
+
+    def get_all_values(self):
+        return self.sched.read(self.title, "get_all_values", self.ws.get_all_values)
+
+    def row_values(self, row):
+        return self.sched.read(self.title, "row_values", self.ws.row_values, row)
+
+    def batch_get(self, ranges):
+        return self.sched.read(self.title, "batch_get", self.ws.batch_get, list(ranges))
+
+    def batch_update(self, data, value_input_option="RAW"):
+        if data:
+            return self.sched.write(self.title, self._send, list(data), value_input_option)
+
+    def _send(self, data, value_input_option):
+        return self.ws.batch_update(data, value_input_option=value_input_option)
+
+    def lookup(self, field, value):
+        # 시트에는 인덱스가 없으므로 전체 스캔 (nfc_server 는 스냅샷 인덱스를 우선 사용)
+        values = self.get_all_values()
+        pos = self._key_positions(values[0]) if values else {}
+        if field not in pos:
+            return None
+        key = self.norm(field, value)
+        for i, row in enumerate(values[1:], start=2):
+            p = pos[field]
+            if p < len(row) and row[p].strip() and self.norm(field, row[p]) == key:
+                return i
+        return None
+
+
+class GspreadStore:
+    """quota_per_min/burst/max_retries 는 SheetsScheduler 설정 (서비스 계정 1개당 1개)"""
+    def __init__(self, service_account_file: str, spread_url: str,
+                 quota_per_min: float = 60, burst: int = 10, max_retries: int = 5, **_):
+        import gspread
+        self.sched = SheetsScheduler(quota_per_min, burst, max_retries)
+        self.gc = gspread.service_account(filename=service_account_file)
+        self.sh = self.sched.run(spread_url, "open", lambda: self.gc.open_by_url(spread_url))
+        self._tables = {}
+
+    def table(self, name: str) -> GspreadTable:
+        if name not in self._tables:
+            ws = self.sched.run(name, "worksheet", lambda: self.sh.worksheet(name))
+            self._tables[name] = GspreadTable(ws, self.sched)
+        return self._tables[name]
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+# ===== 로컬 SQLite (WAL) =====
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rows (
+    sheet TEXT NOT NULL,
+    row   INTEGER NOT NULL,           -- 시트 행 번호(1 = 헤더)
+    data  TEXT NOT NULL,              -- JSON 배열 (셀 문자열)
+    PRIMARY KEY (sheet, row)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS lookup_keys (
+    sheet TEXT NOT NULL,
+    field TEXT NOT NULL,              -- token / uid / name
+    key   TEXT NOT NULL,              -- 정규화된 값
+    row   INTEGER NOT NULL,
+    PRIMARY KEY (sheet, field, key, row)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS lookup_keys_row ON lookup_keys (sheet, row);
+CREATE TABLE IF NOT EXISTS outbox (   -- 시트 미러로 보낼 쓰기 (SQLITE_MIRROR)
+    id    INTEGER PRIMARY KEY AUTOINCREMENT,
+    sheet TEXT NOT NULL,
+    rng   TEXT NOT NULL,
+    vals  TEXT NOT NULL
+);
+"""
+
+class SqliteTable(Table):
+    def __init__(self, store: "SqliteStore", name: str):
+        self.store = store
+        self.title = name
+
+    @property
+    def _db(self):
+        return self.store.db
+
+    def _rows(self, r0=None, r1=None) -> dict[int, list[str]]:
+        q, args = "SELECT row, data FROM rows WHERE sheet=?", [self.title]
+        if r0 is not None:
+            q += " AND row>=?"; args.append(r0)
+        if r1 is not None:
+            q += " AND row<=?"; args.append(r1)
+        return {r: json.loads(d) for r, d in self._db.execute(q, args)}
+
+    def get_all_values(self):
+        with self.store.lock:
+            rows = self._rows()
+        if not rows:
+            return []
+        width = max(len(v) for v in rows.values())
+        last = max(rows)
+        return [(rows.get(r, []) + [""] * width)[:width] for r in range(1, last + 1)]
+
+    def row_values(self, row):
+        with self.store.lock:
+            return self._rows(row, row).get(row, [])
+
+    def batch_get(self, ranges):
+        out = []
+        with self.store.lock:
+            for rng in ranges:
+                r0, c0, r1, c1 = a1_to_grid(rng)
+                rows = self._rows(r0, r1)
+                last = r1 or (max(rows) if rows else 0)
+                block = []
+                for r in range(r0 or 1, last + 1):
+                    cells = rows.get(r, [])
+                    block.append(cells[(c0 or 1) - 1: c1])
+                while block and not any(block[-1]):      # 시트처럼 뒤쪽 빈 행은 생략
+                    block.pop()
+                out.append(block)
+        return out
+
+    def batch_update(self, data, value_input_option="RAW"):
+        if not data:
+            return
+        with self.store.lock, self._db:
+            header = self._rows(1, 1).get(1, [])
+            touched = {}
+            for d in data:
+                r0, c0, _, _ = a1_to_grid(d["range"])
+                for i, vals in enumerate(d["values"]):
+                    r = (r0 or 1) + i
+                    if r not in touched:
+                        touched[r] = self._rows(r, r).get(r, [])
+                    cells = touched[r]
+                    for j, v in enumerate(vals):
+                        c = (c0 or 1) - 1 + j
+                        if len(cells) <= c:
+                            cells += [""] * (c + 1 - len(cells))
+                        cells[c] = "" if v is None else str(v)
+                if self.store.mirror_outbox:
+                    self._db.execute("INSERT INTO outbox (sheet, rng, vals) VALUES (?,?,?)",
+                                     (self.title, d["range"], json.dumps(d["values"], ensure_ascii=False)))
+            self._db.executemany(
+                "INSERT OR REPLACE INTO rows (sheet, row, data) VALUES (?,?,?)",
+                [(self.title, r, json.dumps(c, ensure_ascii=False)) for r, c in touched.items()])
+            if 1 in touched:                              # 헤더가 바뀌면 키 인덱스 전체 재구성
+                self._reindex_all()
+            else:
+                pos = self._key_positions(header)
+                for r, cells in touched.items():
+                    self._reindex_row(r, cells, pos)
+
+    def _reindex_row(self, r, cells, pos):
+        self._db.execute("DELETE FROM lookup_keys WHERE sheet=? AND row=?", (self.title, r))
+        keys = []
+        for field, p in pos.items():
+            v = cells[p].strip() if p < len(cells) else ""
+            if v:
+                keys.append((self.title, field, self.norm(field, v), r))
+        self._db.executemany("INSERT OR IGNORE INTO lookup_keys VALUES (?,?,?,?)", keys)
+
+    def _reindex_all(self):
+        self._db.execute("DELETE FROM lookup_keys WHERE sheet=?", (self.title,))
+        rows = self._rows()
+        pos = self._key_positions(rows.get(1, []))
+        for r, cells in rows.items():
+            if r > 1:
+                self._reindex_row(r, cells, pos)
+
+    def lookup(self, field, value):
+        with self.store.lock:
+            hit = self._db.execute(
+                "SELECT MIN(row) FROM lookup_keys WHERE sheet=? AND field=? AND key=?",
+                (self.title, field, self.norm(field, value))).fetchone()
+        return hit[0] if hit else None
+
+    def import_values(self, values: list[list[str]]):
+        """행렬 전체를 이 테이블 내용으로 교체 (시트/CSV 에서 가져오기)"""
+        with self.store.lock, self._db:
+            self._db.execute("DELETE FROM rows WHERE sheet=?", (self.title,))
+            self._db.executemany(
+                "INSERT INTO rows (sheet, row, data) VALUES (?,?,?)",
+                [(self.title, r, json.dumps([str(c) for c in cells], ensure_ascii=False))
+                 for r, cells in enumerate(values, start=1)])
+            self._reindex_all()
+
+    def is_empty(self) -> bool:
+        with self.store.lock:
+            return self._db.execute("SELECT 1 FROM rows WHERE sheet=? LIMIT 1", (self.title,)).fetchone() is None
+
+
+class SqliteStore:
+    """
+    로컬 SQLite 저장소. 자격 증명 없이 오프라인으로 서버를 돌리거나 부하 테스트할 때 사용.
+    mirror 를 주면 SQLite 를 원본으로 삼고 쓰기를 outbox 에 쌓아 주기적으로 시트에 반영한다.
+    """
+    def __init__(self, path: str, mirror: GspreadStore | None = None, mirror_sec: float = 10.0, **_):
+        self.path = path
+        self.lock = threading.RLock()
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+        self.db.isolation_level = ""      # 이후 `with self.db:` 로 트랜잭션
+        self.mirror = mirror
+        self.mirror_sec = mirror_sec
+        self.mirror_outbox = mirror is not None
+        self._tables = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def table(self, name: str) -> SqliteTable:
+        if name not in self._tables:
+            t = SqliteTable(self, name)
+            if self.mirror is not None and t.is_empty():   # 최초 1회 시트에서 시드
+                t.import_values(self.mirror.table(name).get_all_values())
+            self._tables[name] = t
+        return self._tables[name]
+
+    # --- 시트 미러 동기화 ---
+    def sync_once(self) -> int:
+        if self.mirror is None:
+            return 0
+        with self.lock:
+            pending = self.db.execute("SELECT id, sheet, rng, vals FROM outbox ORDER BY id").fetchall()
+        if not pending:
+            return 0
+        by_sheet = {}
+        for _id, sheet, rng, vals in pending:
+            by_sheet.setdefault(sheet, []).append({"range": rng, "values": json.loads(vals)})
+        with priority(BULK):                              # 미러 반영은 라이브 조회보다 뒤로
+            for sheet, data in by_sheet.items():
+                self.mirror.table(sheet).batch_update(data)   # 시트별 1회
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM outbox WHERE id<=?", (pending[-1][0],))
+        return len(pending)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.mirror_sec)
+            self._wake.clear()
+            try:
+                self.sync_once()
+            except Exception as e:
+                print(f"[storage] 시트 미러 동기화 실패(다음 주기에 재시도): {e!r}")
+
+    def start(self):
+        if self.mirror is None or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="sqlite-mirror", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+        try:
+            self.sync_once()
+        except Exception as e:
+            print(f"[storage] 종료 시 미러 동기화 실패(outbox 에 보존됨): {e!r}")
+
+
+def _open_sqlite(sqlite_path="nfc.sqlite3", mirror=False, mirror_sec=10.0, **opts):
+    sheets = GspreadStore(**opts) if mirror else None
+    return SqliteStore(sqlite_path, mirror=sheets, mirror_sec=mirror_sec)
+
+register_backend("gspread", GspreadStore)
+register_backend("sqlite", _open_sqlite)
+
+def open_store(backend: str, key_cols=None, norm=None, **opts):
+    """STORE_BACKEND 이름으로 저장소를 연다. key_cols/norm 은 lookup 키 정의."""
+    if backend not in STORE_BACKENDS:
+        raise ValueError(f"unknown STORE_BACKEND: {backend} (choices: {sorted(STORE_BACKENDS)})")
+    if key_cols is not None:
+        Table.key_cols = key_cols
+    if norm is not None:
+        Table.norm = staticmethod(norm)
+    return STORE_BACKENDS[backend](**opts)
+
+
+# ----- 오프라인 시드: python storage.py import nfc.sqlite3 "설문지 응답 시트" responses.csv -----
+if __name__ == "__main__":
+    import csv, sys
+    if len(sys.argv) != 5 or sys.argv[1] != "import":
+        print('usage: python storage.py import <db.sqlite3> "<시트 이름>" <file.csv>')
+        sys.exit(2)
+    _, _, db_path, sheet_name, csv_path = sys.argv
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        matrix = list(csv.reader(f))
+    st = SqliteStore(db_path)
+    st.table(sheet_name).import_values(matrix)
+    print(f"{sheet_name}: {len(matrix)}행 가져옴 → {db_path}")
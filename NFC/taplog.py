@@ -0,0 +1,281 @@
+# taplog.py  (NFC 스캔 이벤트 로그 + 메모리 집계)
+#
+#   log = TapLog("taplog", segment_bytes=16 << 20, segment_sec=3600, retention_sec=30 * 86400)
+#   stats = TapStats(window_sec=86400)
+#   log.append(ts, token, source, campaign); stats.add(ts, token, source, campaign)
+#   stats.query(window_sec=3600, step_sec=60, top=10)
+#
+# 세그먼트 하나 = 고정 길이 이벤트 파일(<이름>.bin, numpy 로 통째로 읽힘) + 문자열 사전(<이름>.str, 한 줄 = id 하나).
+# 이벤트에는 토큰/source/campaign 대신 사전 id 만 저장하므로 한 건에 20바이트.
+# 크기(segment_bytes) 또는 시간(segment_sec)을 넘기면 새 세그먼트로 넘어가고, 보존 기간이 지난 세그먼트는 지운다.
+# append() 는 큐에 넣기만 한다. 파일 쓰기/회전/정리는 쓰기 스레드(taplog-writer)가 쌓인 만큼 묶어서 하고
+# flush 는 묶음마다 한 번 (async 라우트에서 불러도 이벤트 루프가 파일 I/O 를 기다리지 않음).
+import glob, os, struct, threading, time
+from collections import Counter
+from datetime import datetime, timezone
+
+import numpy as np
+
+EVENT = np.dtype([("ts_ms", "<i8"), ("token", "<u4"), ("source", "<u4"), ("campaign", "<u4")])
+_PACK = struct.Struct("<qIII")
+assert _PACK.size == EVENT.itemsize
+
+def _clean(s) -> str:
+    return (s or "").replace("\n", " ").replace("\r", " ")
+
+
+class _Segment:
+    """쓰기 중인 세그먼트. 문자열은 처음 나올 때만 .str 에 한 줄 추가 (id 0 = 빈 문자열)."""
+    def __init__(self, base: str, opened: float):
+        self.base, self.opened = base, opened
+        self.bin = open(base + ".bin", "ab")
+        self.str = open(base + ".str", "a", encoding="utf-8", newline="\n")
+        self.str.write("\n")
+        self.ids = {"": 0}
+        self.size = 0
+
+    def sid(self, s: str) -> int:
+        i = self.ids.get(s)
+        if i is None:
+            i = self.ids[s] = len(self.ids)
+            self.str.write(s + "\n")
+        return i
+
+    def write(self, ts: float, token: str, source: str, campaign: str):
+        rec = _PACK.pack(int(ts * 1000), self.sid(token), self.sid(source), self.sid(campaign))
+        self.bin.write(rec)
+        self.size += len(rec)
+
+    def flush(self):
+        self.str.flush()                     # 사전이 이벤트보다 먼저 디스크에 닿도록
+        self.bin.flush()
+
+    def close(self):
+        self.bin.close()
+        self.str.close()
+
+
+class TapLog:
+    """append 전용 스캔 로그. 프로세스당 하나, 스레드 안전. 기록은 쓰기 스레드가 묶어서 한다."""
+    def __init__(self, directory: str, segment_bytes: int = 16 << 20, segment_sec: float = 3600,
+                 retention_sec: float = 0):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.segment_sec = segment_sec
+        self.retention_sec = retention_sec
+        self._lock = threading.Lock()        # _seg (쓰기 / history / close)
+        self._seg: _Segment | None = None
+        self._q: list[tuple] = []            # 아직 안 쓴 이벤트
+        self._cond = threading.Condition()   # _q 보호 + 쓰기 스레드 깨우기
+        self._wlock = threading.Lock()       # 묶음을 꺼낸 순서대로 쓰도록
+        self._closing = False
+        self._writer: threading.Thread | None = None
+
+    def _rotate(self, now: float):
+        """_lock 보유 상태에서 호출. 오래된 세그먼트 정리는 호출한 쪽이 잠금 밖에서 _prune()"""
+        if self._seg is not None:
+            self._seg.close()
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.fromtimestamp(now, timezone.utc).strftime("%Y%m%dT%H%M%S")
+        n = 0
+        while os.path.exists(os.path.join(self.directory, f"taps-{stamp}-{n}.bin")):
+            n += 1
+        self._seg = _Segment(os.path.join(self.directory, f"taps-{stamp}-{n}"), now)
+        return self._seg.base
+
+    def _prune(self, now: float, current: str):
+        if self.retention_sec <= 0:
+            return
+        for base in self.segments():
+            if base == current:
+                continue
+            try:
+                if os.path.getmtime(base + ".bin") >= now - self.retention_sec:
+                    continue
+            except OSError:
+                continue
+            for ext in (".bin", ".str"):
+                try:
+                    os.remove(base + ext)
+                except OSError:
+                    pass
+
+    def start(self):
+        """새 세그먼트를 연다. 이전 실행의 세그먼트는 모두 닫힌 것으로 보고 history() 로 읽는다."""
+        now = time.time()
+        with self._cond:
+            self._closing = False
+        with self._lock:
+            current = self._rotate(now)
+        self._prune(now, current)
+
+    def append(self, ts: float, token: str, source: str | None = None, campaign: str | None = None):
+        with self._cond:
+            self._q.append((ts, token, source, campaign))
+            self._cond.notify()
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._loop, name="taplog-writer", daemon=True)
+                self._writer.start()
+
+    # ----- 쓰기 스레드 -----
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._q and not self._closing:
+                    self._cond.wait()
+                if not self._q:
+                    return
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"[taps] 이벤트 로그 기록 실패(집계는 유지): {e!r}")
+
+    def flush(self):
+        """큐에 쌓인 이벤트를 지금 쓴다 (회전 포함, flush 는 세그먼트마다 1회)"""
+        with self._wlock:
+            with self._cond:
+                batch, self._q = self._q, []
+            if not batch:
+                return
+            rotated = None
+            with self._lock:
+                for ts, token, source, campaign in batch:
+                    seg = self._seg
+                    if seg is None or seg.size >= self.segment_bytes or ts - seg.opened >= self.segment_sec:
+                        if seg is not None:
+                            seg.flush()
+                        rotated = self._rotate(ts)
+                        seg = self._seg
+                    seg.write(ts, _clean(token), _clean(source), _clean(campaign))
+                self._seg.flush()
+                current = self._seg.base
+            if rotated:
+                self._prune(time.time(), current)
+
+    def close(self):
+        """쓰기 스레드를 멈추고 남은 이벤트를 쓴 뒤 세그먼트를 닫는다"""
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.join(timeout=10)
+        try:
+            self.flush()
+        except OSError as e:
+            print(f"[taps] 종료 시 이벤트 로그 기록 실패: {e!r}")
+        with self._lock:
+            if self._seg is not None:
+                self._seg.close()
+                self._seg = None
+
+    def segments(self) -> list[str]:
+        return sorted(p[:-4] for p in glob.glob(os.path.join(self.directory, "taps-*.bin")))
+
+    @staticmethod
+    def read(base: str) -> tuple[np.ndarray, list[str]]:
+        """세그먼트 하나 → (EVENT 배열, 사전). 비정상 종료로 잘린 마지막 레코드는 버린다."""
+        with open(base + ".bin", "rb") as f:
+            data = f.read()
+        events = np.frombuffer(data[: len(data) - len(data) % EVENT.itemsize], dtype=EVENT)
+        with open(base + ".str", encoding="utf-8", newline="\n") as f:
+            strings = f.read().split("\n")
+        ok = (events["token"] < len(strings)) & (events["source"] < len(strings)) & (events["campaign"] < len(strings))
+        return (events if ok.all() else events[ok]), strings
+
+    def history(self, since: float):
+        """since(epoch 초) 이후에 쓰인 닫힌 세그먼트들을 오래된 순으로 (events, strings)"""
+        with self._lock:
+            current = self._seg.base if self._seg is not None else None
+        for base in self.segments():
+            if base == current or os.path.getmtime(base + ".bin") < since:
+                continue
+            yield self.read(base)
+
+
+class _Bucket:
+    __slots__ = ("taps", "tokens", "sources", "campaigns")
+
+    def __init__(self):
+        self.taps = 0
+        self.tokens, self.sources, self.campaigns = Counter(), Counter(), Counter()
+
+
+class TapStats:
+    """
+    분 단위 버킷 링(window_sec 만큼 보관). 버킷마다 스캔 수, 토큰별/source별/campaign별 횟수.
+    query() 는 메모리만 보고 답한다 (시트/로그 파일을 읽지 않음).
+    """
+    NONE = "(none)"
+
+    def __init__(self, window_sec: int = 86400):
+        self.window_min = max(1, int(window_sec) // 60)
+        self._b: dict[int, _Bucket] = {}
+        self._newest = 0
+        self._lock = threading.Lock()
+        self.total = 0                       # 기동 후(복구분 포함) 누적
+
+    def _evict(self):
+        oldest = self._newest - self.window_min
+        for m in [m for m in self._b if m <= oldest]:
+            del self._b[m]
+
+    def add(self, ts: float, token: str, source: str | None = None, campaign: str | None = None, n: int = 1):
+        m = int(ts // 60)
+        with self._lock:
+            if m > self._newest:
+                self._newest = m
+                self._evict()
+            elif m <= self._newest - self.window_min:
+                return
+            b = self._b.get(m)
+            if b is None:
+                b = self._b[m] = _Bucket()
+            b.taps += n
+            b.tokens[token] += n
+            b.sources[source or self.NONE] += n
+            b.campaigns[campaign or self.NONE] += n
+            self.total += n
+
+    def add_many(self, events: np.ndarray, strings: list[str], since: float = 0) -> int:
+        """TapLog.read() 결과를 한꺼번에 반영 (기동 시 복구용)"""
+        events = events[events["ts_ms"] >= int(since * 1000)]
+        for ts_ms, tok, src, camp in zip(events["ts_ms"].tolist(), events["token"].tolist(),
+                                         events["source"].tolist(), events["campaign"].tolist()):
+            self.add(ts_ms / 1000, strings[tok], strings[src], strings[camp])
+        return len(events)
+
+    def query(self, window_sec: int = 3600, step_sec: int = 60, top: int = 10, now: float | None = None) -> dict:
+        """최근 window_sec 동안 step_sec 간격 시계열 + 합계/순방문자/상위 campaign·source·토큰"""
+        now = time.time() if now is None else now
+        end = int(now // 60)
+        window = max(1, min(int(window_sec) // 60, self.window_min))
+        step = max(1, int(step_sec) // 60)
+        start = end - window + 1
+        tokens, sources, campaigns = Counter(), Counter(), Counter()
+        series = []
+        with self._lock:
+            for s in range(start, end + 1, step):
+                taps, seen = 0, set()
+                for m in range(s, min(s + step, end + 1)):
+                    b = self._b.get(m)
+                    if b is None:
+                        continue
+                    taps += b.taps
+                    seen.update(b.tokens)
+                    tokens.update(b.tokens)
+                    sources.update(b.sources)
+                    campaigns.update(b.campaigns)
+                series.append({"t": _iso(s * 60), "taps": taps, "unique": len(seen)})
+        return {
+            "from": _iso(start * 60), "to": _iso((end + 1) * 60),
+            "window_sec": window * 60, "step_sec": step * 60,
+            "taps": sum(tokens.values()), "unique_visitors": len(tokens),
+            "by_campaign": dict(campaigns.most_common(top or None)),
+            "by_source": dict(sources.most_common(top or None)),
+            "top_tokens": [{"token": t, "taps": n} for t, n in tokens.most_common(top or None)],
+            "series": series,
+        }
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
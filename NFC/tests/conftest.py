@@ -0,0 +1,52 @@
+# conftest.py  (nfc_server 테스트 공통: bench/fake_sheets 의 메모리 시트로 서버 모듈을 띄운다)
+#
+#   cd NFC && python -m pytest -q tests
+import os, sys, tempfile
+from os.path import abspath, dirname, join
+
+import pytest
+
+NFC_DIR = dirname(dirname(abspath(__file__)))
+sys.path.insert(0, NFC_DIR)
+sys.path.insert(0, join(NFC_DIR, "bench"))
+import fake_sheets
+
+ROWS = 30
+ADMIN = "test-admin-key"
+_TMP = tempfile.mkdtemp(prefix="nfc-test-")
+
+os.environ.update({
+    "STORE_BACKEND": "fake",
+    "ADMIN_KEY": ADMIN,
+    "TOUCH_JOURNAL": join(_TMP, "touch_journal.jsonl"),
+    "TAPLOG_DIR": "",
+    "TOUCH_FLUSH_SEC": "3600",
+    "TOKEN_AUTOFILL_SEC": "0",
+    "SHEETS_QUOTA_PER_MIN": "1e6",
+    "SHEETS_BURST": "1000",
+})
+SHEETS = fake_sheets.install(ROWS)
+os.chdir(NFC_DIR)                                      # templates/ 기준 경로
+import nfc_server
+
+@pytest.fixture
+def ns():
+    """매 테스트마다 시트 내용과 스냅샷을 처음 상태로 되돌린 nfc_server 모듈"""
+    resp, clu = fake_sheets.make_values(ROWS)
+    SHEETS.worksheet(nfc_server.RESP_WS_NAME).v = resp
+    SHEETS.worksheet(nfc_server.CLU_WS_NAME).v = clu
+    nfc_server._SNAPSHOTS._snap = None
+    nfc_server._SNAPSHOTS._patches = []
+    nfc_server._SNAPSHOTS._dirty = 0
+    nfc_server._PAGES._d.clear()
+    nfc_server._FREE_TOKENS._reserved.clear()
+    nfc_server._snapshot()
+    yield nfc_server
+
+@pytest.fixture
+def sheets():
+    return SHEETS
+
+@pytest.fixture
+def resp_ws():
+    return SHEETS.worksheet(nfc_server.RESP_WS_NAME)
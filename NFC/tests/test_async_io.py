@@ -0,0 +1,59 @@
+# 비동기 I/O: 동일 호출 합치기, 최초 스냅샷 로드 1회, 라우트 동시성 제한
+import asyncio
+import threading
+import time
+
+def test_coalesced_runs_once_for_concurrent_callers(ns):
+    calls = []
+
+    def slow(x):
+        calls.append(threading.current_thread().name)
+        time.sleep(0.05)
+        return [x]
+
+    async def main():
+        return await asyncio.gather(*(ns._coalesced("k", slow, 1) for _ in range(10)))
+
+    results = asyncio.run(main())
+    assert results == [[1]] * 10
+    assert len(calls) == 1 and calls[0].startswith("store-io")
+    assert "k" not in ns._INFLIGHT
+
+def test_first_snapshot_load_is_shared(ns, resp_ws):
+    ns._SNAPSHOTS._snap = None
+    reads = resp_ws.calls["get_all_values"]
+
+    async def main():
+        return await asyncio.gather(*(ns._asnapshot() for _ in range(20)))
+
+    snaps = asyncio.run(main())
+    assert all(s is snaps[0] for s in snaps)
+    assert resp_ws.calls["get_all_values"] == reads + 1
+
+def test_io_carries_context(ns):
+    async def main():
+        token = ns.storage._PRIORITY.set(ns.storage.BULK)
+        try:
+            return await ns._io(ns.storage._PRIORITY.get)
+        finally:
+            ns.storage._PRIORITY.reset(token)
+
+    assert asyncio.run(main()) == ns.storage.BULK
+
+def test_limited_caps_concurrency(ns, monkeypatch):
+    monkeypatch.setitem(ns._LIMITS, "admin", asyncio.Semaphore(2))
+    active, peak = 0, 0
+
+    async def job():
+        nonlocal active, peak
+        async for _ in ns._limited("admin")():
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    async def main():
+        await asyncio.gather(*(job() for _ in range(8)))
+
+    asyncio.run(main())
+    assert peak == 2
@@ -0,0 +1,51 @@
+# bench/: 가짜 워크시트의 A1 읽기/쓰기와 429 주입, load_test 회귀 비교, 작은 규모로 한 번 실행
+import json
+import subprocess
+import sys
+from os.path import abspath, dirname, join
+
+import pytest
+
+import fake_sheets
+import load_test
+
+LOAD_TEST = join(dirname(dirname(abspath(__file__))), "bench", "load_test.py")
+
+def test_fake_worksheet_reads_and_writes_like_sheets():
+    ws = fake_sheets.FakeWorksheet("t", [["a", "b"], ["1", "2"]])
+    ws.batch_update([{"range": "C3", "values": [["x"]]}])
+    assert ws.get_all_values() == [["a", "b", ""], ["1", "2", ""], ["", "", "x"]]
+    assert ws.row_values(1) == ["a", "b"]
+    assert ws.batch_get(["B1:C3"]) == [[["b"], ["2"], ["", "x"]]]   # 시트처럼 행 끝 빈 칸은 없음
+    assert ws.calls == {"batch_update": 1, "get_all_values": 1, "row_values": 1, "batch_get": 1}
+
+def test_fake_worksheet_injects_429():
+    ws = fake_sheets.FakeWorksheet("t", [["a"]], p429=1.0)
+    with pytest.raises(fake_sheets.FakeAPIError) as e:
+        ws.get_all_values()
+    assert e.value.response.status_code == 429 and ws.throttled["get_all_values"] == 1
+
+def _result(**kw):
+    r = {"op": "profile", "p99_ms": 10.0, "rps": 1000.0, "sheets_total": 2, "errors": 0}
+    r.update(kw)
+    return r
+
+def test_compare_flags_regressions(tmp_path):
+    path = tmp_path / "base.json"
+    path.write_text(json.dumps({"results": [_result()]}), encoding="utf-8")
+    assert load_test._compare([_result(p99_ms=11.0, rps=900.0)], str(path), 0.25) == []
+    problems = load_test._compare([_result(p99_ms=20.0, rps=500.0, sheets_total=3, errors=1)], str(path), 0.25)
+    assert [p.split(":")[1].split()[0] for p in problems] == ["p99", "throughput", "sheets", "errors"]
+
+def test_load_test_runs_end_to_end(tmp_path):
+    base = str(tmp_path / "base.json")
+    cmd = [sys.executable, LOAD_TEST, "--rows", "200", "--clients", "8",
+           "--requests", "40", "--assign", "10", "--generate", "1"]
+    run = subprocess.run(cmd + ["--save", base], capture_output=True, text=True, timeout=120)
+    assert run.returncode == 0, run.stderr
+    with open(base, encoding="utf-8") as f:
+        results = {r["op"]: r for r in json.load(f)["results"]}
+    assert set(results) == {"snapshot", "profile", "touch", "assign", "generate"}
+    assert all(r["errors"] == 0 for r in results.values())
+    assert results["profile"]["sheets_total"] == 0                  # 조회는 스냅샷에서만
+    assert results["touch"]["sheets_calls"].get("batch_update", 0) <= 2   # 헤더 추가 + flush 1회
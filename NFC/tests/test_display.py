@@ -0,0 +1,61 @@
+# /display/{token}, /display/name/{name}, /display.json: 명찰 페이로드 (JSON / "NT" 바이너리), 304 재검증
+import pytest
+from fastapi.testclient import TestClient
+
+@pytest.fixture
+def client(ns):
+    return TestClient(ns.app)
+
+def _unpack(body: bytes) -> tuple[int, list[str]]:
+    assert body[:2] == b"NT"
+    version, n, off, out = body[2], body[3], 4, []
+    for _ in range(n):
+        size = body[off]
+        out.append(body[off + 1:off + 1 + size].decode("utf-8"))
+        off += 1 + size
+    assert off == len(body)
+    return version, out
+
+def _row(ns, i=0):
+    snap = ns._snapshot()
+    row = sorted(r for r in snap.index.rows() if snap.index.raw(r, "token"))[i]
+    return row, snap.index.raw(row, "token"), snap.index.raw(row, "name")
+
+def test_json_payload(ns, client):
+    row, token, name = _row(ns)
+    snap = ns._snapshot()
+    body = client.get(f"/display/{token}").json()
+    assert body["v"] == ns.DISPLAY_VERSION and body["token"] == token and body["name"] == name
+    assert body["top"] == snap.recs.text(snap.index.clu_row(row))
+    assert client.get(f"/display/name/{name}").json() == body
+
+def test_binary_payload_matches_json(ns, client):
+    _, token, _ = _row(ns)
+    js = client.get(f"/display/{token}").json()
+    r = client.get(f"/display/{token}", headers={"Accept": "application/octet-stream"})
+    assert r.headers["content-type"] == "application/octet-stream"
+    version, values = _unpack(r.content)
+    assert version == ns.DISPLAY_VERSION and values == [js[f] for f in ns.DISPLAY_FIELDS]
+
+def test_pack_truncates_on_character_boundary(ns):
+    _, values = _unpack(ns._pack_display(["가" * 100, "a" * 300]))
+    assert values[0] == "가" * 85 and values[1] == "a" * 255       # 255바이트 안에서 글자 단위로
+
+def test_revalidate_with_display_version(ns, client):
+    _, token, _ = _row(ns)
+    r = client.get(f"/display/{token}?fmt=bin")
+    ver, etag = r.headers["x-display-version"], r.headers["etag"]
+    assert client.get(f"/display/{token}?fmt=bin", headers={"If-None-Match": ver}).status_code == 304
+    assert client.get(f"/display/{token}?fmt=bin", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(f"/display/{token}?fmt=bin", headers={"If-None-Match": "123"}).status_code == 200
+
+def test_errors(client):
+    assert client.get("/display/없는토큰").status_code == 404
+    assert client.get("/display/x?fmt=xml").status_code == 400
+
+def test_display_all_lists_tokened_rows(ns, client):
+    body = client.get("/display.json").json()
+    snap = ns._snapshot()
+    assert body["version"] == snap.version
+    assert [i["token"] for i in body["items"]] == [snap.index.raw(r, "token") for r in sorted(snap.index.rows())
+                                                   if snap.index.raw(r, "token")]
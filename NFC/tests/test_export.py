@@ -0,0 +1,48 @@
+# /users.json, /users.ndjson, /users.csv: 청크 스트림이 한 번에 직렬화한 결과와 같은지, 페이지/since
+import io
+import json
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+PLAIN = {"Accept-Encoding": "identity"}
+
+@pytest.fixture
+def client(ns, monkeypatch):
+    monkeypatch.setattr(ns, "EXPORT_CHUNK", 7)            # 30행 → 청크 경계가 여러 번 생기게
+    return TestClient(ns.app)
+
+def _records(ns):
+    return json.loads(ns._snapshot().resp.to_json(orient="records", force_ascii=False))
+
+def test_json_array_matches_snapshot(ns, client):
+    r = client.get("/users.json", headers=PLAIN)
+    assert r.status_code == 200 and "content-encoding" not in r.headers
+    assert r.json() == _records(ns)
+    assert r.headers["x-total-rows"] == str(len(ns._snapshot().resp))
+
+def test_ndjson_lines(ns, client):
+    r = client.get("/users.ndjson", headers=PLAIN)
+    assert [json.loads(line) for line in r.text.splitlines()] == _records(ns)
+
+def test_csv_matches_dataframe(ns, client):
+    r = client.get("/users.csv?cols=이름,token", headers=PLAIN)
+    got = pd.read_csv(io.StringIO(r.text), dtype=str, keep_default_na=False)
+    want = ns._snapshot().resp[["이름", "token"]].astype(str)
+    assert got.columns.tolist() == ["이름", "token"] and got.values.tolist() == want.values.tolist()
+
+def test_since_offset_limit(ns, client):
+    r = client.get("/users.json?since=10&offset=2&limit=5", headers=PLAIN)
+    assert [u["이름"] for u in r.json()] == [u["이름"] for u in _records(ns)[11:16]]
+    assert r.headers["x-next-since"] == "17"                # 마지막 데이터 행(16번째) 다음 시트 행
+    assert client.get("/users.json?since=1000", headers=PLAIN).json() == []
+    assert client.get("/users.csv?since=1000&cols=token", headers=PLAIN).text == "token\n"
+
+def test_unknown_column_is_400(client):
+    assert client.get("/users.csv?cols=없는컬럼").status_code == 400
+
+def test_gzip_stream(ns, client):
+    r = client.get("/users.json", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.json() == _records(ns)                        # httpx 가 풀어서 돌려줌
@@ -0,0 +1,77 @@
+# _FreeTokenPool: 미사용 토큰 행 예약/해제, 동시 할당 중복 없음, 실패 시 반환
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+def _free_rows(snap) -> list[int]:
+    idx = snap.index
+    return sorted(r for r in idx.rows() if idx.raw(r, "token") and not idx.raw(r, "uid"))
+
+def test_take_hands_out_each_free_row_once(ns):
+    snap = ns._snapshot()
+    pool = ns._FreeTokenPool()
+    rows = [pool.take(snap.index) for _ in range(len(_free_rows(snap)))]
+    assert rows == _free_rows(snap)                       # 시트 순서대로
+    assert pool.take(snap.index) is None and pool.reserved() == len(rows)
+
+def test_concurrent_takes_do_not_collide(ns):
+    snap = ns._snapshot()
+    pool = ns._FreeTokenPool()
+    with ThreadPoolExecutor(8) as ex:
+        rows = list(ex.map(lambda _: pool.take(snap.index), range(len(_free_rows(snap)) + 5)))
+    got = [r for r in rows if r]
+    assert sorted(got) == _free_rows(snap) and rows.count(None) == 5
+
+def test_release_returns_row_to_front(ns):
+    snap = ns._snapshot()
+    pool = ns._FreeTokenPool()
+    first, second = pool.take(snap.index), pool.take(snap.index)
+    pool.release([first])
+    assert pool.take(snap.index) == first
+    pool.done([first, second])
+    assert pool.reserved() == 0
+
+def test_reservation_survives_snapshot_refresh(ns):
+    row = ns._FREE_TOKENS.take(ns._snapshot().index)
+    try:
+        snap = ns._SNAPSHOTS.refresh()                    # 시트에는 아직 uid 가 없음
+        rows = [ns._FREE_TOKENS.take(snap.index) for _ in range(len(_free_rows(snap)))]
+        assert row not in rows
+        ns._FREE_TOKENS.release([r for r in rows if r])
+    finally:
+        ns._FREE_TOKENS.release([row])
+
+@pytest.fixture
+def client(ns):
+    return TestClient(ns.app)
+
+def _assign(ns, client, uid):
+    return client.post(f"/admin/provision/assign?key={ns.ADMIN_KEY}", json={"uid": uid})
+
+def test_assign_until_exhausted_then_409(ns, client):
+    free = len(_free_rows(ns._snapshot()))
+    tokens = set()
+    for i in range(free):
+        r = _assign(ns, client, f"04DD{i:04X}")
+        assert r.status_code == 200 and not r.json()["reused"]
+        tokens.add(r.json()["token"])
+    assert len(tokens) == free
+    assert _assign(ns, client, "04EEEEEE").status_code == 409
+    assert _assign(ns, client, "04DD0000").json()["reused"] is True
+    assert ns._FREE_TOKENS.reserved() == 0
+
+def test_failed_write_releases_reservation(ns, client, resp_ws, monkeypatch):
+    ns._provision_cols()                                  # 헤더 추가는 실패시키지 않음
+    first = _free_rows(ns._snapshot())[0]
+
+    def boom(*a, **kw):
+        raise RuntimeError("sheets down")
+    monkeypatch.setattr(resp_ws, "batch_update", boom)
+    with pytest.raises(RuntimeError):
+        _assign(ns, client, "04AAAAAA")
+    assert ns._FREE_TOKENS.reserved() == 0
+
+    monkeypatch.undo()
+    r = _assign(ns, client, "04AAAAAA")
+    assert r.status_code == 200 and r.json()["token"] == ns._snapshot().index.raw(first, "token")
@@ -0,0 +1,63 @@
+# metrics.py + _RequestTiming: Prometheus 텍스트 형식, 구간 기록, 라우트 템플릿 라벨, Server-Timing
+import pytest
+from fastapi.testclient import TestClient
+
+import metrics
+
+def test_counter_and_labels_render():
+    c = metrics.Counter("x_total", "help", ["op"])
+    c.inc(op="read")
+    c.inc(2, op='a"b\n')
+    assert c.value(op="read") == 1
+    assert c.render() == ["# HELP x_total help", "# TYPE x_total counter",
+                          'x_total{op="a\\"b\\n"} 2', 'x_total{op="read"} 1']
+
+def test_histogram_buckets_are_cumulative():
+    h = metrics.Histogram("lat", "help", ["route"], buckets=(0.1, 1.0))
+    for v in (0.05, 0.5, 5.0):
+        h.observe(v, route="/a")
+    lines = h.render()[2:]
+    assert lines == ['lat_bucket{route="/a",le="0.1"} 1', 'lat_bucket{route="/a",le="1.0"} 2',
+                     'lat_bucket{route="/a",le="+Inf"} 3', 'lat_sum{route="/a"} 5.55', 'lat_count{route="/a"} 3']
+
+def test_gauge_fn_is_read_at_scrape():
+    state = {"n": 1}
+    g = metrics.Gauge("depth", "help", fn=lambda: state["n"])
+    state["n"] = 7
+    assert g.render()[-1] == "depth 7"
+
+def test_stage_records_inside_request_only():
+    metrics.STAGE_SECONDS._v.pop(("unit_stage",), None)
+    stages, token = metrics.begin_request()
+    with metrics.stage("unit_stage"):
+        pass
+    with metrics.stage("unit_stage"):
+        pass
+    metrics.end_request(token)
+    with metrics.stage("unit_stage"):
+        pass
+    assert [n for n, _ in stages] == ["unit_stage", "unit_stage"]
+    assert metrics.STAGE_SECONDS._v[("unit_stage",)][-1] == 3
+    assert metrics.server_timing(stages).startswith("unit_stage;dur=")
+
+@pytest.fixture
+def client(ns):
+    return TestClient(ns.app)
+
+def test_request_latency_uses_route_template(ns, client):
+    snap = ns._snapshot()
+    token = next(snap.index.raw(r, "token") for r in snap.index.rows() if snap.index.raw(r, "token"))
+    key = ("GET", "/u/{token}", "200")
+    before = ns.REQUEST_SECONDS._v.get(key, [0])[-1]
+    r = client.get(f"/u/{token}")
+    assert r.status_code == 200
+    assert ns.REQUEST_SECONDS._v[key][-1] == before + 1
+    assert "server-timing" in r.headers
+
+def test_metrics_endpoint(ns, client):
+    r = client.get("/metrics")
+    assert r.status_code == 200 and r.headers["content-type"].startswith("text/plain")
+    body = r.text
+    for name in ("nfc_request_seconds", "nfc_snapshot_version", "nfc_free_tokens", "nfc_touch_queue_depth"):
+        assert f"# TYPE {name} " in body
+    assert f"nfc_snapshot_version {ns._snapshot().version}" in body
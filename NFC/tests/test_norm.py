@@ -0,0 +1,29 @@
+# _norm_many / _key_norm_many: 열 단위 정규화가 값마다 _norm / _key_norm 한 결과와 같은지
+import random
+
+import pytest
+
+TRICKY = ["김 철수", "ＫＩＭ　Ｃｈｅｏｌ", "Name​", "﻿Token", "a b", "ﾊﾟﾝ", "Ⅻ", "ß", "İstanbul",
+          "tab\tnew\nline", "", "   ", "x\x00y", "① ② ③", "ｶﾞｷﾞ", "é", "é", "\u0301x", "ᄀ", "ᅡ", "A" * 300]
+
+def test_norm_many_matches_norm(ns):
+    rnd = random.Random(5)
+    values = TRICKY + ["".join(rnd.choice(TRICKY) for _ in range(3)) for _ in range(200)]
+    assert ns._norm_many(values) == [ns._norm(v) for v in values]
+
+@pytest.mark.parametrize("values", [[], [""], ["x\x00y", "z"], [1, 2.5, None]])
+def test_norm_many_edge_cases(ns, values):
+    assert ns._norm_many(values) == [ns._norm(v) for v in values]
+
+@pytest.mark.parametrize("field", ["token", "name", "uid"])
+def test_key_norm_many_keeps_blanks(ns, field):
+    values = TRICKY + [" 04aa bb ", "04AABB"]
+    out = ns._key_norm_many(field, values)
+    assert out == [ns._key_norm(field, v) if v else "" for v in values]
+    assert len(out) == len(values)
+
+def test_norm_is_cached(ns):
+    ns._norm.cache_clear()
+    ns._norm("캐시 테스트")
+    ns._norm("캐시 테스트")
+    assert ns._norm.cache_info().hits == 1
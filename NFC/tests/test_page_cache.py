@@ -0,0 +1,48 @@
+# 페이지 캐시(/u/{token}, /display/{token}): 인덱스 patch 직후 옛 페이지를 내주지 않는지
+import pytest
+from fastapi.testclient import TestClient
+
+@pytest.fixture
+def client(ns):
+    return TestClient(ns.app)                 # lifespan 없이 (스냅샷은 ns fixture 가 이미 로드)
+
+def _two_rows(ns):
+    snap = ns._snapshot()
+    rows = sorted(r for r in snap.index.rows() if snap.index.raw(r, "token"))
+    return rows[0], rows[1]
+
+def test_profile_follows_token_remap(ns, client):
+    a, b = _two_rows(ns)
+    idx = ns._snapshot().index
+    token, name_a, name_b = idx.raw(a, "token"), idx.raw(a, "name"), idx.raw(b, "name")
+
+    r = client.get(f"/u/{token}")
+    assert r.status_code == 200 and name_a in r.text
+    assert client.get(f"/u/{token}").status_code == 200      # 같은 스냅샷에서 fresh() 적중
+
+    ns._SNAPSHOTS.patch(a, token="")                          # token 을 b 행으로 옮김 (remap 과 같은 순서)
+    ns._SNAPSHOTS.patch(b, token=token)
+    r = client.get(f"/u/{token}")
+    assert r.status_code == 200
+    assert name_b in r.text and name_a not in r.text
+
+def test_display_shows_token_written_by_patch(ns, client):
+    a, _ = _two_rows(ns)
+    old = ns._snapshot().index.raw(a, "token")
+    assert client.get(f"/display/{old}").json()["token"] == old
+
+    ns._SNAPSHOTS.patch(a, token="NEWTOKEN1")
+    assert client.get(f"/display/{old}").status_code == 404
+    r = client.get("/display/NEWTOKEN1")
+    assert r.status_code == 200 and r.json()["token"] == "NEWTOKEN1"
+
+def test_etag_revalidation_after_patch(ns, client):
+    a, b = _two_rows(ns)
+    token = ns._snapshot().index.raw(a, "token")
+    etag = client.get(f"/u/{token}").headers["etag"]
+    assert client.get(f"/u/{token}", headers={"If-None-Match": etag}).status_code == 304
+
+    ns._SNAPSHOTS.patch(a, token="")
+    ns._SNAPSHOTS.patch(b, token=token)
+    r = client.get(f"/u/{token}", headers={"If-None-Match": etag})
+    assert r.status_code == 200 and r.headers["etag"] != etag
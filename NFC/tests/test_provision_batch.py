@@ -0,0 +1,28 @@
+# /admin/provision/assign-batch, remap-batch: 본문 형식 검사 + 일괄 할당
+import pytest
+from fastapi.testclient import TestClient
+
+@pytest.fixture
+def client(ns):
+    return TestClient(ns.app)
+
+@pytest.mark.parametrize("body", ["str", 5, None, True, {"items": "abc"}, {"uids": 7}])
+@pytest.mark.parametrize("op", ["assign-batch", "remap-batch"])
+def test_bad_json_body_is_400(ns, client, op, body):
+    r = client.post(f"/admin/provision/{op}?key={ns.ADMIN_KEY}", json=body)
+    assert r.status_code == 400
+
+def test_assign_batch_gives_distinct_tokens(ns, client):
+    uids = [f"04A1B2C3D4E5{i:02X}" for i in range(4)]
+    r = client.post(f"/admin/provision/assign-batch?key={ns.ADMIN_KEY}", json={"uids": uids})
+    assert r.status_code == 200
+    idx = ns._snapshot().index
+    rows = [idx.lookup("uid", u) for u in uids]
+    assert all(rows) and len(set(rows)) == len(uids)
+    assert len({idx.raw(row, "token") for row in rows}) == len(uids)
+
+def test_csv_body(ns, client):
+    r = client.post(f"/admin/provision/assign-batch?key={ns.ADMIN_KEY}", content="uid\n04FFEEDDCCBB01\n04FFEEDDCCBB02\n",
+                    headers={"Content-Type": "text/csv"})
+    assert r.status_code == 200
+    assert ns._snapshot().index.lookup("uid", "04FFEEDDCCBB02")
@@ -0,0 +1,68 @@
+# _Recommendations: 미리 계산한 표가 예전 행 단위 _pick_top_industries 와 같은 결과인지
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+SCORES = ["Embedded & Control", "Semiconductor & Circuits", "AI & Applications"]
+
+def _pick(header, row, k=2):
+    """예전 _pick_top_industries (라벨 컬럼 → 점수 상위 k개)의 행 단위 구현"""
+    cell = dict(zip(header, row))
+    for c in ["추천 산업군", "Top Industries", "추천 직무", "top_industries", "GroupName", "Cluster", "Subgroup"]:
+        if c in cell and cell[c].strip():
+            return cell[c].strip()
+    scores = []
+    for c in [c for c in SCORES if c in header]:
+        try:
+            val = float(cell.get(c, "").strip().replace(",", ""))
+        except ValueError:
+            val = 0.0
+        scores.append((val, c))
+    scores.sort(key=lambda x: x[0], reverse=True)
+    return ", ".join(name for _, name in scores[:k])
+
+def _clu(n=60, label=False, seed=3):
+    rnd = random.Random(seed)
+    header = ["이름"] + SCORES + (["Top Industries"] if label else [])
+    rows = [header]
+    for i in range(n):
+        cells = [f"사람{i}"] + [rnd.choice(["1.5", "2", "2", "3,000", "", "abc", f"{rnd.uniform(0, 5):.2f}"])
+                               for _ in SCORES]
+        if label:
+            cells.append(rnd.choice(["", "반도체", " AI "]))
+        rows.append(cells)
+    return rows
+
+@pytest.mark.parametrize("label", [False, True])
+@pytest.mark.parametrize("k", [1, 2, 3])
+def test_matches_row_by_row_pick(ns, label, k):
+    clu = _clu(label=label)
+    resp = [["이름", "token"]]
+    recs = ns._Recommendations(clu, ns._Schema.build(resp, clu), k=k, kmap=False)
+    for row_no, row in enumerate(clu[1:], start=2):
+        assert recs.text(row_no) == _pick(clu[0], row, k)
+        assert recs.text(row_no, 1) == _pick(clu[0], row, 1)
+
+def test_ranked_and_kmap(ns):
+    clu = [["이름"] + SCORES, ["a", "1", "3", "2"]]
+    recs = ns._Recommendations(clu, ns._Schema.build([["이름"]], clu), k=2, kmap=True)
+    assert recs.text(2) == "반도체/회로, AI/응용"
+    assert [r["score"] for r in recs.ranked(2)] == [3.0, 2.0, 1.0]
+    assert recs.text(99) == ""
+
+def test_build_reuses_table_when_sheet_unchanged(ns):
+    snap = ns._snapshot()
+    assert ns._Recommendations.build(snap.clu_values, snap.schema, snap.recs) is snap.recs
+    changed = [r[:] for r in snap.clu_values]
+    changed[1][1] = "9"
+    assert ns._Recommendations.build(changed, snap.schema, snap.recs) is not snap.recs
+
+def test_recommendations_endpoint(ns):
+    body = TestClient(ns.app).get("/recommendations.json?ranked=true").json()
+    snap = ns._snapshot()
+    assert body["version"] == snap.version and len(body["items"]) == len(snap.index.rows())
+    first = body["items"][0]
+    clu_row = snap.clu_values[snap.index.clu_row(first["row"]) - 1]
+    assert first["top_industries"] == _pick(snap.clu_values[0], clu_row)
+    assert len(first["ranked"]) == 3
@@ -0,0 +1,111 @@
+# storage.SheetsScheduler: 429/5xx 재시도와 한도 초과, 동일 읽기 합치기, 쓰기 병합, 우선순위
+import threading
+import time
+
+import pytest
+
+import storage
+from fake_sheets import FakeAPIError
+
+def _sched(**kw):
+    kw.setdefault("per_min", 60_000)
+    kw.setdefault("burst", 100)
+    return storage.SheetsScheduler(backoff_base=0.001, backoff_max=0.002, **kw)
+
+def test_retries_429_then_succeeds():
+    s, calls = _sched(), []
+
+    def fn():
+        calls.append(1)
+        if len(calls) < 3:
+            raise FakeAPIError(429)
+        return "ok"
+
+    seen = []
+    storage.RETRY_HOOKS.append(lambda *a: seen.append(a[2]))
+    try:
+        assert s.run("t", "get_all_values", fn) == "ok"
+    finally:
+        storage.RETRY_HOOKS.pop()
+    assert len(calls) == 3 and seen == [1, 2]
+
+def test_gives_up_with_quota_exceeded():
+    s = _sched(max_retries=2)
+
+    def fn():
+        raise FakeAPIError(503, retry_after=0.001)
+
+    with pytest.raises(storage.QuotaExceeded) as e:
+        s.run("t", "batch_update", fn)
+    assert e.value.table == "t" and e.value.op == "batch_update"
+
+def test_client_errors_are_not_retried():
+    s, calls = _sched(), []
+
+    def fn():
+        calls.append(1)
+        raise FakeAPIError(400)
+
+    with pytest.raises(FakeAPIError):
+        s.run("t", "op", fn)
+    assert len(calls) == 1
+
+def test_concurrent_identical_reads_are_coalesced():
+    s, calls = _sched(), []
+    gate = threading.Event()
+
+    def read(row):
+        calls.append(row)
+        gate.wait(1)
+        return [["a", "b"]]
+
+    out = []
+    threads = [threading.Thread(target=lambda: out.append(s.read("t", "row_values", read, 1))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    gate.set()
+    for t in threads:
+        t.join()
+    assert calls == [1] and out == [[["a", "b"]]] * 5
+    out[0][0].append("x")                              # 호출자마다 따로 복사된 결과
+    assert out[1] == [["a", "b"]]
+
+def test_writes_queued_behind_the_leader_are_merged():
+    s, sent = _sched(per_min=60, burst=1), []
+    s.acquire(storage.READ)                            # 버킷을 비워 대표 호출이 토큰을 기다리게 함
+    s.rate = 20.0                                      # 다음 토큰까지 ~50ms
+
+    def send(data, opt):
+        sent.append([d["range"] for d in data])
+        return len(data)
+
+    results = []
+    threads = [threading.Thread(target=lambda i=i: results.append(
+        s.write("t", send, [{"range": f"A{i}", "values": [["x"]]}], "RAW"))) for i in range(4)]
+    for t in threads:
+        t.start()
+        time.sleep(0.005)
+    for t in threads:
+        t.join()
+    assert len(sent) == 1 and sent[0] == ["A0", "A1", "A2", "A3"]
+    assert results == [4] * 4
+
+def test_higher_priority_goes_first():
+    s = _sched(per_min=60, burst=1)
+    s.acquire(storage.READ)
+    s.rate = 20.0
+    order = []
+
+    def waiter(prio, name):
+        s.acquire(prio)
+        order.append(name)
+
+    bulk = threading.Thread(target=waiter, args=(storage.BULK, "bulk"))
+    bulk.start()
+    time.sleep(0.01)
+    read = threading.Thread(target=waiter, args=(storage.READ, "read"))
+    read.start()
+    bulk.join()
+    read.join()
+    assert order == ["read", "bulk"]
@@ -0,0 +1,43 @@
+# _require_cols: 공유 스냅샷을 바꾸지 않고 새 스냅샷으로 교체
+def test_require_cols_publishes_new_snapshot(ns, resp_ws):
+    old = ns._snapshot()
+    old_schema = old.schema
+    assert old_schema.missing(["scan_count", "last_seen_at"])
+
+    schema = ns._require_cols(["scan_count", "last_seen_at"])
+    assert not schema.missing(["scan_count", "last_seen_at"])
+    assert old.schema is old_schema and old_schema.missing(["scan_count"])   # 기존 스냅샷은 그대로
+
+    new = ns._snapshot()
+    assert new is not old and new.schema is schema
+    assert "scan_count" in new.resp.columns                 # 스키마와 프레임/인덱스가 같은 시점
+    assert resp_ws.v[0][-2:] == ["scan_count", "last_seen_at"]
+
+def test_require_cols_without_missing_columns_reads_nothing(ns, resp_ws):
+    ns._require_cols(["token"])
+    calls = sum(resp_ws.calls.values())
+    snap = ns._snapshot()
+    assert ns._require_cols(["token", "name"]) is snap.schema
+    assert sum(resp_ws.calls.values()) == calls and ns._snapshot() is snap
+
+def test_projected_reads_scan_count_through_schema(ns, resp_ws, tmp_path):
+    schema = ns._require_cols(["scan_count"])
+    snap = ns._snapshot()
+    row = sorted(r for r in snap.index.rows() if snap.index.raw(r, "token"))[0]
+    resp_ws.batch_update([{"range": schema.a1("scan_count", row), "values": [["7"]]}])
+    ns._SNAPSHOTS.refresh()
+    buf = ns._TouchBuffer(3600, 1000, str(tmp_path / "j.jsonl"))
+    assert buf.projected(row) == 7
+    assert buf.add(row, snap.index.raw(row, "token"), "2026-01-01T00:00:00") == 8
+
+def test_generate_tokens_creates_column_and_fills_every_row(ns, resp_ws):
+    resp_ws.v = [row[:-1] for row in resp_ws.v]             # token 컬럼 없는 시트
+    ns._SNAPSHOTS.refresh()
+    assert ns._snapshot().schema.missing(["token"])
+
+    out = ns._fill_missing_tokens()
+    snap = ns._snapshot()
+    assert out["created"] == len(snap.resp) and out["col_name"] == "token"
+    tokens = {snap.index.raw(r, "token") for r in snap.index.rows()}
+    assert "" not in tokens and len(tokens) == out["created"]
+    assert all(snap.index.lookup("token", t) for t in tokens)
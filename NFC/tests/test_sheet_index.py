@@ -0,0 +1,64 @@
+# _SheetIndex: 증분 재구성이 전체 재구성과 같은지, 선형 탐색과 같은 결과, patch 반영
+import fake_sheets
+
+def _values(rows=40):
+    resp, clu = fake_sheets.make_values(rows)
+    resp[0].append("uid")
+    for i, row in enumerate(resp[1:], start=1):
+        row.append(f"04AA{i:04X}" if i % 3 == 0 else "")
+    return resp, clu
+
+def _index(ns, resp, clu, prev=None):
+    schema = ns._Schema.build(resp, clu)
+    return ns._SheetIndex(resp, clu, schema, prev)
+
+def _state(idx):
+    """비교용: 키 맵 / 원본 값 / 미사용 토큰 집합"""
+    return ({f: dict(m._m) for f, m in idx._maps.items()}, dict(idx._raw), set(idx._free),
+            dict(idx._clu_by_name._m))
+
+def test_lookup_matches_linear_scan(ns):
+    resp, clu = _values()
+    idx = _index(ns, resp, clu)
+    header = resp[0]
+    for field, col in (("token", "token"), ("name", "이름"), ("uid", "uid")):
+        p = header.index(col)
+        for row in resp[1:]:
+            if row[p]:
+                first = next(i for i, r in enumerate(resp[1:], start=2) if ns._key_norm(field, r[p]) == ns._key_norm(field, row[p]))
+                assert idx.lookup(field, row[p]) == first
+    assert idx.lookup("name", "  사람 000005 ") == 6          # 공백/대소문자 정규화
+    assert idx.lookup("uid", "04aa0003") == 4
+    assert idx.lookup("token", "없는토큰") is None
+    assert idx.clu_row(2) == 2
+
+def test_incremental_rebuild_equals_full_rebuild(ns):
+    resp, clu = _values()
+    prev = _index(ns, resp, clu)
+    edited = [r[:] for r in resp[:-3]]                     # 끝의 3행 삭제
+    edited[5][-2] = "NEWTOKEN"                             # 토큰 변경
+    edited[6][1] = "사람000002"                             # 이름 중복 (위 행이 대표)
+    edited[7][-1] = "04BBCCDD"                             # uid 기록 → 미사용 토큰에서 빠짐
+    edited.append(["t", "새사람", "S대", "1", "EE", "n@example.com", "APPENDED", ""])
+    inc = _index(ns, edited, clu, prev)
+    full = _index(ns, edited, clu)
+    assert _state(inc) == _state(full)
+    assert inc.lookup("token", "NEWTOKEN") == 6 and inc.lookup("name", "사람000002") == 3
+    assert _state(prev) == _state(_index(ns, resp, clu))   # 이전 인덱스는 그대로
+
+def test_layout_change_rebuilds_from_scratch(ns):
+    resp, clu = _values()
+    prev = _index(ns, resp, clu)
+    moved = [[r[-1]] + r[:-1] for r in resp]               # uid 컬럼을 맨 앞으로
+    assert _state(_index(ns, moved, clu, prev)) == _state(_index(ns, moved, clu))
+
+def test_patch_updates_lookups_and_free_queue(ns):
+    resp, clu = _values()
+    idx = _index(ns, resp, clu)
+    row = sorted(idx._free)[0]
+    token = idx.raw(row, "token")
+    idx.patch(row, uid="04CAFE")
+    assert idx.lookup("uid", "04cafe") == row and row not in idx._free
+    idx.patch(row, token="")
+    assert idx.lookup("token", token) is None
+    assert idx.patches == 2
@@ -0,0 +1,37 @@
+# _SnapshotStore: 스냅샷 재사용, 갱신 교체, 읽는 중 끼어든 쓰기, stale 시 백그라운드 갱신
+import pytest
+
+def test_snapshot_store_reuses_snapshot_until_refresh(ns, resp_ws):
+    snap = ns._snapshot()
+    reads = resp_ws.calls["get_all_values"]
+    assert ns._snapshot() is snap and resp_ws.calls["get_all_values"] == reads
+
+    resp_ws.v[2][1] = "바뀐이름"
+    assert ns._SNAPSHOTS.peek() is snap                    # 읽기 경로는 I/O 없이 기존 스냅샷
+    new = ns._SNAPSHOTS.refresh()
+    assert new is not snap and new.version == snap.version + 1
+    assert new.index.lookup("name", "바뀐이름") == 3 and snap.index.lookup("name", "바뀐이름") is None
+
+def test_patch_survives_refresh_that_started_before_the_write(ns, resp_ws, monkeypatch):
+    row = 4
+    store = ns._SNAPSHOTS
+    real = ns.ws_responses.get_all_values
+
+    def read_then_write():
+        values = real()                                    # 시트를 읽은 직후 서버가 uid 를 씀
+        store.patch(row, uid="04BEEF")
+        return values
+    monkeypatch.setattr(ns.ws_responses, "get_all_values", read_then_write)
+    snap = store.refresh()
+    assert snap.index.lookup("uid", "04BEEF") == row
+    assert store._dirty                                    # 다음 갱신에서 시트 값으로 다시 확인
+
+@pytest.mark.parametrize("stale", ["ttl", "dirty"])
+def test_stale_snapshot_wakes_background_refresh(ns, stale, monkeypatch):
+    store = ns._SNAPSHOTS
+    store._wake.clear()
+    if stale == "ttl":
+        monkeypatch.setattr(store._snap, "loaded_at", store._snap.loaded_at - store.ttl_sec - 1)
+    else:
+        store.invalidate()
+    assert store.peek() is not None and store._wake.is_set()
@@ -0,0 +1,74 @@
+# storage.SqliteStore: 시트와 같은 A1 읽기/쓰기, 키 인덱스 lookup, 시트 미러 outbox
+import pytest
+
+import storage
+
+HEADER = ["타임스탬프", "이름", "token", "uid"]
+
+@pytest.fixture
+def table(tmp_path):
+    st = storage.SqliteStore(str(tmp_path / "nfc.sqlite3"))
+    t = st.table("resp")
+    t.import_values([HEADER, ["t1", "김철수", "TOKA", ""], ["t2", "이영희", "TOKB", "04AABB"]])
+    return t
+
+def test_values_round_trip(table):
+    assert table.get_all_values() == [HEADER, ["t1", "김철수", "TOKA", ""], ["t2", "이영희", "TOKB", "04AABB"]]
+    assert table.row_values(1) == HEADER
+    assert table.batch_get(["C2:D3", "B:B"]) == [[["TOKA", ""], ["TOKB", "04AABB"]],
+                                                 [["이름"], ["김철수"], ["이영희"]]]
+
+def test_batch_update_pads_rows_and_columns(table):
+    table.batch_update([{"range": "D2", "values": [["04CCDD"]]},
+                        {"range": "A5:C5", "values": [["t5", "박민수", "TOKE"]]}])
+    values = table.get_all_values()
+    assert len(values) == 5 and values[3] == ["", "", "", ""]          # 시트처럼 빈 행 포함
+    assert values[1][3] == "04CCDD" and values[4][:3] == ["t5", "박민수", "TOKE"]
+
+def test_lookup_follows_writes(table):
+    assert table.lookup("token", "TOKA") == 2
+    assert table.lookup("uid", "04aabb") == 3
+    table.batch_update([{"range": "C2", "values": [["TOKZ"]]}])
+    assert table.lookup("token", "TOKA") is None and table.lookup("token", "TOKZ") == 2
+    table.update("A4:C4", [["t4", "최지훈", "TOKA"]])
+    assert table.lookup("token", "TOKA") == 4
+
+def test_ensure_cols_reindexes_on_header_change(tmp_path):
+    t = storage.SqliteStore(str(tmp_path / "db.sqlite3")).table("resp")
+    t.import_values([["이름", "x"], ["김철수", "04AA"]])
+    assert t.lookup("uid", "04AA") is None
+    assert t.ensure_cols(["uid"]) == {"uid": 3}
+    t.batch_update([{"range": "B1", "values": [["uid"]]}])             # 헤더 변경 → 전체 재색인
+    assert t.lookup("uid", "04AA") == 2
+
+class _MirrorTable:
+    def __init__(self, values):
+        self.values, self.updates = values, []
+
+    def get_all_values(self):
+        return [r[:] for r in self.values]
+
+    def batch_update(self, data, value_input_option="RAW"):
+        self.updates.append(data)
+
+class _Mirror:
+    def __init__(self, values):
+        self.t = _MirrorTable(values)
+
+    def table(self, name):
+        return self.t
+
+def test_mirror_seeds_from_sheet_and_syncs_outbox_in_one_call(tmp_path):
+    mirror = _Mirror([HEADER, ["t1", "김철수", "TOKA", ""]])
+    st = storage.SqliteStore(str(tmp_path / "db.sqlite3"), mirror=mirror)
+    t = st.table("resp")
+    assert t.lookup("token", "TOKA") == 2
+    t.batch_update([{"range": "D2", "values": [["04AA"]]}])
+    t.batch_update([{"range": "C3", "values": [["TOKB"]]}])
+    assert st.sync_once() == 2
+    assert mirror.t.updates == [[{"range": "D2", "values": [["04AA"]]}, {"range": "C3", "values": [["TOKB"]]}]]
+    assert st.sync_once() == 0
+
+def test_open_store_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        storage.open_store("nope")
@@ -0,0 +1,138 @@
+# taplog: 세그먼트 기록/읽기/회전/보존, 잘린 레코드, 분 단위 집계와 /admin/stats
+import os
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import taplog
+
+T0 = 1_767_225_600.0                                  # 2026-01-01T00:00:00Z (분 경계)
+
+def test_append_and_read_round_trip(tmp_path):
+    log = taplog.TapLog(str(tmp_path))
+    log.start()
+    log.append(T0, "TOKA", "gate", None)
+    log.append(T0 + 1.5, "TOKB", None, "spring\nfair")
+    log.append(T0 + 2, "TOKA", "gate", None)
+    log.close()
+    [base] = log.segments()
+    events, strings = log.read(base)
+    assert events["ts_ms"].tolist() == [T0 * 1000, T0 * 1000 + 1500, T0 * 1000 + 2000]
+    assert [strings[i] for i in events["token"]] == ["TOKA", "TOKB", "TOKA"]
+    assert strings[events["campaign"][1]] == "spring fair"          # 줄바꿈은 공백으로
+    assert events["source"][1] == 0 and strings[0] == ""
+    assert os.path.getsize(base + ".bin") == 3 * taplog.EVENT.itemsize
+
+def test_truncated_record_is_dropped(tmp_path):
+    log = taplog.TapLog(str(tmp_path))
+    log.append(T0, "TOKA")
+    log.append(T0 + 1, "TOKB")
+    log.close()
+    [base] = log.segments()
+    with open(base + ".bin", "ab") as f:
+        f.write(b"\x01\x02\x03")                                  # 비정상 종료로 잘린 레코드
+    events, _ = log.read(base)
+    assert len(events) == 2
+
+def test_rotates_by_size_and_time(tmp_path):
+    log = taplog.TapLog(str(tmp_path), segment_bytes=2 * taplog.EVENT.itemsize, segment_sec=60)
+    for i in range(5):
+        log.append(T0 + i, f"T{i}")                             # 2건마다 새 세그먼트
+    log.append(T0 + 120, "late")                                # 시간 초과 → 새 세그먼트
+    log.close()
+    counts = [len(log.read(b)[0]) for b in log.segments()]
+    assert counts == [2, 2, 1, 1]
+
+def test_history_skips_current_segment_and_prunes_old(tmp_path):
+    log = taplog.TapLog(str(tmp_path), retention_sec=3600)
+    log.append(T0, "OLD")
+    log.close()
+    [old] = log.segments()
+    os.utime(old + ".bin", (T0, T0))
+    log.start()                                                 # 지금 시각으로 회전 → 오래된 세그먼트 정리
+    assert old not in log.segments()
+    log.append(os.path.getmtime(log._seg.base + ".bin"), "NOW")
+    assert list(log.history(0)) == []                           # 쓰는 중인 세그먼트는 제외
+    log.close()
+
+def test_stats_series_and_top():
+    st = taplog.TapStats(window_sec=3600)
+    for ts, tok, src, camp in [(T0 + 5, "A", "gate", "c1"), (T0 + 30, "A", "gate", "c1"),
+                               (T0 + 70, "B", None, None), (T0 + 200, "A", "booth", "c2")]:
+        st.add(ts, tok, src, camp)
+    q = st.query(window_sec=240, step_sec=120, top=1, now=T0 + 230)
+    assert q["taps"] == 4 and q["unique_visitors"] == 2
+    assert [(s["taps"], s["unique"]) for s in q["series"]] == [(3, 2), (1, 1)]
+    assert q["top_tokens"] == [{"token": "A", "taps": 3}] and q["by_source"] == {"gate": 2}
+    assert st.query(window_sec=240, top=0, now=T0 + 230)["by_campaign"] == {"c1": 2, taplog.TapStats.NONE: 1, "c2": 1}
+
+def test_stats_window_evicts_old_minutes():
+    st = taplog.TapStats(window_sec=120)
+    st.add(T0, "A")
+    st.add(T0 + 600, "B")
+    st.add(T0, "late")                                          # 보관 기간 밖 → 무시
+    assert st.query(window_sec=120, now=T0 + 600)["taps"] == 1
+    assert st.total == 2 and len(st._b) == 1
+
+def test_add_many_matches_add(tmp_path):
+    log = taplog.TapLog(str(tmp_path))
+    direct = taplog.TapStats()
+    rows = [(T0 + i * 17, f"T{i % 4}", "gate" if i % 2 else None, f"c{i % 3}") for i in range(50)]
+    for r in rows:
+        log.append(*r)
+        direct.add(*r)
+    log.close()
+    replayed = taplog.TapStats()
+    for base in log.segments():
+        replayed.add_many(*log.read(base))
+    now = T0 + 50 * 17
+    assert replayed.query(3600, now=now) == direct.query(3600, now=now)
+
+def test_append_is_written_by_writer_thread(tmp_path, monkeypatch):
+    log = taplog.TapLog(str(tmp_path))
+    threads, flush = [], log.flush
+    def spy():
+        threads.append(threading.current_thread().name)
+        flush()
+    monkeypatch.setattr(log, "flush", spy)
+    for i in range(100):
+        log.append(T0 + i, f"T{i % 7}")
+    log.close()
+    assert threads[0] == "taplog-writer"                        # close() 는 남은 큐만 정리
+    [base] = log.segments()
+    assert len(log.read(base)[0]) == 100
+
+def test_prune_runs_outside_segment_lock(tmp_path, monkeypatch):
+    log = taplog.TapLog(str(tmp_path), segment_bytes=taplog.EVENT.itemsize, retention_sec=60)
+    held, prune = [], log._prune
+    def spy(now, current):
+        held.append(log._lock.locked())
+        prune(now, current)
+    monkeypatch.setattr(log, "_prune", spy)
+    log.append(T0, "A")
+    log.append(T0 + 1, "B")                                     # 1건마다 새 세그먼트
+    log.flush()
+    for base in log.segments():
+        os.utime(base + ".bin", (T0, T0))                       # 보존 기간이 지난 세그먼트로
+    log.append(T0 + 2, "C")
+    log.close()
+    assert held and not any(held)
+    [base] = log.segments()
+    assert log.read(base)[1][1] == "C"
+
+@pytest.fixture
+def client(ns, monkeypatch, tmp_path):
+    monkeypatch.setattr(ns, "_TAPSTATS", taplog.TapStats(ns.TAPSTATS_WINDOW_SEC))
+    monkeypatch.setattr(ns, "_TOUCHES", ns._TouchBuffer(3600, 1000, str(tmp_path / "j.jsonl")))
+    return TestClient(ns.app)
+
+def test_touch_feeds_admin_stats(ns, client):
+    snap = ns._snapshot()
+    token = next(snap.index.raw(r, "token") for r in snap.index.rows() if snap.index.raw(r, "token"))
+    for _ in range(3):
+        assert client.post(f"/u/{token}/touch", json={"source": "gate", "campaign": "c1"}).status_code == 200
+    assert client.get("/admin/stats?key=wrong").status_code == 403
+    assert client.get(f"/admin/stats?key={ns.ADMIN_KEY}&window={ns.TAPSTATS_WINDOW_SEC + 60}").status_code == 400
+    body = client.get(f"/admin/stats?key={ns.ADMIN_KEY}").json()
+    assert body["taps"] == 3 and body["by_campaign"] == {"c1": 3} and body["top_tokens"][0]["token"] == token
@@ -0,0 +1,55 @@
+# 토큰 발급: 빈 행에만, 연속 구간으로 묶어 batch_update 1회, 기존 토큰과 대소문자 무시 중복 없음
+import itertools
+
+from fastapi.testclient import TestClient
+
+def test_token_ranges_groups_contiguous_rows(ns):
+    data = ns._token_ranges("G", {5: "a", 2: "b", 3: "c", 9: "d", 6: "e"})
+    assert data == [{"range": "G2:G3", "values": [["b"], ["c"]]},
+                    {"range": "G5:G6", "values": [["a"], ["e"]]},
+                    {"range": "G9:G9", "values": [["d"]]}]
+
+def test_fills_only_empty_rows_in_one_write(ns, resp_ws):
+    before = [r[-1] for r in resp_ws.v[1:]]
+    calls = dict(resp_ws.calls)
+    out = ns._fill_missing_tokens()
+    after = [r[-1] for r in resp_ws.v[1:]]
+    assert out["created"] == before.count("") and all(after)
+    assert [a for a, b in zip(after, before) if b] == [b for b in before if b]   # 기존 토큰 그대로
+    assert resp_ws.calls["batch_update"] - calls.get("batch_update", 0) == 1
+    assert resp_ws.calls["update"] == calls.get("update", 0)
+    assert out["ranges"] == len(ns._token_ranges("G", {r: "" for r, b in enumerate(before, start=2) if not b}))
+
+    snap = ns._snapshot()
+    for row, token in enumerate(after, start=2):
+        assert snap.index.lookup("token", token) == row                  # patch 로 바로 조회 가능
+
+    again = ns._fill_missing_tokens()
+    assert again["created"] == 0 and resp_ws.calls["batch_update"] - calls.get("batch_update", 0) == 1
+
+def test_new_tokens_avoid_existing_ones_ignoring_case(ns, resp_ws, monkeypatch):
+    existing = next(r[-1] for r in resp_ws.v[1:] if r[-1])
+    fresh = (f"NEW{i:05d}" for i in itertools.count())
+    picks = iter([existing.lower(), existing.swapcase()])
+    monkeypatch.setattr(ns, "_gen_token", lambda length=8: next(picks, None) or next(fresh))
+    ns._fill_missing_tokens()
+    tokens = [r[-1].lower() for r in resp_ws.v[1:]]
+    assert len(tokens) == len(set(tokens))
+
+def test_generate_tokens_endpoint(ns, resp_ws):
+    client = TestClient(ns.app)
+    assert client.post("/admin/generate-tokens?key=wrong").status_code == 403
+    r = client.post(f"/admin/generate-tokens?key={ns.ADMIN_KEY}")
+    assert r.status_code == 200 and r.json()["created"] > 0
+    assert all(row[-1] for row in resp_ws.v[1:])
+
+def test_fill_does_not_count_index_lookups(ns, resp_ws):
+    def lookups():
+        return sum(ns.INDEX_LOOKUPS.value(field=f, result=r) for f in ns._SheetIndex.FIELDS for r in ("hit", "miss"))
+    before = lookups()
+    assert ns._fill_missing_tokens()["created"] > 0
+    assert lookups() == before                                        # 중복 검사는 메트릭 밖에서
+    idx = ns._snapshot().index
+    token = idx.raw(min(idx.rows()), "token")
+    assert idx.has("token", token.lower()) and not idx.has("token", token + "x")
+    assert lookups() == before
@@ -0,0 +1,146 @@
+# _TouchBuffer: 저널 복구 / flush 실패 / 예상 scan_count
+import json
+import threading
+
+import pytest
+
+def _scan_count(ns, resp_ws, row: int) -> int:
+    header = resp_ws.v[0]
+    if "scan_count" not in header:
+        return 0
+    cells = resp_ws.v[row - 1]
+    col = header.index("scan_count")
+    return ns._to_int(cells[col]) if col < len(cells) else 0
+
+def _token_row(ns, i: int = 0) -> tuple[str, int]:
+    snap = ns._snapshot()
+    rows = [r for r in snap.index.rows() if snap.index.raw(r, "token")]
+    return snap.index.raw(rows[i], "token"), rows[i]
+
+def _journal(path, *recs):
+    with open(path, "w", encoding="utf-8") as f:
+        for rec in recs:
+            f.write(json.dumps(rec) + "\n")
+
+def _rec(token, count=1, ts="2026-01-01T00:00:00", source=None, campaign=None):
+    return {"token": token, "count": count, "ts": ts, "source": source, "campaign": campaign}
+
+def test_flush_batches_taps_into_one_write(ns, resp_ws, tmp_path):
+    buf = ns._TouchBuffer(3600, 1000, str(tmp_path / "j.jsonl"))
+    token, row = _token_row(ns)
+    for _ in range(5):
+        buf.add(row, token, "2026-01-01T00:00:00", source="gate")
+    assert buf.depth() == 5
+    ns._require_cols(["scan_count", "last_seen_at", "source"])   # 헤더 추가는 처음 한 번만
+    calls = resp_ws.calls["batch_update"]
+    assert buf.flush() == 1
+    assert resp_ws.calls["batch_update"] == calls + 1
+    assert _scan_count(ns, resp_ws, row) == 5
+    assert buf.depth() == 0
+    assert (tmp_path / "j.jsonl").read_text() == ""
+
+def test_replay_does_not_double_count_taps_added_after_start(ns, resp_ws, tmp_path):
+    path = tmp_path / "j.jsonl"
+    token, row = _token_row(ns)
+    _journal(path, _rec(token, 3))
+    buf = ns._TouchBuffer(3600, 1000, str(path))
+    buf._mark_replay()                                  # start() 와 같은 시점
+    buf.add(row, token, "2026-01-01T00:00:01")          # 복구 스레드보다 먼저 들어온 스캔
+    buf._replay()
+    assert buf.depth() == 4
+    buf.flush()
+    assert _scan_count(ns, resp_ws, row) == 4
+
+def test_replay_skips_truncated_line_and_keeps_new_records(ns, resp_ws, tmp_path):
+    path = tmp_path / "j.jsonl"
+    token, row = _token_row(ns)
+    path.write_text(json.dumps(_rec(token, 2)) + "\n" + '{"tok', encoding="utf-8")
+    buf = ns._TouchBuffer(3600, 1000, str(path))
+    buf._mark_replay()
+    buf.add(row, token, "2026-01-01T00:00:01")
+    buf._replay()
+    buf.flush()
+    assert _scan_count(ns, resp_ws, row) == 3
+
+def test_flush_before_replay_keeps_previous_run(ns, resp_ws, tmp_path):
+    path = tmp_path / "j.jsonl"
+    token, row = _token_row(ns)
+    _journal(path, _rec(token, 2))
+    buf = ns._TouchBuffer(3600, 1000, str(path))
+    buf._mark_replay()
+    buf.add(row, token, "2026-01-01T00:00:01")
+    buf.flush()                                         # 복구 스레드가 돌기 전에 flush
+    assert _scan_count(ns, resp_ws, row) == 3
+    buf._replay()
+    assert buf.depth() == 0
+
+def test_failed_write_is_not_counted_twice(ns, resp_ws, tmp_path, monkeypatch):
+    buf = ns._TouchBuffer(3600, 1000, str(tmp_path / "j.jsonl"))
+    token, row = _token_row(ns)
+    buf.add(row, token, "2026-01-01T00:00:00")
+    buf.flush()
+    assert buf.projected(row) == 1
+
+    buf.add(row, token, "2026-01-01T00:00:01")
+    buf.add(row, token, "2026-01-01T00:00:02")
+
+    def boom(*a, **kw):
+        raise RuntimeError("sheets down")
+    monkeypatch.setattr(resp_ws, "batch_update", boom)
+    with pytest.raises(RuntimeError):
+        buf.flush()
+    assert buf.depth() == 2
+    assert buf.projected(row) == 3                      # 1(시트) + 2(미반영)
+
+    monkeypatch.undo()
+    buf.flush()
+    assert _scan_count(ns, resp_ws, row) == 3
+    assert buf.projected(row) == 3
+
+def test_add_leaves_journal_io_to_writer_thread(ns, tmp_path, monkeypatch):
+    path = tmp_path / "j.jsonl"
+    buf = ns._TouchBuffer(3600, 1000, str(path))
+    calls, sync, closing = [], buf._journal_sync, []
+    def spy():
+        calls.append((threading.current_thread().name, bool(closing)))
+        sync()
+    monkeypatch.setattr(buf, "_journal_sync", spy)
+    token, row = _token_row(ns)
+    for i in range(3):
+        buf.add(row, token, f"2026-01-01T00:00:0{i}", source="gate")
+    closing.append(True)
+    buf._journal_close()
+    assert any(name == "touch-journal" for name, _ in calls)
+    assert all(name == "touch-journal" or after_close for name, after_close in calls)   # 호출한 쪽은 파일을 안 만짐
+    recs = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [r["ts"] for r in recs] == [f"2026-01-01T00:00:0{i}" for i in range(3)]
+
+def test_compaction_drops_queued_records_already_in_pending(ns, resp_ws, tmp_path):
+    token, row = _token_row(ns)
+    for n in range(20):                                 # 쓰기 스레드와 압축 순서가 바뀌어도 중복 기록 없음
+        path = tmp_path / f"j{n}.jsonl"
+        buf = ns._TouchBuffer(3600, 1000, str(path))
+        for i in range(5):
+            buf.add(row, token, "2026-01-01T00:00:00")
+        buf.flush()
+        buf.add(row, token, "2026-01-01T00:00:01")
+        buf._journal_close()
+        recs = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+        assert sum(r["count"] for r in recs) == 1
+
+def test_stop_keeps_unflushed_taps_in_journal(ns, resp_ws, tmp_path, monkeypatch):
+    path = tmp_path / "j.jsonl"
+    buf = ns._TouchBuffer(3600, 1000, str(path))
+    token, row = _token_row(ns)
+    buf.add(row, token, "2026-01-01T00:00:00")
+    buf.add(row, token, "2026-01-01T00:00:01")
+
+    def boom(*a, **kw):
+        raise RuntimeError("sheets down")
+    monkeypatch.setattr(resp_ws, "batch_update", boom)
+    buf.stop()                                          # flush 실패 → 큐에 남은 기록도 저널에
+    monkeypatch.undo()
+    again = ns._TouchBuffer(3600, 1000, str(path))
+    again._mark_replay()
+    again._replay()
+    assert again.depth() == 2
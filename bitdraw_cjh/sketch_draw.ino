@@ -97,6 +97,28 @@ void drawBMP(File &bmpFile, int16_t x, int16_t y) {
   Serial.println("BMP 이미지 그리기 완료");
 }
 
+// 서버(framebuffer.py)가 만든 1bpp 프레임버퍼를 변환 없이 그대로 출력
+// 형식: 패널 해상도(648x480), 위 행부터, 왼쪽 픽셀이 MSB, 1 = 흰색 / 0 = 검정
+bool drawFrame1bpp(File &frameFile) {
+  const int16_t w = display.epd2.WIDTH, h = display.epd2.HEIGHT;
+  const size_t len = (size_t)((w + 7) / 8) * h;
+  if (frameFile.size() != len) {
+    Serial.printf("프레임버퍼 크기 불일치: %u (기대값 %u)\n", (unsigned)frameFile.size(), (unsigned)len);
+    return false;
+  }
+  uint8_t *frame = (uint8_t *)malloc(len);
+  if (!frame) {
+    Serial.println("메모리 할당 실패!");
+    return false;
+  }
+  frameFile.readBytes((char *)frame, len);
+  display.writeImage(frame, 0, 0, w, h);  // 회전 없이 패널 네이티브 순서로 기록
+  display.refresh();
+  free(frame);
+  Serial.println("프레임버퍼 출력 완료");
+  return true;
+}
+
 
 void setup()
 {
@@ -116,6 +138,14 @@ void setup()
     return;
   }
 
+  // 서버에서 받은 프레임버퍼가 있으면 그대로 출력 (픽셀 변환 없음)
+  if (SPIFFS.exists("/map.1bpp")) {
+    File frameFile = SPIFFS.open("/map.1bpp", "r");
+    bool ok = drawFrame1bpp(frameFile);
+    frameFile.close();
+    if (ok) return;
+  }
+
   // BMP 이미지 열기
   File bmpFile = SPIFFS.open("/tiger_320x200x24.bmp", "r");
   if (!bmpFile) {
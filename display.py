@@ -1,52 +1,47 @@
-from fastapi import FastAPI, HTTPException
-import gspread
-import pandas as pd
+# display.py  (nfc_server 의 /display 를 그대로 전달하는 얇은 프록시)
+# 시트는 nfc_server 의 스냅샷 캐시에서만 읽는다. 응답 모양은 예전 그대로(이름/학교/.../Top_Industries).
+# 예전과 달리 클러스터 시트에 행이 없으면 404 가 아니라 Top_Industries 를 빈 문자열로 돌려준다
+# (설문 응답에 없는 이름만 404).
+# 명찰 기기는 nfc_server 의 GET /display/{token}?fmt=bin 을 직접 쓰는 것을 권장.
+from fastapi import FastAPI, HTTPException, Request, Response
+import os, json, urllib.request, urllib.error
+from urllib.parse import quote
 
 app = FastAPI(debug=True)
 
-# 1) 경로 채우기
-SERVICE_ACCOUNT_FILE = r""
-try:
-    gc = gspread.service_account(filename=SERVICE_ACCOUNT_FILE)
-except Exception as e:
-    print("❌ service_account 에러:", e)
-    raise
+NFC_SERVER_URL = os.getenv("NFC_SERVER_URL", "http://localhost:8000").rstrip("/")
 
-# 2) 시트 열기
-spreadsheet_url = "https://docs.google.com/spreadsheets/d/1kkt336f1G-XqfDuwCUOnqpKlxTcnwLQy-XS4SQv6lM0/edit"
-sh = gc.open_by_url(spreadsheet_url)
-print(">> available worksheets:", [ws.title for ws in sh.worksheets()])
-
-# 3) 워크시트 접근 (이름 확인 후 정확히 매칭)
-ws_responses = sh.worksheet("설문지 응답 시트")
-ws_cluster   = sh.worksheet("Clustered Result with Distance")
+def _fetch(path: str, etag: str | None):
+    req = urllib.request.Request(NFC_SERVER_URL + path, headers={"If-None-Match": etag} if etag else {})
+    try:
+        with urllib.request.urlopen(req, timeout=10) as r:
+            return r.status, r.headers, r.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
 
 @app.get("/display/{name}")
-def get_display_data(name: str):
+def get_display_data(request: Request, name: str):
     try:
-        df_resp = pd.DataFrame(ws_responses.get_all_records())
-        resp = df_resp[df_resp["이름"] == name]
-        if resp.empty:
-            raise HTTPException(status_code=404, detail="설문 응답에 사용자 없음")
-        resp = resp.iloc[0]
-
-        df_clu = pd.DataFrame(ws_cluster.get_all_records())
-        clu = df_clu[df_clu["이름"] == name]
-        if clu.empty:
-            raise HTTPException(status_code=404, detail="클러스터 시트에 사용자 없음")
-        clu = clu.iloc[0]
-
-        return {
-            "이름": resp["이름"],
-            "학교": resp.get("학교", ""),
-            "학년": resp.get("학년", ""),
-            "전공": resp.get("전공", ""),
-            "이메일": resp.get("이메일 주소", resp.get("이메일", "")),
-            "Top_Industries": clu.get("Top Industries", "")
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
+        status, headers, body = _fetch(f"/display/name/{quote(name, safe='')}", request.headers.get("if-none-match"))
+    except OSError as e:
         print("❌ get_display_data 에러:", repr(e))
-        raise HTTPException(status_code=500, detail="Internal Server Error")
-
+        raise HTTPException(status_code=502, detail="nfc_server 에 연결할 수 없습니다")
+    keep = {k: headers[k] for k in ("ETag", "X-Display-Version", "Cache-Control") if headers.get(k)}
+    if status == 304:
+        return Response(status_code=304, headers=keep)
+    if status != 200:
+        try:
+            detail = json.loads(body).get("detail")
+        except ValueError:
+            detail = None
+        raise HTTPException(status_code=status, detail=detail or "Internal Server Error")
+    d = json.loads(body)
+    payload = {
+        "이름": d["name"],
+        "학교": d["school"],
+        "학년": d["year"],
+        "전공": d["major"],
+        "이메일": d["email"],
+        "Top_Industries": d["top"],
+    }
+    return Response(json.dumps(payload, ensure_ascii=False), media_type="application/json", headers=keep)
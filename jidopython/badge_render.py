@@ -0,0 +1,177 @@
+# badge_render.py  (참가자 명찰 일괄 렌더링: 프로세스 풀 + 내용 주소 캐시)
+#
+#   python badge_render.py --source http://localhost:8000 --out badges        # nfc_server 의 /display.json
+#   python badge_render.py --source attendees.json --workers 8 --panel epd5in65f
+#
+# 명찰마다 패널 프레임버퍼(<해시>.1bpp 또는 .4bpp)와 BMP(<해시>.bmp)를 만든다.
+# 파일 이름 = 명찰 내용(이름/학교/전공/추천/토큰 URL) + 레이아웃 버전 + 패널의 해시라서
+# 바뀌지 않은 명찰은 다시 그리지 않는다. index.json(토큰 → 해시)을 flask_server.py 가 /badge/<token>.bmp 로 내보낸다.
+# 글꼴/바탕 레이아웃은 작업 프로세스마다 한 번만 읽어 둔다.
+import argparse, hashlib, json, os, time, urllib.request
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageDraw, ImageFont
+import numpy as np
+from framebuffer import ACEP7_PALETTE, PANELS, pack_1bpp, pack_4bpp, quantize
+
+try:
+    import qrcode                    # 선택: 설치되어 있으면 토큰 URL 을 QR 로 표시
+except ImportError:
+    qrcode = None
+
+LAYOUT_VERSION = 1                   # 레이아웃을 바꾸면 올릴 것 (캐시 전체 무효화)
+FONT_CANDIDATES = [
+    os.getenv("BADGE_FONT", ""),
+    r"C:\Windows\Fonts\malgun.ttf",
+    "/usr/share/fonts/truetype/nanum/NanumGothic.ttf",
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/System/Library/Fonts/AppleSDGothicNeo.ttc",
+]
+FIELDS = ("token", "name", "school", "year", "major", "top")
+
+def badge_key(item: dict, panel: str, base_url: str) -> str:
+    payload = [LAYOUT_VERSION, panel, base_url, qrcode is not None] + [str(item.get(f, "")) for f in FIELDS]
+    return hashlib.sha1(json.dumps(payload, ensure_ascii=False).encode("utf-8")).hexdigest()[:20]
+
+# ----- 작업 프로세스 (initializer 에서 글꼴/바탕을 한 번만 준비) -----
+_W = None                            # 프로세스별 상태: panel, fonts, template, out_dir, base_url
+
+def _font(size: int):
+    for path in FONT_CANDIDATES:
+        if path and os.path.exists(path):
+            return ImageFont.truetype(path, size)
+    return ImageFont.load_default(size)          # 한글 글꼴이 없으면 기본 글꼴 (BADGE_FONT 로 지정 권장)
+
+def _init_worker(panel: str, out_dir: str, base_url: str):
+    global _W
+    p = PANELS[panel]
+    accent = (0, 0, 0) if p.mode == "bw" else (255, 0, 0)
+    template = Image.new("RGB", (p.width, p.height), (255, 255, 255))
+    d = ImageDraw.Draw(template)
+    d.rectangle((0, 0, p.width, 14), fill=accent)                      # 위쪽 띠
+    d.line((32, p.height * 0.52, p.width - 32, p.height * 0.52), fill=(0, 0, 0), width=2)
+    _W = {
+        "panel": panel, "mode": p.mode, "out_dir": out_dir, "base_url": base_url.rstrip("/"),
+        "template": template, "accent": accent,
+        "fonts": {"name": _font(72), "info": _font(30), "label": _font(24), "small": _font(18)},
+    }
+
+def _fit_text(draw, text: str, font, width: int) -> str:
+    if draw.textlength(text, font=font) <= width:
+        return text
+    while text and draw.textlength(text + "…", font=font) > width:
+        text = text[:-1]
+    return text + "…"
+
+def _draw(item: dict) -> Image.Image:
+    w = _W
+    img = w["template"].copy()
+    d = ImageDraw.Draw(img)
+    d.fontmode = "1"                                                   # 안티앨리어싱 없이 (전자종이에서 번짐 방지)
+    f = w["fonts"]
+    width, height = img.size
+    qr_size = 190 if qrcode is not None else 0
+    text_w = width - 64 - (qr_size + 24 if qr_size else 0)
+
+    d.text((32, 48), _fit_text(d, item.get("name", ""), f["name"], width - 64), font=f["name"], fill=(0, 0, 0))
+    school = " · ".join(x for x in (item.get("school", ""), f"{item['year']}학년" if item.get("year") else "") if x)
+    d.text((32, 148), _fit_text(d, school, f["info"], width - 64), font=f["info"], fill=(0, 0, 0))
+    d.text((32, 192), _fit_text(d, item.get("major", ""), f["info"], width - 64), font=f["info"], fill=(0, 0, 0))
+
+    top = int(height * 0.52) + 24
+    d.text((32, top), "추천 산업군", font=f["label"], fill=w["accent"])
+    for i, line in enumerate([s.strip() for s in str(item.get("top", "")).split(",") if s.strip()][:4]):
+        d.text((32, top + 40 + i * 40), _fit_text(d, line, f["info"], text_w), font=f["info"], fill=(0, 0, 0))
+
+    url = f"{w['base_url']}/u/{item.get('token', '')}"
+    if qrcode is not None:
+        qr = qrcode.QRCode(border=1, box_size=1)
+        qr.add_data(url)
+        qr.make(fit=True)
+        code = qr.make_image(fill_color="black", back_color="white").convert("RGB")
+        img.paste(code.resize((qr_size, qr_size), Image.NEAREST), (width - 32 - qr_size, height - 32 - qr_size))
+    else:
+        d.text((32, height - 40), _fit_text(d, url, f["small"], width - 64), font=f["small"], fill=(0, 0, 0))
+    return img
+
+def _render_one(job: tuple[str, dict]) -> str:
+    """명찰 1장 렌더링 → <해시>.1bpp/.4bpp + <해시>.bmp (원자적 교체). 해시 반환"""
+    key, item = job
+    w = _W
+    rgb = np.asarray(_draw(item))
+    codes = quantize(rgb, w["mode"], "none")                          # 글자는 디더링 없이 선명하게
+    base = os.path.join(w["out_dir"], key)
+    if w["mode"] == "bw":
+        frame, ext = pack_1bpp(codes), ".1bpp"
+        bmp = Image.frombytes("1", (codes.shape[1], codes.shape[0]), frame)   # 1비트 BMP (같은 비트 순서)
+    else:
+        frame, ext = pack_4bpp(codes), ".4bpp"
+        bmp = Image.fromarray(codes, "P")                                  # 패널 색 코드 = 팔레트 인덱스
+        bmp.putpalette(ACEP7_PALETTE.astype(np.uint8).ravel().tolist())
+    for path, write in ((base + ext, lambda f: f.write(frame)), (base + ".bmp", lambda f: bmp.save(f, format="BMP"))):
+        with open(path + ".tmp", "wb") as f:
+            write(f)
+        os.replace(path + ".tmp", path)
+    return key
+
+# ----- 일괄 렌더링 -----
+def load_items(source: str) -> list[dict]:
+    """nfc_server 주소(/display.json) 또는 같은 모양의 JSON 파일"""
+    if source.startswith(("http://", "https://")):
+        with urllib.request.urlopen(source.rstrip("/") + "/display.json", timeout=60) as r:
+            data = json.load(r)
+    else:
+        with open(source, encoding="utf-8") as f:
+            data = json.load(f)
+    items = data["items"] if isinstance(data, dict) else data
+    return [it for it in items if it.get("token")]
+
+def render_all(items: list[dict], out_dir: str = "badges", panel: str = "gdeq0583t31",
+               base_url: str = "http://localhost:8000", workers: int | None = None, prune: bool = False) -> dict:
+    os.makedirs(out_dir, exist_ok=True)
+    ext = ".1bpp" if PANELS[panel].mode == "bw" else ".4bpp"
+    index = {it["token"]: badge_key(it, panel, base_url) for it in items}
+    todo = {}
+    for it in items:
+        key = index[it["token"]]
+        if key not in todo and not os.path.exists(os.path.join(out_dir, key + ext)):
+            todo[key] = it
+
+    t0 = time.perf_counter()
+    if todo:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(panel, out_dir, base_url)) as pool:
+            for _ in pool.map(_render_one, todo.items(), chunksize=max(1, len(todo) // (workers * 4))):
+                pass
+
+    tmp = os.path.join(out_dir, "index.json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"panel": panel, "ext": ext, "badges": index}, f, ensure_ascii=False)
+    os.replace(tmp, os.path.join(out_dir, "index.json"))
+
+    removed = 0
+    if prune:                                                          # index 에 없는 옛 명찰 파일 삭제
+        keep = set(index.values())
+        for name in os.listdir(out_dir):
+            stem, dot, suffix = name.partition(".")
+            if dot and suffix in ("bmp", "1bpp", "4bpp") and stem not in keep:
+                os.remove(os.path.join(out_dir, name))
+                removed += 1
+    return {"badges": len(index), "rendered": len(todo), "cached": len(set(index.values())) - len(todo),
+            "removed": removed, "seconds": round(time.perf_counter() - t0, 3)}
+
+def main():
+    ap = argparse.ArgumentParser(description="render per-attendee badge framebuffers")
+    ap.add_argument("--source", default="http://localhost:8000", help="nfc_server 주소 또는 JSON 파일")
+    ap.add_argument("--out", default=os.getenv("BADGE_DIR", "badges"))
+    ap.add_argument("--panel", default="gdeq0583t31", choices=sorted(PANELS))
+    ap.add_argument("--base-url", default=os.getenv("BADGE_BASE_URL", "http://localhost:8000"), help="QR 에 넣을 프로필 주소")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--prune", action="store_true", help="더 이상 쓰지 않는 명찰 파일 삭제")
+    args = ap.parse_args()
+    stats = render_all(load_items(args.source), args.out, args.panel, args.base_url, args.workers, args.prune)
+    print(json.dumps(stats, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
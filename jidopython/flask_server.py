@@ -1,13 +1,200 @@
-from flask import Flask, send_file
+from flask import Flask, Response, abort, request
+from collections import deque
+import gzip, json, os, struct, threading, zlib
+import numpy as np
+from framebuffer import PANELS
+
 app = Flask(__name__)
 
+# 파일은 실행 위치(CWD)가 아니라 이 파일이 있는 폴더 기준으로 찾는다
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 이미지는 메모리에 두고 파일이 바뀌었을 때만(mtime/크기) 다시 읽는다
+HISTORY = int(os.getenv("MAP_HISTORY", "8"))      # 델타 계산용으로 기억할 이전 버전 수
+TILE_ROWS, TILE_BYTES = 16, 8                     # 델타 타일 크기 (행 수 x 패킹된 바이트 수)
+
+# 파일 → (mimetype, 패널 이름: 패킹된 프레임버퍼면 델타 지원)
+IMAGES = {
+    "map.bmp":  ("image/bmp", None),
+    "map.1bpp": ("application/octet-stream", "gdeq0583t31"),
+    "map.4bpp": ("application/octet-stream", "epd5in65f"),
+}
+
+class _Image:
+    def __init__(self, name):
+        self.name = name
+        self.path = os.path.join(BASE_DIR, name)
+        self.mimetype, self.panel = IMAGES[name]
+        self.data, self.version, self.stat = None, None, None
+        self.history = deque(maxlen=HISTORY)     # (version, data) 이전 버전들
+        self._gz = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        """필요할 때만 파일을 다시 읽고 (data, version) 반환. 파일이 없으면 None"""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        key = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            if key != self.stat:
+                with open(self.path, "rb") as f:
+                    data = f.read()
+                version = f"{zlib.crc32(data):08x}"
+                if version != self.version:
+                    if self.data is not None:
+                        self.history.append((self.version, self.data))
+                    self.data, self.version, self._gz = data, version, None
+                self.stat = key
+            return self.data, self.version
+
+    def gzipped(self):
+        with self._lock:
+            if self._gz is None:
+                self._gz = gzip.compress(self.data, compresslevel=6)
+            return self._gz
+
+    def previous(self, version):
+        with self._lock:
+            for v, data in self.history:
+                if v == version:
+                    return data
+        return None
+
+_IMAGES = {name: _Image(name) for name in IMAGES}
+
+def _load(name):
+    img = _IMAGES[name]
+    got = img.current()
+    if got is None:
+        abort(404)
+    return img, got[0], got[1]
+
 @app.route('/')
 def home():
     return 'ESP32용 BMP 서버입니다.'
 
-@app.route('/map.bmp')
-def serve_bmp():
-    return send_file('map.bmp', mimetype='image/bmp')
+# 전체 이미지: ETag(내용 crc32) → If-None-Match 면 304, Range 로 이어받기(206)
+@app.route('/<any("map.bmp", "map.1bpp", "map.4bpp"):name>')
+def serve_image(name):
+    img, data, version = _load(name)
+    headers = {"X-Version": version}
+    etag = version
+    if "gzip" in request.headers.get("Accept-Encoding", "") and "Range" not in request.headers:
+        data, etag = img.gzipped(), version + "-gzip"
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    resp = Response(data, mimetype=img.mimetype, headers=headers)
+    resp.set_etag(etag)
+    resp.cache_control.no_cache = True
+    return resp.make_conditional(request, accept_ranges=True, complete_length=len(data))
+
+# ----- 델타: 기기가 가진 버전 이후 바뀐 사각형만 -----
+# 응답 헤더 X-Delta: rects | full,  X-Version: 새 버전
+# rects 본문 (little-endian):
+#   "MD" u8 형식버전(1) u8 바이트당 픽셀 수(8=1bpp, 2=4bpp) u16 사각형 수
+#   사각형마다 u16 x, u16 y, u16 w, u16 h (픽셀, x/w 는 바이트 경계) + 패킹된 행 데이터 (w / 픽셀수 * h 바이트)
+def _tiles(old, new, row_bytes):
+    a = np.frombuffer(old, np.uint8).reshape(-1, row_bytes)
+    b = np.frombuffer(new, np.uint8).reshape(-1, row_bytes)
+    rows, cols = -(-a.shape[0] // TILE_ROWS), -(-row_bytes // TILE_BYTES)
+    changed = np.zeros((rows * TILE_ROWS, cols * TILE_BYTES), bool)
+    changed[:a.shape[0], :row_bytes] = a != b
+    changed = changed.reshape(rows, TILE_ROWS, cols, TILE_BYTES).any(axis=(1, 3))
+    rects = []
+    for ty in range(rows):
+        tx = 0
+        while tx < cols:                       # 같은 타일 행에서 이어진 타일은 한 사각형으로
+            if not changed[ty, tx]:
+                tx += 1
+                continue
+            start = tx
+            while tx < cols and changed[ty, tx]:
+                tx += 1
+            y0, y1 = ty * TILE_ROWS, min(a.shape[0], (ty + 1) * TILE_ROWS)
+            x0, x1 = start * TILE_BYTES, min(row_bytes, tx * TILE_BYTES)
+            rects.append((x0, y0, x1, y1, b[y0:y1, x0:x1]))
+    return rects
+
+def _delta(img, data, since):
+    old = img.previous(since)
+    if old is None or len(old) != len(data):
+        return None
+    p = PANELS[img.panel]
+    ppb = 8 if p.mode == "bw" else 2
+    row_bytes = len(data) // p.height
+    rects = _tiles(old, data, row_bytes)
+    body = bytearray(b"MD") + struct.pack("<BBH", 1, ppb, len(rects))
+    for x0, y0, x1, y1, block in rects:
+        body += struct.pack("<HHHH", x0 * ppb, y0, (x1 - x0) * ppb, y1 - y0) + block.tobytes()
+    return bytes(body) if len(body) < len(data) else None    # 전체보다 크면 전체를 보냄
+
+@app.route('/<any("map.1bpp", "map.4bpp"):name>/delta')
+def serve_delta(name):
+    img, data, version = _load(name)
+    since = request.args.get("since") or request.headers.get("X-Have-Version", "")
+    headers = {"X-Version": version, "Cache-Control": "no-cache"}
+    if since == version:
+        return Response(status=304, headers=headers)
+    body = _delta(img, data, since)
+    headers["X-Delta"] = "full" if body is None else "rects"
+    resp = Response(data if body is None else body, mimetype="application/octet-stream", headers=headers)
+    resp.set_etag(version if body is None else f"{since}-{version}")
+    return resp
+
+# ----- 명찰: badge_render.py 결과 (파일 이름 = 내용 해시 = ETag, 내용이 바뀌지 않으므로 한 번 읽으면 계속 메모리에) -----
+BADGE_DIR = os.path.join(BASE_DIR, os.getenv("BADGE_DIR", "badges"))    # 절대 경로면 그대로
+
+class _Badges:
+    def __init__(self, directory):
+        self.directory = directory
+        self.stat, self.badges, self.ext = None, {}, ".1bpp"
+        self._files = {}                          # 파일 이름 → bytes
+        self._lock = threading.Lock()
+
+    def lookup(self, token):
+        """index.json 이 바뀌었을 때만 다시 읽고 토큰 → 해시"""
+        path = os.path.join(self.directory, "index.json")
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            if (st.st_mtime_ns, st.st_size) != self.stat:
+                with open(path, encoding="utf-8") as f:
+                    index = json.load(f)
+                self.badges, self.ext = index["badges"], index["ext"]
+                live = set(self.badges.values())
+                self._files = {k: v for k, v in self._files.items() if k.partition(".")[0] in live}
+                self.stat = (st.st_mtime_ns, st.st_size)
+            return self.badges.get(token)
+
+    def read(self, name):
+        with self._lock:
+            data = self._files.get(name)
+        if data is None:
+            with open(os.path.join(self.directory, name), "rb") as f:
+                data = f.read()
+            with self._lock:
+                self._files[name] = data
+        return data
+
+_BADGES = _Badges(BADGE_DIR)
+
+@app.route('/badge/<token>.<any("bmp", "1bpp", "4bpp"):ext>')
+def serve_badge(token, ext):
+    key = _BADGES.lookup(token)
+    if key is None or (ext != "bmp" and "." + ext != _BADGES.ext):
+        abort(404)
+    try:
+        data = _BADGES.read(f"{key}.{ext}")
+    except OSError:
+        abort(404)
+    resp = Response(data, mimetype="image/bmp" if ext == "bmp" else "application/octet-stream")
+    resp.set_etag(key)
+    resp.cache_control.no_cache = True
+    return resp.make_conditional(request, accept_ranges=True, complete_length=len(data))
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=8000)
@@ -0,0 +1,139 @@
+# framebuffer.py  (전자종이 패널용 프레임버퍼 렌더링: 흑백 1bpp / 7색 4bpp)
+#
+#   from framebuffer import render, preview
+#   buf = render(Image.open("map_with_me.bmp"), panel="gdeq0583t31", dither="fs")   # 38,880 bytes
+#   buf = render(img, panel="epd5in65f", dither="ordered")                          # 134,400 bytes
+#
+# 결과는 패널 RAM 에 그대로 보내는 바이트열 (BMP 헤더/행 패딩/아래→위 순서 없음, 위 행부터).
+#   1bpp: 행마다 왼쪽 픽셀이 MSB, 1 = 흰색 / 0 = 검정 (GxEPD2 drawImage/writeImage 형식)
+#   4bpp: 한 바이트에 두 픽셀, 왼쪽 픽셀이 상위 니블, 값 = 패널 색 코드 (epd5in65f.h EPD_5IN65F_*)
+# 디더링(Floyd–Steinberg / 8x8 Bayer)은 서버에서 NumPy 로 처리하므로 ESP32 는 픽셀 변환 없이 받은 그대로 출력한다.
+from dataclasses import dataclass
+
+import numpy as np
+from PIL import Image
+
+@dataclass(frozen=True)
+class Panel:
+    width: int
+    height: int
+    mode: str            # "bw" | "acep7"
+
+PANELS = {
+    "gdeq0583t31": Panel(648, 480, "bw"),      # 5.83" 흑백 (bitdraw_cjh, display_esp32.ino)
+    "epd5in65f":   Panel(600, 448, "acep7"),   # 5.65" 7색 (epaper5.65)
+}
+
+# epd5in65f.h 색 코드 순서 (0=검정 1=흰색 2=초록 3=파랑 4=빨강 5=노랑 6=주황)
+ACEP7_PALETTE = np.array([
+    [0, 0, 0], [255, 255, 255], [0, 255, 0], [0, 0, 255],
+    [255, 0, 0], [255, 255, 0], [255, 128, 0],
+], dtype=np.float32)
+
+_BAYER8 = np.array([
+    [0, 32, 8, 40, 2, 34, 10, 42], [48, 16, 56, 24, 50, 18, 58, 26],
+    [12, 44, 4, 36, 14, 46, 6, 38], [60, 28, 52, 20, 62, 30, 54, 22],
+    [3, 35, 11, 43, 1, 33, 9, 41], [51, 19, 59, 27, 49, 17, 57, 25],
+    [15, 47, 7, 39, 13, 45, 5, 37], [63, 31, 55, 23, 61, 29, 53, 21],
+], dtype=np.float32)
+
+def frame_bytes(panel: str) -> int:
+    p = PANELS[panel]
+    return (p.width + 7) // 8 * p.height if p.mode == "bw" else (p.width + 1) // 2 * p.height
+
+# ----- 크기 맞추기 -----
+def fit(img: Image.Image, width: int, height: int, rotate: int = 0, background=(255, 255, 255)) -> Image.Image:
+    """비율을 유지해 패널 크기 안에 맞추고 남는 곳은 background 로 채운 RGB 이미지"""
+    img = img.convert("RGB")
+    if rotate:
+        img = img.rotate(rotate, expand=True)
+    if img.size != (width, height):
+        scale = min(width / img.width, height / img.height)
+        size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+        canvas = Image.new("RGB", (width, height), background)
+        canvas.paste(img.resize(size, Image.LANCZOS), ((width - size[0]) // 2, (height - size[1]) // 2))
+        img = canvas
+    return img
+
+def _gray(rgb: np.ndarray) -> np.ndarray:
+    # sketch_draw.ino 와 같은 가중치 (r*299 + g*587 + b*114) / 1000
+    return rgb[..., 0] * 0.299 + rgb[..., 1] * 0.587 + rgb[..., 2] * 0.114
+
+# ----- 양자화 -----
+def _nearest(colors: np.ndarray, palette: np.ndarray) -> np.ndarray:
+    d = ((colors[..., None, :] - palette) ** 2).sum(-1)
+    return d.argmin(-1)
+
+def _diffuse(values: np.ndarray, palette: np.ndarray) -> np.ndarray:
+    """
+    Floyd–Steinberg 오차 확산. values (H, W, C) → 팔레트 인덱스 (H, W).
+    (y, x) 는 (y, x-1)·(y-1, x-1..x+1) 에만 의존하므로 t = x + 2y 가 같은 픽셀들은 서로 독립 →
+    대각선 W + 2H 개를 순서대로 돌며 각 대각선은 NumPy 로 한 번에 처리한다.
+    """
+    h, w, c = values.shape
+    buf = np.zeros((h + 1, w + 2, c), dtype=np.float32)     # 왼/오른쪽 1열, 아래 1행 여백
+    buf[:h, 1:w + 1] = values
+    out = np.empty((h, w), dtype=np.uint8)
+    for t in range(w + 2 * (h - 1)):
+        y0, y1 = max(0, -((w - 1 - t) // 2)), min(h - 1, t // 2)
+        if y0 > y1:
+            continue
+        ys = np.arange(y0, y1 + 1)
+        xs = t - 2 * ys
+        old = buf[ys, xs + 1]
+        idx = _nearest(old, palette)
+        out[ys, xs] = idx
+        err = old - palette[idx]
+        buf[ys, xs + 2] += err * (7 / 16)
+        buf[ys + 1, xs] += err * (3 / 16)
+        buf[ys + 1, xs + 1] += err * (5 / 16)
+        buf[ys + 1, xs + 2] += err * (1 / 16)
+    return out
+
+def _ordered(values: np.ndarray, palette: np.ndarray, spread: float) -> np.ndarray:
+    h, w, _ = values.shape
+    bayer = np.tile(_BAYER8, ((h + 7) // 8, (w + 7) // 8))[:h, :w]
+    return _nearest(values + ((bayer + 0.5) / 64 - 0.5)[..., None] * spread, palette).astype(np.uint8)
+
+def quantize(rgb: np.ndarray, mode: str, dither: str = "fs") -> np.ndarray:
+    """RGB (H, W, 3) → bw: 1=흰색/0=검정, acep7: 패널 색 코드"""
+    if mode == "bw":
+        values, palette, spread = _gray(rgb.astype(np.float32))[..., None], np.array([[0.0], [255.0]], np.float32), 255.0
+    else:
+        values, palette, spread = rgb.astype(np.float32), ACEP7_PALETTE, 128.0
+    if dither == "fs":
+        return _diffuse(values, palette)
+    if dither == "ordered":
+        return _ordered(values, palette, spread)
+    if dither == "none":
+        if mode == "bw":
+            return (values[..., 0] > 127.5).astype(np.uint8)               # 두 색 중 가까운 쪽 = 임계값
+        return _nearest(values, palette).astype(np.uint8)
+    raise ValueError(f"unknown dither: {dither}")
+
+# ----- 패킹 -----
+def pack_1bpp(bits: np.ndarray) -> bytes:
+    return np.packbits(bits.astype(np.uint8), axis=1).tobytes()       # 행 끝은 8픽셀 단위로 0 패딩
+
+def pack_4bpp(codes: np.ndarray) -> bytes:
+    h, w = codes.shape
+    if w % 2:
+        codes = np.pad(codes, ((0, 0), (0, 1)), constant_values=1)    # 남는 칸은 흰색
+    return ((codes[:, 0::2] << 4) | codes[:, 1::2]).astype(np.uint8).tobytes()
+
+def render(img: Image.Image, panel: str = "gdeq0583t31", dither: str = "fs", rotate: int = 0) -> bytes:
+    """PIL 이미지 → 패널 네이티브 프레임버퍼 바이트"""
+    p = PANELS[panel]
+    rgb = np.asarray(fit(img, p.width, p.height, rotate))
+    codes = quantize(rgb, p.mode, dither)
+    return pack_1bpp(codes) if p.mode == "bw" else pack_4bpp(codes)
+
+def preview(buf: bytes, panel: str = "gdeq0583t31") -> Image.Image:
+    """프레임버퍼를 다시 이미지로 (디더링 결과 확인용)"""
+    p = PANELS[panel]
+    if p.mode == "bw":
+        bits = np.unpackbits(np.frombuffer(buf, np.uint8).reshape(p.height, -1), axis=1)[:, :p.width]
+        return Image.fromarray((bits * 255).astype(np.uint8), "L")
+    packed = np.frombuffer(buf, np.uint8).reshape(p.height, -1)
+    codes = np.stack([packed >> 4, packed & 0x0F], axis=2).reshape(p.height, -1)[:, :p.width]
+    return Image.fromarray(ACEP7_PALETTE[np.minimum(codes, 6)].astype(np.uint8), "RGB")
@@ -1,13 +1,108 @@
 from PIL import Image, ImageDraw
+import numpy as np
+from framebuffer import PANELS, fit, quantize
 
-# 1. 지도 불러오기
-img = Image.open("your_map.png").convert("L")  # 'L' = grayscale 흑백
+class MapRenderer:
+    """
+    지도 1장을 한 번만 읽어 패널 크기로 맞추고 디더링해 둔 뒤(codes/base),
+    요청마다 마커가 들어가는 사각형(dirty rect)만 다시 패킹해 끼워 넣는다.
+    좌표는 원본 지도 픽셀 기준 (예전 generate_bmp 의 (320, 240) 과 같음).
+    src 는 파일 경로 또는 이미 연 PIL 이미지 (패널 여러 개를 만들 때 한 번만 디코딩).
+    """
+    def __init__(self, src, panel="gdeq0583t31", dither="fs", radius=6, color=None):
+        p = PANELS[panel]
+        if not isinstance(src, Image.Image):
+            src = Image.open(src)
+        self.panel, self.width, self.height, self.radius = panel, p.width, p.height, radius
+        self.ppb = 8 if p.mode == "bw" else 2                 # 바이트당 픽셀 수
+        self.color = (0 if p.mode == "bw" else 4) if color is None else color   # 흑백: 검정 / 7색: 빨강
+        self.scale = min(p.width / src.width, p.height / src.height)
+        self.offset = ((p.width - round(src.width * self.scale)) // 2,
+                       (p.height - round(src.height * self.scale)) // 2)   # fit() 의 여백과 같음
 
-# 2. 현재 위치 좌표 찍기 (예: (320, 240))
-draw = ImageDraw.Draw(img)
-x, y = 320, 240  # 현재 위치 (픽셀 기준)
-r = 6  # 원 반지름
-draw.ellipse((x - r, y - r, x + r, y + r), fill=0)  # 검은 원
+        codes = quantize(np.asarray(fit(src, p.width, p.height)), p.mode, dither)
+        pad = -p.width % self.ppb                              # 행 끝 패딩은 흰색(1)
+        self.codes = np.pad(codes, ((0, 0), (0, pad)), constant_values=1)
+        self.base = self._pack(self.codes)
 
-# 3. BMP 저장 (8-bit grayscale BMP)
-img.save("map.bmp", format="BMP")
+    def _pack(self, codes):
+        if self.ppb == 8:
+            return np.packbits(codes, axis=1)
+        return (codes[:, 0::2] << 4) | codes[:, 1::2]
+
+    def to_panel(self, x, y):
+        return round(x * self.scale) + self.offset[0], round(y * self.scale) + self.offset[1]
+
+    def _dirty(self, x, y):
+        """마커가 덮는 바이트 경계 정렬 사각형 (x0, y0, x1, y1)과 그 부분의 패킹된 바이트 (행, 바이트)"""
+        cx, cy = self.to_panel(x, y)
+        r = self.radius
+        x0 = max(0, cx - r) // self.ppb * self.ppb
+        x1 = min(self.codes.shape[1], -(-(cx + r + 1) // self.ppb) * self.ppb)
+        y0, y1 = max(0, cy - r), min(self.height, cy + r + 1)
+        if x0 >= x1 or y0 >= y1:
+            return None                                        # 지도 밖
+        region = self.codes[y0:y1, x0:x1].copy()
+        ys, xs = np.ogrid[y0:y1, x0:x1]
+        region[(xs - cx) ** 2 + (ys - cy) ** 2 <= r * r] = self.color
+        return (x0, y0, x1, y1), self._pack(region)
+
+    def frame(self, x, y) -> bytes:
+        """마커를 찍은 전체 프레임 (framebuffer.render 와 같은 형식)"""
+        out = self.base.copy()
+        dirty = self._dirty(x, y)
+        if dirty:
+            (x0, y0, x1, y1), patch = dirty
+            out[y0:y1, x0 // self.ppb:x1 // self.ppb] = patch
+        return out.tobytes()
+
+    def _window(self, rect, patch=None):
+        x0, y0, x1, y1 = rect
+        out = self.base[y0:y1, x0 // self.ppb:x1 // self.ppb]
+        if patch is not None:
+            out = out.copy()
+            dx0, dy0, dx1, dy1 = patch[0]
+            out[dy0 - y0:dy1 - y0, (dx0 - x0) // self.ppb:(dx1 - x0) // self.ppb] = patch[1]
+        return x0, y0, x1 - x0, y1 - y0, out.tobytes()
+
+    def window(self, x, y, prev=None) -> list:
+        """
+        바뀐 부분만: [(x, y, w, h, bytes), ...] 를 순서대로 쓰면 된다.
+        prev 에 직전 좌표를 주면 먼저 이전 마커 자리를 바탕 지도로 되돌리는 사각형, 그다음 새 마커 사각형.
+        두 사각형이 겹칠 때만 하나로 합친다 (대각선으로 멀리 움직였을 때 그 사이의 바뀌지 않은 지도를 보내지 않도록).
+        흑백은 GxEPD2 writeImage(x, y, w, h), 7색은 EPD_5IN65F_Display_part 로 바로 보낼 수 있다.
+        """
+        old = self._dirty(*prev) if prev else None
+        new = self._dirty(x, y)
+        if old and new:
+            (ox0, oy0, ox1, oy1), (nx0, ny0, nx1, ny1) = old[0], new[0]
+            if ox0 < nx1 and nx0 < ox1 and oy0 < ny1 and ny0 < oy1:
+                rect = (min(ox0, nx0), min(oy0, ny0), max(ox1, nx1), max(oy1, ny1))
+                return [self._window(rect, new)]
+        out = []
+        if old:
+            out.append(self._window(old[0]))                   # 이전 마커 자리 = 바탕 지도
+        if new:
+            out.append(self._window(new[0], new))
+        return out
+
+if __name__ == "__main__":
+    # 1. 지도 불러오기 (디코딩은 한 번만, 아래 패널 프레임도 같은 이미지를 쓴다)
+    src = Image.open("your_map.png")
+    src.load()
+    img = src.convert("L")  # 'L' = grayscale 흑백
+
+    # 2. 현재 위치 좌표 찍기 (예: (320, 240))
+    draw = ImageDraw.Draw(img)
+    x, y = 320, 240  # 현재 위치 (픽셀 기준)
+    r = 6  # 원 반지름
+    draw.ellipse((x - r, y - r, x + r, y + r), fill=0)  # 검은 원
+
+    # 3. BMP 저장 (8-bit grayscale BMP)
+    img.save("map.bmp", format="BMP")
+
+    # 4. 전자종이 패널 RAM 형식 그대로 저장 (바탕 지도는 한 번만 디더링, 마커 부분만 합성)
+    with open("map.1bpp", "wb") as f:   # 5.83" 흑백 648x480, 1bpp (38,880 bytes)
+        f.write(MapRenderer(src, "gdeq0583t31").frame(x, y))
+    with open("map.4bpp", "wb") as f:   # 5.65" 7색 600x448, 4bpp (134,400 bytes)
+        f.write(MapRenderer(src, "epd5in65f").frame(x, y))
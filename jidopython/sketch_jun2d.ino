@@ -3,15 +3,25 @@
 #include <GxEPD2_BW.h>
 #include <SPI.h>
 
-// GDEY0583T81 (5.83인치 흑백, 648x480)
-GxEPD2_BW<GxEPD2_583, GxEPD2_583::HEIGHT> display(GxEPD2_583(/*CS=*/5, /*DC=*/17, /*RST=*/16, /*BUSY=*/4));
+// GDEQ0583T31 (5.83인치 흑백, 648x480). GxEPD2_583 은 600x448 패널이라 map.1bpp 와 크기가 맞지 않는다
+GxEPD2_BW<GxEPD2_583_GDEQ0583T31, GxEPD2_583_GDEQ0583T31::HEIGHT> display(GxEPD2_583_GDEQ0583T31(/*CS=*/5, /*DC=*/17, /*RST=*/16, /*BUSY=*/4));
 
 // Wi-Fi 정보
 const char* ssid = "Wifi";
 const char* password = "19941994";
 
-// 서버 주소
-const char* image_url = "http://192.168.72.211:8000/map.bmp";  // PC의 IP로 수정
+// 서버 주소 (flask_server.py). map.1bpp = 패널 RAM 형식 그대로 (648x480, 1 = 흰색, 38,880 bytes)
+const char* image_url = "http://192.168.72.211:8000/map.1bpp";  // PC의 IP로 수정
+const char* delta_url = "http://192.168.72.211:8000/map.1bpp/delta?since=";
+const unsigned long POLL_MS = 30000;     // 변경 확인 주기
+const int MAX_RESUME = 5;                // 끊겼을 때 Range 로 이어받는 횟수
+
+const int16_t W = GxEPD2_583_GDEQ0583T31::WIDTH, H = GxEPD2_583_GDEQ0583T31::HEIGHT;
+const size_t ROW_BYTES = (W + 7) / 8;    // 81
+const size_t FRAME_BYTES = ROW_BYTES * H; // 38,880 (서버 framebuffer.frame_bytes 와 같아야 함)
+uint8_t* frame = nullptr;                // 마지막으로 받은 전체 프레임
+String version = "";                     // 서버 X-Version (내용 crc32)
+const char* headerKeys[] = {"X-Version", "X-Delta"};
 
 void setup() {
   Serial.begin(115200);
@@ -20,6 +30,12 @@ void setup() {
   display.init();
   Serial.println("디스플레이 초기화 완료");
 
+  frame = (uint8_t*)malloc(FRAME_BYTES);
+  if (!frame) {
+    Serial.println("❌ 프레임 버퍼 할당 실패");
+    return;
+  }
+
   WiFi.begin(ssid, password);
   while (WiFi.status() != WL_CONNECTED) {
     Serial.print(".");
@@ -27,49 +43,134 @@ void setup() {
   }
   Serial.println("\n✅ Wi-Fi 연결 성공");
 
-  HTTPClient http;
-  http.begin(image_url);
-  int httpCode = http.GET();
-
-  if (httpCode == 200) {
-    Serial.println("✅ BMP 다운로드 성공");
-    WiFiClient* stream = http.getStreamPtr();
-    drawBMPFromStream(stream);
-  } else {
-    Serial.print("❌ 다운로드 실패: ");
-    Serial.println(httpCode);
-  }
-
-  http.end();
+  if (downloadFull()) drawFull();
 }
 
 void loop() {
-  // 필요 시 반복 표시
+  delay(POLL_MS);
+  if (!frame) return;
+  if (version.length() == 0) {
+    if (downloadFull()) drawFull();
+    return;
+  }
+  checkDelta();
 }
 
-void drawBMPFromStream(WiFiClient* stream) {
-  uint8_t header[54];
-  stream->readBytes(header, 54);
-
-  int width = header[18] + (header[19] << 8);
-  int height = header[22] + (header[23] << 8);
-  Serial.printf("BMP 해상도: %d x %d\n", width, height);
-
-  // Color Table 1024바이트 스킵 (8-bit BMP)
-  for (int i = 0; i < 1024; i++) stream->read();
-
-  display.setRotation(0);
-  display.firstPage();
-  do {
-    for (int y = height - 1; y >= 0; y--) {
-      for (int x = 0; x < width; x++) {
-        uint8_t pixelIndex;
-        stream->readBytes(&pixelIndex, 1);
-        bool isBlack = pixelIndex < 128;
-        display.drawPixel(x, y, isBlack ? GxEPD_BLACK : GxEPD_WHITE);
+// 전체 프레임 받기. 중간에 끊기면 받은 곳부터 Range 로 이어받는다.
+bool downloadFull() {
+  size_t got = 0;
+  String expect = "";
+  for (int attempt = 0; attempt <= MAX_RESUME && got < FRAME_BYTES; attempt++) {
+    HTTPClient http;
+    http.begin(image_url);
+    http.collectHeaders(headerKeys, 2);
+    if (got > 0) {
+      http.addHeader("Range", "bytes=" + String(got) + "-");
+      http.addHeader("If-Range", "\"" + expect + "\"");      // 그 사이 바뀌었으면 200 으로 전체가 옴
+    }
+    int code = http.GET();
+    if (code == 200) {
+      got = 0;
+    } else if (code != 206) {
+      Serial.printf("❌ 다운로드 실패: %d\n", code);
+      http.end();
+      return false;
+    }
+    // 크기가 다르면 (다른 패널용 프레임, 잘못된 Range 응답) 받지 않는다
+    int size = http.getSize();
+    size_t want = FRAME_BYTES - got;
+    if (size < 0 || (size_t)size != want) {
+      Serial.printf("❌ 프레임 크기 불일치: %d (기대 %u)\n", size, (unsigned)want);
+      http.end();
+      return false;
+    }
+    expect = http.header("X-Version");
+    WiFiClient* stream = http.getStreamPtr();
+    unsigned long last = millis();
+    while (got < FRAME_BYTES && http.connected() && millis() - last < 5000) {
+      size_t n = stream->available();
+      if (n) {
+        got += stream->readBytes(frame + got, min(n, FRAME_BYTES - got));
+        last = millis();
+      } else {
+        delay(2);
       }
     }
-  } while (display.nextPage());
+    http.end();
+  }
+  if (got < FRAME_BYTES) {
+    Serial.println("❌ 프레임을 다 받지 못함");
+    return false;
+  }
+  version = expect;
+  Serial.printf("✅ 프레임 다운로드 완료 (버전 %s)\n", version.c_str());
+  return true;
+}
 
+void drawFull() {
+  display.setRotation(0);
+  display.writeImage(frame, 0, 0, W, H);   // 변환 없이 패널 RAM 으로
+  display.refresh(false);
   Serial.println("✅ 이미지 표시 완료");
 }
+
+// 가진 버전 이후 바뀐 사각형만 받아 부분 갱신 (304 = 변경 없음)
+void checkDelta() {
+  HTTPClient http;
+  http.begin(String(delta_url) + version);
+  http.collectHeaders(headerKeys, 2);
+  int code = http.GET();
+  if (code == 304) {
+    http.end();
+    return;
+  }
+  if (code != 200) {
+    Serial.printf("❌ 델타 요청 실패: %d\n", code);
+    http.end();
+    return;
+  }
+  String newVersion = http.header("X-Version");
+  if (http.header("X-Delta") != "rects") {      // 서버가 이전 버전을 모르면 전체를 보냄
+    http.end();
+    version = "";
+    if (downloadFull()) drawFull();
+    return;
+  }
+
+  WiFiClient* stream = http.getStreamPtr();
+  stream->setTimeout(5000);
+  uint8_t head[6];
+  if (stream->readBytes(head, 6) != 6 || head[0] != 'M' || head[1] != 'D' || head[3] != 8) {
+    Serial.println("❌ 델타 형식 오류");
+    http.end();
+    return;
+  }
+  uint16_t count = head[4] | (head[5] << 8);
+  bool ok = true;
+  for (uint16_t i = 0; i < count && ok; i++) {
+    uint8_t r[8];
+    if (stream->readBytes(r, 8) != 8) {
+      ok = false;
+      break;
+    }
+    uint16_t x = r[0] | (r[1] << 8), y = r[2] | (r[3] << 8), w = r[4] | (r[5] << 8), h = r[6] | (r[7] << 8);
+    if (x % 8 || w % 8 || x + w > ROW_BYTES * 8 || y + h > H) {   // 다른 크기 패널용 델타
+      Serial.println("❌ 델타 사각형이 프레임 밖");
+      ok = false;
+      break;
+    }
+    for (uint16_t row = 0; row < h && ok; row++) {
+      ok = stream->readBytes(frame + (size_t)(y + row) * ROW_BYTES + x / 8, w / 8) == w / 8;
+    }
+    display.writeImagePart(frame, x, y, W, H, x, y, w, h);
+    display.refresh(x, y, w, h);
+  }
+  http.end();
+  if (!ok) {                                    // 도중에 끊기면 다음 주기에 전체를 다시 받음
+    Serial.println("❌ 델타 수신 중 끊김");
+    version = "";
+    return;
+  }
+  version = newVersion;
+  Serial.printf("✅ 부분 갱신 %u개 (버전 %s)\n", count, version.c_str());
+}
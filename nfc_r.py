@@ -1,54 +1,37 @@
+# nfc_r.py  (nfc_server 의 /user/{name} 프로필 페이지를 그대로 전달하는 얇은 프록시)
+# 시트 조회/템플릿 렌더링은 nfc_server 가 스냅샷 캐시로 처리한다.
+# 예전과 달리 클러스터 시트에 행이 없는 사용자도 404 가 아니라 추천 산업군이 빈 프로필(200)을 돌려준다
+# (설문 응답에 없는 이름만 404).
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
-import gspread
-import pandas as pd
+from fastapi.responses import HTMLResponse, Response
+import os, urllib.request, urllib.error
+from urllib.parse import quote
 
 app = FastAPI()
-templates = Jinja2Templates(directory="templates")
 
-# ✅ Google API 인증 (서비스 계정 키 사용)
-SERVICE_ACCOUNT_FILE = r""
-gc = gspread.service_account(filename=SERVICE_ACCOUNT_FILE)
-
-# ✅ Google Sheets 연결
-spreadsheet_url = "https://docs.google.com/spreadsheets/d/1kkt336f1G-XqfDuwCUOnqpKlxTcnwLQy-XS4SQv6lM0/edit"
-sh = gc.open_by_url(spreadsheet_url)
-
-# 시트 선택
-ws_responses = sh.worksheet("설문지 응답 시트")
-ws_cluster = sh.worksheet("Clustered Result with Distance")
+NFC_SERVER_URL = os.getenv("NFC_SERVER_URL", "http://localhost:8000").rstrip("/")
 
 # ✅ 사용자 상세정보 페이지 라우팅
 @app.get("/user/{name}", response_class=HTMLResponse)
 def render_user_profile(request: Request, name: str):
-    # 설문 응답 로드
-    df_resp = pd.DataFrame(ws_responses.get_all_records())
-    resp_match = df_resp[df_resp["이름"] == name]
-    if resp_match.empty:
-        raise HTTPException(status_code=404, detail="설문 응답에 사용자 없음")
-    resp = resp_match.iloc[0]
-
-    # 클러스터 결과 로드
-    df_clu = pd.DataFrame(ws_cluster.get_all_records())
-    clu_match = df_clu[df_clu["이름"] == name]
-    if clu_match.empty:
-        raise HTTPException(status_code=404, detail="클러스터 결과에 사용자 없음")
-    clu = clu_match.iloc[0]
-
-    # 템플릿 렌더링
-    return templates.TemplateResponse("profile.html", {
-        "request": request,
-        "user": {
-            "name": resp["이름"],
-            "school": resp.get("학교", ""),
-            "year": resp.get("학년", ""),
-            "major": resp.get("전공", ""),
-            "email": resp.get("이메일 주소", resp.get("이메일", "")),
-            "top_industries": clu.get("Top Industries", clu.get("top_industries", "")),
-        }
-    })
+    etag = request.headers.get("if-none-match")
+    req = urllib.request.Request(f"{NFC_SERVER_URL}/user/{quote(name, safe='')}",
+                                 headers={"If-None-Match": etag} if etag else {})
+    try:
+        with urllib.request.urlopen(req, timeout=10) as r:
+            status, headers, body = r.status, r.headers, r.read()
+    except urllib.error.HTTPError as e:
+        status, headers, body = e.code, e.headers, e.read()
+    except OSError:
+        raise HTTPException(status_code=502, detail="nfc_server 에 연결할 수 없습니다")
+
+    keep = {k: headers[k] for k in ("ETag", "Cache-Control") if headers.get(k)}
+    if status == 304:
+        return Response(status_code=304, headers=keep)
+    if status != 200:
+        raise HTTPException(status_code=status, detail="설문 응답에 사용자 없음" if status == 404 else "nfc_server 오류")
+    return HTMLResponse(body.decode("utf-8"), headers=keep)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run("nfc_r:app", host="0.0.0.0", port=8001, reload=True)   # 8000 = nfc_server
@@ -0,0 +1,8 @@
+# conftest.py  (루트 모듈 테스트: framebuffer / generate_bmp / flask_server / badge_render / 프록시)
+#
+#   python -m pytest -q tests
+import sys
+from os.path import abspath, dirname
+
+ROOT = dirname(dirname(abspath(__file__)))
+sys.path.insert(0, ROOT)
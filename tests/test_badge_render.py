@@ -0,0 +1,75 @@
+# badge_render: 내용 주소 캐시 키, 명찰 파일/index.json, 바뀐 명찰만 다시 그리기, flask_server 의 /badge/<token>
+import json
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import badge_render as br
+import flask_server as fs
+from framebuffer import frame_bytes, preview
+
+ITEMS = [
+    {"token": "TOKA", "name": "홍길동", "school": "한국대", "year": 3, "major": "컴퓨터공학", "top": "IT, 금융"},
+    {"token": "TOKB", "name": "김철수", "school": "서울대", "year": "", "major": "경영학", "top": "제조"},
+]
+
+def test_badge_key_follows_content_and_panel():
+    a = br.badge_key(ITEMS[0], "gdeq0583t31", "http://x")
+    assert a == br.badge_key(dict(ITEMS[0]), "gdeq0583t31", "http://x") and len(a) == 20
+    assert a != br.badge_key({**ITEMS[0], "major": "수학"}, "gdeq0583t31", "http://x")
+    assert a != br.badge_key(ITEMS[0], "epd5in65f", "http://x")
+    assert a != br.badge_key(ITEMS[0], "gdeq0583t31", "http://y")
+    assert a == br.badge_key({**ITEMS[0], "extra": 1}, "gdeq0583t31", "http://x")   # FIELDS 밖의 값은 무시
+
+def test_render_all_writes_frames_bmp_and_index(tmp_path):
+    stats = br.render_all(ITEMS, str(tmp_path), workers=1)
+    assert stats["badges"] == 2 and stats["rendered"] == 2 and stats["cached"] == 0
+    with open(tmp_path / "index.json", encoding="utf-8") as f:
+        index = json.load(f)
+    assert index["ext"] == ".1bpp" and index["panel"] == "gdeq0583t31"
+    assert index["badges"] == {it["token"]: br.badge_key(it, "gdeq0583t31", "http://localhost:8000") for it in ITEMS}
+    for key in index["badges"].values():
+        frame = (tmp_path / f"{key}.1bpp").read_bytes()
+        assert len(frame) == frame_bytes("gdeq0583t31")
+        bmp = Image.open(tmp_path / f"{key}.bmp")
+        assert bmp.size == (648, 480) and bmp.mode == "1"
+        assert np.array_equal(np.asarray(bmp.convert("L")), np.asarray(preview(frame, "gdeq0583t31").convert("L")))
+    assert not list(tmp_path.glob("*.tmp"))
+
+def test_second_run_renders_only_changed_badges(tmp_path):
+    br.render_all(ITEMS, str(tmp_path), workers=1)
+    assert br.render_all(ITEMS, str(tmp_path), workers=1)["rendered"] == 0
+    old = br.badge_key(ITEMS[1], "gdeq0583t31", "http://localhost:8000")
+    changed = [ITEMS[0], {**ITEMS[1], "top": "유통"}]
+    stats = br.render_all(changed, str(tmp_path), workers=1, prune=True)
+    assert (stats["rendered"], stats["cached"], stats["removed"]) == (1, 1, 2)   # 옛 .1bpp/.bmp 삭제
+    assert not (tmp_path / f"{old}.1bpp").exists()
+
+def test_acep7_panel_writes_4bpp(tmp_path):
+    stats = br.render_all(ITEMS[:1], str(tmp_path), panel="epd5in65f", workers=1)
+    key = br.badge_key(ITEMS[0], "epd5in65f", "http://localhost:8000")
+    assert stats["rendered"] == 1
+    assert len((tmp_path / f"{key}.4bpp").read_bytes()) == frame_bytes("epd5in65f")
+    assert Image.open(tmp_path / f"{key}.bmp").mode == "P"
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(fs, "_BADGES", fs._Badges(str(tmp_path)))
+    return fs.app.test_client()
+
+def test_flask_serves_rendered_badges(tmp_path, client):
+    br.render_all(ITEMS, str(tmp_path), workers=1)
+    key = br.badge_key(ITEMS[0], "gdeq0583t31", "http://localhost:8000")
+    r = client.get("/badge/TOKA.1bpp")
+    assert r.status_code == 200 and r.data == (tmp_path / f"{key}.1bpp").read_bytes()
+    assert r.headers["ETag"] == f'"{key}"'
+    assert client.get("/badge/TOKA.1bpp", headers={"If-None-Match": f'"{key}"'}).status_code == 304
+    assert client.get("/badge/TOKA.bmp").mimetype == "image/bmp"
+    assert client.get("/badge/TOKA.4bpp").status_code == 404                # 패널과 다른 형식
+    assert client.get("/badge/NOPE.1bpp").status_code == 404
+
+    br.render_all([{**ITEMS[0], "name": "홍길순"}], str(tmp_path), workers=1)   # index.json 이 바뀌면 새 명찰
+    new = br.badge_key({**ITEMS[0], "name": "홍길순"}, "gdeq0583t31", "http://localhost:8000")
+    assert client.get("/badge/TOKA.1bpp").headers["ETag"] == f'"{new}"'
+    assert client.get("/badge/TOKB.1bpp").status_code == 404
@@ -0,0 +1,81 @@
+# flask_server: 앱 폴더 기준 경로, ETag/304, Range 이어받기, 델타 사각형
+import os
+import struct
+
+import numpy as np
+import pytest
+
+import flask_server as fs
+from framebuffer import frame_bytes
+
+@pytest.fixture
+def app_dir(tmp_path, monkeypatch):
+    """_Image / _Badges 가 tmp_path 를 앱 폴더로 보도록 바꾸고, CWD 는 다른 곳으로"""
+    for name, img in fs._IMAGES.items():
+        monkeypatch.setattr(img, "path", str(tmp_path / name))
+        img.data, img.version, img.stat, img._gz = None, None, None, None
+        img.history.clear()
+    elsewhere = tmp_path / "elsewhere"
+    elsewhere.mkdir()
+    monkeypatch.chdir(elsewhere)
+    return tmp_path
+
+@pytest.fixture
+def client():
+    return fs.app.test_client()
+
+def _write(path, data: bytes, bump: int = 0):
+    path.write_bytes(data)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + bump))     # 같은 크기로 다시 써도 stat 이 바뀌게
+
+def test_paths_follow_module_dir_not_cwd():
+    base = os.path.dirname(os.path.abspath(fs.__file__))
+    assert fs._IMAGES["map.1bpp"].path == os.path.join(base, "map.1bpp")
+    assert os.path.isabs(fs.BADGE_DIR)
+
+def test_serves_from_app_dir_regardless_of_cwd(app_dir, client):
+    data = bytes(range(256)) * 4
+    _write(app_dir / "map.bmp", data)
+    r = client.get("/map.bmp")
+    assert r.status_code == 200 and r.data == data
+    assert client.get("/map.4bpp").status_code == 404
+
+def test_etag_304_and_range(app_dir, client):
+    data = os.urandom(frame_bytes("gdeq0583t31"))
+    _write(app_dir / "map.1bpp", data)
+    r = client.get("/map.1bpp")
+    etag = r.headers["ETag"]
+    assert r.data == data
+    assert client.get("/map.1bpp", headers={"If-None-Match": etag}).status_code == 304
+    r = client.get("/map.1bpp", headers={"Range": "bytes=1000-", "If-Range": etag})
+    assert r.status_code == 206 and r.data == data[1000:]
+
+def test_delta_rects_rebuild_new_frame(app_dir, client):
+    row_bytes = fs.PANELS["gdeq0583t31"].width // 8
+    old = np.full((fs.PANELS["gdeq0583t31"].height, row_bytes), 0xFF, np.uint8)
+    new = old.copy()
+    new[100:120, 10:13] = 0x00
+    _write(app_dir / "map.1bpp", old.tobytes())
+    since = client.get("/map.1bpp").headers["X-Version"]
+    _write(app_dir / "map.1bpp", new.tobytes(), bump=10**9)
+
+    r = client.get(f"/map.1bpp/delta?since={since}")
+    assert r.headers["X-Delta"] == "rects"
+    body = r.data
+    assert body[:2] == b"MD"
+    _, ppb, count = struct.unpack_from("<BBH", body, 2)
+    assert ppb == 8 and count >= 1
+    buf, off = old.copy(), 6
+    for _ in range(count):
+        x, y, w, h = struct.unpack_from("<HHHH", body, off)
+        off += 8
+        assert x % 8 == 0 and w % 8 == 0 and x + w <= row_bytes * 8
+        n = w // 8 * h
+        buf[y:y + h, x // 8:(x + w) // 8] = np.frombuffer(body[off:off + n], np.uint8).reshape(h, w // 8)
+        off += n
+    assert off == len(body) and buf.tobytes() == new.tobytes()
+
+    version = r.headers["X-Version"]
+    assert client.get(f"/map.1bpp/delta?since={version}").status_code == 304
+    assert client.get("/map.1bpp/delta?since=unknown").headers["X-Delta"] == "full"
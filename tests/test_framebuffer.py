@@ -0,0 +1,95 @@
+# framebuffer: 패널 RAM 바이트 배치 (1bpp MSB=왼쪽, 1=흰색 / 4bpp 상위 니블=왼쪽), 스케치/헤더와 같은 크기, 디더링
+import re
+from os.path import abspath, dirname, join
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import framebuffer as fb
+
+ROOT = dirname(dirname(abspath(__file__)))
+
+def _read(*parts) -> str:
+    with open(join(ROOT, *parts), encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+def test_frame_sizes():
+    assert fb.frame_bytes("gdeq0583t31") == 81 * 480 == 38_880
+    assert fb.frame_bytes("epd5in65f") == 300 * 448 == 134_400
+
+@pytest.mark.parametrize("path", [("sketch_jun2d.ino",), ("jidopython", "sketch_jun2d.ino")])
+def test_sketch_expects_the_same_1bpp_frame(path):
+    src = _read(*path)
+    assert "GxEPD2_BW<GxEPD2_583_GDEQ0583T31," in src            # 648x480 패널 클래스 (GxEPD2_583 은 600x448)
+    assert re.search(r"ROW_BYTES\s*=\s*\(W\s*\+\s*7\)\s*/\s*8", src)
+    assert re.search(r"FRAME_BYTES\s*=\s*ROW_BYTES\s*\*\s*H", src)
+    p = fb.PANELS["gdeq0583t31"]
+    assert (p.width, p.height) == (648, 480)
+
+def test_acep7_panel_matches_driver_header():
+    h = _read("epaper5.65", "epd5in65f.h")
+    p = fb.PANELS["epd5in65f"]
+    assert f"EPD_WIDTH       {p.width}" in h and f"EPD_HEIGHT      {p.height}" in h
+    codes = {name: int(v, 16) for name, v in re.findall(r"#define EPD_5IN65F_(\w+)\s+(0x\d)", h)}
+    rgb = {"BLACK": (0, 0, 0), "WHITE": (255, 255, 255), "GREEN": (0, 255, 0), "BLUE": (0, 0, 255),
+           "RED": (255, 0, 0), "YELLOW": (255, 255, 0)}
+    for name, color in rgb.items():
+        assert tuple(fb.ACEP7_PALETTE[codes[name]]) == color
+
+def test_1bpp_layout():
+    img = Image.new("RGB", (648, 480), "white")
+    img.putpixel((9, 2), (0, 0, 0))
+    img.putpixel((647, 479), (0, 0, 0))
+    buf = fb.render(img, "gdeq0583t31", dither="none")
+    assert len(buf) == 38_880
+    a = np.frombuffer(buf, np.uint8)
+    assert a[2 * 81 + 1] == 0xFF ^ 0x40                            # x=9 → 2번째 바이트의 두 번째 비트(MSB 부터)
+    assert a[-1] == 0xFF ^ 0x01
+    assert np.count_nonzero(a != 0xFF) == 2
+
+def test_4bpp_layout():
+    img = Image.new("RGB", (600, 448), "white")
+    img.putpixel((0, 0), (255, 0, 0))
+    img.putpixel((3, 1), (0, 0, 255))
+    a = np.frombuffer(fb.render(img, "epd5in65f", dither="none"), np.uint8)
+    assert len(a) == 134_400
+    assert a[0] == 0x41 and a[300 + 1] == 0x13 and a[2] == 0x11
+
+def test_pack_pads_odd_widths():
+    assert fb.pack_1bpp(np.ones((1, 10), np.uint8)) == b"\xff\xc0"
+    assert fb.pack_4bpp(np.array([[0, 2, 4]], np.uint8)) == b"\x02\x41"
+
+def _fs_reference(gray: np.ndarray) -> np.ndarray:
+    """행 단위 Floyd–Steinberg (흑백)"""
+    buf = gray.astype(np.float32).copy()
+    h, w = buf.shape
+    out = np.zeros((h, w), np.uint8)
+    for y in range(h):
+        for x in range(w):
+            old = buf[y, x]
+            new = 255.0 if old > 127.5 else 0.0
+            out[y, x] = new > 0
+            err = old - new
+            if x + 1 < w:
+                buf[y, x + 1] += err * 7 / 16
+            if y + 1 < h:
+                if x > 0:
+                    buf[y + 1, x - 1] += err * 3 / 16
+                buf[y + 1, x] += err * 5 / 16
+                if x + 1 < w:
+                    buf[y + 1, x + 1] += err * 1 / 16
+    return out
+
+def test_diagonal_diffusion_matches_scanline_reference():
+    rng = np.random.default_rng(1)
+    rgb = rng.integers(0, 256, (23, 37, 3)).astype(np.uint8)
+    got = fb.quantize(rgb, "bw", "fs")
+    want = _fs_reference(fb._gray(rgb.astype(np.float32)))
+    assert np.mean(got != want) < 0.01                            # float32 누적 순서 차이로 경계값만 드물게 다름
+
+def test_preview_round_trip():
+    rng = np.random.default_rng(2)
+    img = Image.fromarray(rng.integers(0, 256, (480, 648, 3)).astype(np.uint8), "RGB")
+    buf = fb.render(img, "gdeq0583t31", dither="ordered")
+    assert fb.render(fb.preview(buf).convert("RGB"), "gdeq0583t31", dither="none") == buf
@@ -0,0 +1,54 @@
+# generate_bmp.MapRenderer: frame() / window() 가 같은 결과를 만드는지, 부분 갱신 크기
+import numpy as np
+import pytest
+from PIL import Image
+
+from framebuffer import frame_bytes
+from generate_bmp import MapRenderer
+
+@pytest.fixture(scope="module")
+def src():
+    y, x = np.mgrid[0:240, 0:320]
+    rgb = np.stack([(x * 255 // 319), (y * 255 // 239), ((x + y) % 256)], axis=2).astype(np.uint8)
+    return Image.fromarray(rgb, "RGB")
+
+@pytest.fixture(scope="module", params=["gdeq0583t31", "epd5in65f"])
+def renderer(request, src):
+    return MapRenderer(src, request.param, dither="ordered")
+
+def _apply(mr: MapRenderer, frame: bytes, rects) -> bytes:
+    buf = np.frombuffer(frame, np.uint8).reshape(mr.height, -1).copy()
+    for x, y, w, h, data in rects:
+        assert x % mr.ppb == 0 and w % mr.ppb == 0          # 바이트 경계
+        buf[y:y + h, x // mr.ppb:(x + w) // mr.ppb] = np.frombuffer(data, np.uint8).reshape(h, w // mr.ppb)
+    return buf.tobytes()
+
+def test_frame_size_matches_panel(renderer):
+    assert len(renderer.frame(160, 120)) == frame_bytes(renderer.panel)
+    assert len(renderer.base.tobytes()) == frame_bytes(renderer.panel)
+
+def test_accepts_path_or_image(tmp_path, src):
+    path = tmp_path / "map.png"
+    src.save(path)
+    assert MapRenderer(str(path), dither="ordered").frame(10, 10) == MapRenderer(src, dither="ordered").frame(10, 10)
+
+@pytest.mark.parametrize("prev, cur", [((40, 40), (280, 200)), ((100, 100), (104, 103)), (None, (160, 120)),
+                                       ((0, 0), (319, 239))])
+def test_window_updates_previous_frame_to_new_frame(renderer, prev, cur):
+    before = renderer.frame(*prev) if prev else renderer.base.tobytes()
+    assert _apply(renderer, before, renderer.window(*cur, prev=prev)) == renderer.frame(*cur)
+
+def test_diagonal_move_sends_two_small_rects(renderer):
+    rects = renderer.window(280, 200, prev=(40, 40))
+    assert len(rects) == 2
+    marker = 2 * renderer.radius + 1 + 2 * renderer.ppb   # 마커 + 바이트 정렬 여유
+    for x, y, w, h, data in rects:
+        assert w <= marker and h <= 2 * renderer.radius + 1
+        assert len(data) == h * w // renderer.ppb
+
+def test_overlapping_move_is_one_rect(renderer):
+    assert len(renderer.window(104, 103, prev=(100, 100))) == 1
+
+def test_off_map_marker(renderer):
+    assert renderer.window(-1000, -1000) == []
+    assert renderer.frame(-1000, -1000) == renderer.base.tobytes()
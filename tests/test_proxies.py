@@ -0,0 +1,64 @@
+# display.py / nfc_r.py: nfc_server 응답을 예전 모양으로 전달하는지 (nfc_server 호출은 가짜 응답으로 대체)
+import io, json, urllib.error
+
+from fastapi.testclient import TestClient
+
+import display, nfc_r
+
+class _Resp(io.BytesIO):
+    def __init__(self, status, body: bytes, headers: dict):
+        super().__init__(body)
+        self.status, self.headers = status, headers
+
+def _server(monkeypatch, module, routes: dict):
+    """routes: 경로 → (status, body, headers). 요청 기록을 돌려준다."""
+    seen = []
+
+    def urlopen(req, timeout=None):
+        path = req.full_url[len(module.NFC_SERVER_URL):]
+        seen.append((path, dict(req.header_items())))
+        status, body, headers = routes[path]
+        if status >= 400:
+            raise urllib.error.HTTPError(req.full_url, status, "err", headers, io.BytesIO(body))
+        return _Resp(status, body, headers)
+    monkeypatch.setattr(module.urllib.request, "urlopen", urlopen)
+    return seen
+
+ITEM = {"v": 1, "token": "T1", "name": "홍길동", "school": "S대", "year": "3", "major": "EE",
+        "email": "h@example.com", "top": ""}
+
+def test_display_keeps_legacy_shape(monkeypatch):
+    body = json.dumps(ITEM, ensure_ascii=False).encode()
+    seen = _server(monkeypatch, display, {"/display/name/%ED%99%8D%EA%B8%B8%EB%8F%99": (200, body, {"ETag": '"e1"'})})
+    r = TestClient(display.app).get("/display/홍길동")
+    assert r.status_code == 200 and r.headers["etag"] == '"e1"'
+    assert r.json() == {"이름": "홍길동", "학교": "S대", "학년": "3", "전공": "EE",
+                        "이메일": "h@example.com", "Top_Industries": ""}   # 클러스터 행이 없어도 200
+    assert seen[0][0].startswith("/display/name/")
+
+def test_display_passes_404_and_304(monkeypatch):
+    _server(monkeypatch, display, {
+        "/display/name/x": (404, json.dumps({"detail": "없음"}).encode(), {}),
+        "/display/name/y": (304, b"", {"ETag": '"e2"'}),
+    })
+    c = TestClient(display.app)
+    r = c.get("/display/x")
+    assert r.status_code == 404 and r.json()["detail"] == "없음"
+    assert c.get("/display/y", headers={"If-None-Match": '"e2"'}).status_code == 304
+
+def test_nfc_r_proxies_profile_and_404(monkeypatch):
+    seen = _server(monkeypatch, nfc_r, {
+        "/user/a": (200, "<h1>a</h1>".encode(), {"ETag": '"p"'}),
+        "/user/b": (404, b"{}", {}),
+    })
+    c = TestClient(nfc_r.app)
+    r = c.get("/user/a", headers={"If-None-Match": '"old"'})
+    assert r.status_code == 200 and "<h1>a</h1>" in r.text and r.headers["etag"] == '"p"'
+    assert seen[0][1].get("If-none-match") == '"old"'
+    assert c.get("/user/b").status_code == 404
+
+def test_nfc_r_unreachable_server_is_502(monkeypatch):
+    def urlopen(req, timeout=None):
+        raise urllib.error.URLError("refused")
+    monkeypatch.setattr(nfc_r.urllib.request, "urlopen", urlopen)
+    assert TestClient(nfc_r.app).get("/user/a").status_code == 502